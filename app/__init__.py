@@ -1,10 +1,64 @@
 # app/__init__.py
 
 import logging
+import os
+import weakref
+import click
 from flask import Flask, jsonify
+from sqlalchemy.engine import make_url
+from .binds import init_binds, restart_bind_init, start_bind_init
+from .cache import init_cache, register_invalidation
+from .compression import init_compression
 from .config import config
+from .models import db
+from .passwords import HashingOverloaded, init_password_hasher
+from .pool import dispose_after_fork, init_engine_options, warm_pool
+from .popularity import init_popularity
+from .recent import init_recent_searches
+from .replicas import init_replicas
 from .routes import api
+from .serialization import init_serialization
 from .services import DatabaseService
+from .storage import init_snapshots, is_file_url, is_memory_database
+
+# Каталог миграций схемы (flask db upgrade) в корне проекта
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations'
+)
+
+_migrate = None
+
+
+def get_migrate():
+    """Расширение Flask-Migrate, создаваемое при первом обращении.
+
+    flask_migrate импортирует alembic, а это около половины времени
+    импорта приложения, поэтому он загружается только когда нужен.
+    """
+    global _migrate
+    if _migrate is None:
+        from flask_migrate import Migrate
+        _migrate = Migrate(directory=MIGRATIONS_DIR)
+    return _migrate
+
+
+def __getattr__(name):
+    # from app import migrate
+    if name == 'migrate':
+        return get_migrate()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def needs_migrations(app):
+    """Нужны ли приложению миграции.
+
+    Они нужны файловой SQLite (схема обновляется при запуске) и командам
+    flask CLI (flask db ...). База в памяти создается create_all().
+    """
+    return (
+        is_file_url(make_url(app.config['SQLALCHEMY_DATABASE_URI']))
+        or click.get_current_context(silent=True) is not None
+    )
 
 
 def create_app(config_name='default'):
@@ -20,8 +74,38 @@ def create_app(config_name='default'):
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
 
-    # Инициализация SQLite базы данных (в памяти)
+    # JSON-провайдер выбранного движка сериализации
+    init_serialization(app)
+
+    # Кеш чтений и его инвалидация по событиям моделей
+    init_cache(app)
+    register_invalidation(db.Model)
+
+    # Сжатие ответов по Accept-Encoding
+    init_compression(app)
+
+    # Пул хеширования паролей
+    init_password_hasher(app)
+
+    # Недавние поиски и популярность книг
+    init_recent_searches(app)
+    init_popularity(app)
+
+    # Миграции нужны до инициализации файловой SQLite (flask db upgrade)
+    if needs_migrations(app):
+        get_migrate().init_app(app, db)
+
+    # Реплики и дополнительные базы (по исходным параметрам engine) и
+    # инициализация SQLite базы данных (в памяти или файловой) с
+    # параметрами пула и прогревом пула до приема запросов
+    init_replicas(app)
+    init_binds(app)
+    init_engine_options(app)
     DatabaseService.init_sqlite_db(app)
+    with app.app_context():
+        warm_pool(db.engine, app.config['DB_POOL_WARMUP'])
+    init_snapshots(app)
+    init_preload(app)
 
     # Регистрация блупринтов
     app.register_blueprint(api, url_prefix='/api')
@@ -35,6 +119,12 @@ def create_app(config_name='default'):
     def bad_request(error):  # Removed unused 'error' argument for flake8
         return jsonify({'error': 'Неправильный запрос'}), 400
 
+    @app.errorhandler(HashingOverloaded)
+    def hashing_overloaded(error):
+        response = jsonify({'error': 'Сервис временно перегружен'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
     @app.errorhandler(500)
     def server_error(error):  # Removed unused 'error' argument for flake8
         return jsonify({'error': 'Внутренняя ошибка сервера'}), 500
@@ -50,26 +140,72 @@ def create_app(config_name='default'):
     return app
 
 
-def init_additional_databases(app):
-    """Инициализация дополнительных баз данных на основе конфигурации."""
-    # Инициализация PostgreSQL, если настроено
-    postgres_uri = app.config.get('POSTGRES_URI')
-    if postgres_uri:
-        try:
-            DatabaseService.init_postgres_db(app, postgres_uri)
-            app.logger.info('База данных PostgreSQL успешно инициализирована')
-        except Exception as e:
-            app.logger.error(
-                f'Ошибка инициализации базы данных PostgreSQL: {str(e)}'
-            )
+def init_preload(app):
+    """Поддержка создания приложения до fork (gunicorn --preload).
+
+    Мастер импортирует модули, создает приложение и заполняет базу один
+    раз, воркеры получают их копией при fork. В каждом воркере после
+    fork пулы engine основной, дополнительных баз и реплик сбрасываются
+    (соединения родителя не используются совместно) и прогреваются
+    заново, а незавершенная инициализация дополнительных баз запускается
+    заново (пул такой базы прогревается после ее инициализации).
+
+    Соединение SQLite нельзя использовать после fork, поэтому основная
+    база в памяти, созданная мастером, в воркере создается и заполняется
+    заново на собственном соединении.
+    """
+    if not hasattr(os, 'register_at_fork'):  # pragma: no cover - Windows
+        return
+    app_ref = weakref.ref(app)
 
-    # Инициализация MySQL, если настроено
-    mysql_uri = app.config.get('MYSQL_URI')
-    if mysql_uri:
+    def after_fork_in_child():
+        app = app_ref()
+        if app is None:
+            return
+        with app.app_context():
+            if is_memory_database(db.engine):
+                # Новый StaticPool - новое соединение и пустая база
+                db.engine.dispose(close=False)
+                DatabaseService.create_database(app)
+            engines = list(db.engines.values())
+            warm = [db.engine] + [
+                db.engines[key]
+                for key, health in app.extensions['binds'].items()
+                if health['status'] == 'ready'
+            ]
+        replicas = app.extensions.get('replicas')
+        if replicas is not None:
+            engines += replicas.engines
+            warm += replicas.engines
+        for engine in engines:
+            dispose_after_fork(engine)
+        warm_engines(app, warm)
+        restart_bind_init(app)
+
+    os.register_at_fork(after_in_child=after_fork_in_child)
+
+
+def warm_engines(app, engines):
+    """Прогреть пулы engines на DB_POOL_WARMUP соединений.
+
+    Недоступная база не мешает запуску воркера: ошибка записывается в
+    лог, пул такой базы открывает соединения по запросам.
+    """
+    for engine in engines:
         try:
-            DatabaseService.init_mysql_db(app, mysql_uri)
-            app.logger.info('База данных MySQL успешно инициализирована')
+            warm_pool(engine, app.config['DB_POOL_WARMUP'])
         except Exception as e:
-            app.logger.error(
-                f'Ошибка инициализации базы данных MySQL: {str(e)}'
+            app.logger.warning(
+                f'Не удалось прогреть пул {engine.url!r}: {str(e)}'
             )
+
+
+def init_additional_databases(app):
+    """Инициализация дополнительных баз данных на основе конфигурации.
+
+    PostgreSQL (POSTGRES_URI) и MySQL (MYSQL_URI) подключаются как
+    отдельные базы SQLALCHEMY_BINDS со своими пулами; схема создается в
+    фоне, параллельно для всех баз. Состояние баз - в /api/health.
+    Возвращает потоки инициализации.
+    """
+    return start_bind_init(app, DatabaseService.init_bind_db)
@@ -0,0 +1,108 @@
+# app/binds.py
+
+import threading
+import time
+from flask import current_app, has_app_context
+from sqlalchemy.engine import make_url
+from .pool import engine_options
+
+# Дополнительные базы: ключ в SQLALCHEMY_BINDS -> параметр с URI
+BIND_URIS = {'postgres': 'POSTGRES_URI', 'mysql': 'MYSQL_URI'}
+
+
+def driver_available(uri):
+    """Установлен ли драйвер DBAPI для URI."""
+    try:
+        make_url(uri).get_dialect().import_dbapi()
+    except ImportError:
+        return False
+    return True
+
+
+def set_bind_status(app, key, status, error=None, init_ms=None):
+    """Состояние дополнительной базы для /api/health."""
+    app.extensions['binds'][key] = {
+        'status': status, 'error': error, 'init_ms': init_ms
+    }
+
+
+def init_binds(app):
+    """SQLALCHEMY_BINDS для дополнительных баз перед db.init_app().
+
+    Каждая база получает свой engine и пул с параметрами engine_options()
+    (короткий тайм-аут подключения). Базы без установленного драйвера не
+    подключаются и отмечаются как unavailable. Вызывается до
+    init_engine_options(), как и init_replicas().
+    """
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    app.extensions['binds'] = {}
+    for key, name in BIND_URIS.items():
+        uri = app.config.get(name)
+        if not uri:
+            continue
+        if not driver_available(uri):
+            set_bind_status(
+                app, key, 'unavailable',
+                error=f'Не установлен драйвер {make_url(uri).drivername}'
+            )
+            continue
+        binds[key] = dict(engine_options(uri, app.config), url=uri)
+        set_bind_status(app, key, 'pending')
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def _init_bind(app, key, init):
+    started = time.perf_counter()
+    try:
+        with app.app_context():
+            init(key)
+    except Exception as e:
+        set_bind_status(app, key, 'error', error=str(getattr(e, 'orig', e)))
+        app.logger.error(
+            f'Ошибка инициализации базы данных {key}: {str(e)}'
+        )
+        return
+    init_ms = round((time.perf_counter() - started) * 1000, 1)
+    set_bind_status(app, key, 'ready', init_ms=init_ms)
+    app.logger.info(f'База данных {key} инициализирована за {init_ms} мс')
+
+
+def start_bind_init(app, init):
+    """Фоновая инициализация дополнительных баз вызовом init(key).
+
+    Каждая база инициализируется в своем потоке, поэтому недоступный
+    сервер не задерживает ни запуск воркера, ни другие базы. Возвращает
+    запущенные потоки.
+    """
+    app.extensions['binds_init'] = init
+    threads = []
+    for key, health in app.extensions['binds'].items():
+        if health['status'] != 'pending':
+            continue
+        thread = threading.Thread(
+            target=_init_bind, args=(app, key, init),
+            name=f'init-bind-{key}', daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+    return threads
+
+
+def restart_bind_init(app):
+    """Продолжить инициализацию баз в дочернем процессе после fork.
+
+    Потоки родителя не переживают fork, поэтому базы, чья инициализация
+    была начата, но не завершена до fork (gunicorn --preload), снова
+    инициализируются в воркере; создание схемы идемпотентно.
+    """
+    init = app.extensions.get('binds_init')
+    if init is None:
+        return []
+    return start_bind_init(app, init)
+
+
+def bind_health():
+    """Состояние дополнительных баз текущего приложения."""
+    if not has_app_context():
+        return {}
+    return dict(current_app.extensions.get('binds', {}))
@@ -0,0 +1,371 @@
+# app/cache.py
+
+import base64
+import functools
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, object_session
+
+# Маркер отсутствия значения в кеше (None - допустимое значение)
+MISSING = object()
+
+
+class MemoryCacheBackend:
+    """LRU-кеш в памяти процесса с ограничением по числу записей и TTL."""
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_versions(self, namespaces):
+        with self._lock:
+            return [self._versions.get(ns, 0) for ns in namespaces]
+
+    def bump_version(self, namespace):
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """Кеш в файле SQLite, общий для всех воркеров gunicorn на хосте.
+
+    Значения хранятся в JSON, файл открывается в режиме WAL, чтобы чтения
+    воркеров не блокировались записью. Каждый поток использует собственное
+    соединение.
+    """
+
+    def __init__(self, path, max_entries=1024, ttl=60):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._sets = 0
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache_entries ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+            'expires REAL NOT NULL)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache_versions ('
+            'namespace TEXT PRIMARY KEY, version INTEGER NOT NULL)'
+        )
+
+    def _connection(self):
+        if self._pid != os.getpid():
+            # Соединение SQLite нельзя использовать после fork
+            self._local = threading.local()
+            self._pid = os.getpid()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None
+            )
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT value, expires FROM cache_entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return MISSING
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires) '
+            'VALUES (?, ?, ?)',
+            (key, json.dumps(value), time.time() + self.ttl)
+        )
+        # Периодическая очистка устаревших и самых старых записей
+        self._sets += 1
+        if self._sets % 100 == 0:
+            self._evict(conn)
+
+    def _evict(self, conn):
+        conn.execute(
+            'DELETE FROM cache_entries WHERE expires < ?', (time.time(),)
+        )
+        conn.execute(
+            'DELETE FROM cache_entries WHERE key IN ('
+            'SELECT key FROM cache_entries ORDER BY expires DESC '
+            'LIMIT -1 OFFSET ?)', (self.max_entries,)
+        )
+
+    def get_versions(self, namespaces):
+        rows = dict(self._connection().execute(
+            'SELECT namespace, version FROM cache_versions '
+            'WHERE namespace IN ({})'.format(','.join('?' * len(namespaces))),
+            list(namespaces)
+        ).fetchall())
+        return [rows.get(ns, 0) for ns in namespaces]
+
+    def bump_version(self, namespace):
+        self._connection().execute(
+            'INSERT INTO cache_versions (namespace, version) VALUES (?, 1) '
+            'ON CONFLICT(namespace) DO UPDATE SET version = version + 1',
+            (namespace,)
+        )
+
+    def clear(self):
+        conn = self._connection()
+        conn.execute('DELETE FROM cache_entries')
+        conn.execute('DELETE FROM cache_versions')
+
+    def __len__(self):
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM cache_entries'
+        ).fetchone()[0]
+
+
+class ResponseCache:
+    """Кеш результатов чтения сервисов с инвалидацией по пространствам имен.
+
+    Пространство имен соответствует таблице (authors, books, reviews).
+    В ключ записи входят текущие версии всех пространств, от которых она
+    зависит, поэтому инвалидация - это инкремент версии за O(1), а старые
+    записи вытесняются по LRU/TTL.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.body_hits = 0
+        self._lock = threading.Lock()
+
+    def get_or_call(self, namespaces, key, producer):
+        versions = self.backend.get_versions(namespaces)
+        full_key = '{}|{}'.format(
+            ','.join(f'{ns}.{v}' for ns, v in zip(namespaces, versions)),
+            key
+        )
+        value = self.backend.get(full_key)
+        if value is not MISSING:
+            with self._lock:
+                self.hits += 1
+            data, status_code = value
+            return data, status_code
+
+        with self._lock:
+            self.misses += 1
+        data, status_code = producer()
+        # Кешируются только успешные ответы
+        if status_code == 200:
+            self.backend.set(full_key, [data, status_code])
+        return data, status_code
+
+    def get_body(self, key):
+        """Сжатое тело ответа, сохраненное set_body(), либо None."""
+        value = self.backend.get('body|' + key)
+        if value is MISSING:
+            return None
+        with self._lock:
+            self.body_hits += 1
+        return base64.b64decode(value)
+
+    def set_body(self, key, body):
+        """Сохранение тела ответа (bytes) рядом с результатами сервисов.
+
+        Ключ должен однозначно задавать представление (например, включать
+        ETag), т.к. версии пространств имен в него не добавляются. Тело
+        хранится в base64, чтобы подходить для любого бэкенда.
+        """
+        self.backend.set('body|' + key, base64.b64encode(body).decode('ascii'))
+
+    def invalidate(self, namespace):
+        self.backend.bump_version(namespace)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'entries': len(self.backend),
+            'hits': self.hits,
+            'misses': self.misses,
+            'compressed_hits': self.body_hits,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0
+        }
+
+
+def shared_database_file(config):
+    """Путь файловой SQLite, общей для воркеров, либо None."""
+    url = make_url(config.get('SQLALCHEMY_DATABASE_URI') or 'sqlite://')
+    if url.get_backend_name() == 'sqlite' and url.database not in (
+            None, '', ':memory:'):
+        return url.database
+    return None
+
+
+def cache_backend_name(config):
+    """Бэкенд кеша: CACHE_BACKEND либо выбор по базе приложения.
+
+    Бэкенд memory сбрасывается после записи только в процессе, который
+    ее сделал. Если воркеры работают с общей базой (файловая SQLite или
+    реплики), остальные воркеры отдавали бы устаревшие данные до CACHE_TTL,
+    поэтому по умолчанию для них выбирается общий кеш sqlite.
+    """
+    backend = config.get('CACHE_BACKEND')
+    if backend:
+        return backend
+    if shared_database_file(config) or config.get('READ_REPLICA_URIS'):
+        return 'sqlite'
+    return 'memory'
+
+
+def create_backend(config):
+    """Создание бэкенда кеша по настройкам приложения.
+
+    Общий кеш файловой SQLite по умолчанию лежит рядом с базой, чтобы
+    приложения с разными базами не делили кеш.
+    """
+    backend = cache_backend_name(config)
+    max_entries = config.get('CACHE_MAX_ENTRIES', 1024)
+    ttl = config.get('CACHE_TTL', 60)
+    if backend == 'memory':
+        return MemoryCacheBackend(max_entries, ttl)
+    if backend == 'sqlite':
+        path = config.get('CACHE_SQLITE_PATH')
+        if not path and shared_database_file(config):
+            path = shared_database_file(config) + '-cache'
+        if not path:
+            path = os.path.join(
+                tempfile.gettempdir(), 'book_catalog_cache.sqlite3'
+            )
+        return SQLiteCacheBackend(path, max_entries, ttl)
+    raise ValueError(f'Неизвестный бэкенд кеша: {backend}')
+
+
+def init_cache(app):
+    """Подключение кеша к приложению (CACHE_BACKEND='none' отключает его)."""
+    if cache_backend_name(app.config) == 'none':
+        app.extensions['cache'] = None
+        return
+    app.extensions['cache'] = ResponseCache(create_backend(app.config))
+
+
+def get_cache():
+    """Кеш текущего приложения либо None, если он отключен."""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('cache')
+
+
+def read_source():
+    """С какой базы читает текущий запрос: primary или replica."""
+    if has_app_context() and g.get('read_replica') is not None:
+        return 'replica'
+    return 'primary'
+
+
+def cached(*namespaces):
+    """Декоратор кеширования результата (data, status_code) метода сервиса.
+
+    Ключ строится из базы, с которой идет чтение (основная или реплика),
+    имени функции и ее аргументов; namespaces - таблицы, изменение
+    которых делает результат устаревшим. Чтения с отстающей реплики
+    кешируются отдельно, поэтому клиент, читающий после записи с основной
+    базы, не получит их из кеша.
+    """
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            if cache is None:
+                return f(*args, **kwargs)
+            key = '{}:{}:{!r}:{!r}'.format(
+                read_source(), f.__qualname__, args, sorted(kwargs.items())
+            )
+            return cache.get_or_call(
+                namespaces, key, lambda: f(*args, **kwargs)
+            )
+        return wrapper
+    return decorator
+
+
+def mark_dirty(session, *namespaces):
+    """Отметить пространства имен кеша для инвалидации после коммита.
+
+    Вызывается автоматически из событий маппера; операции Core
+    (массовые insert/update/delete) должны вызывать ее явно.
+    """
+    session.info.setdefault('cache_dirty', set()).update(namespaces)
+
+
+def _on_model_change(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        mark_dirty(session, mapper.persist_selectable.name)
+
+
+def _on_commit(session):
+    dirty = session.info.pop('cache_dirty', None)
+    cache = get_cache()
+    if dirty and cache is not None:
+        for namespace in dirty:
+            cache.invalidate(namespace)
+
+
+def _on_rollback(session):
+    session.info.pop('cache_dirty', None)
+
+
+def register_invalidation(model_base):
+    """Подписка на события моделей для инвалидации кеша.
+
+    Изменения накапливаются в session.info и применяются только после
+    успешного коммита, чтобы параллельный запрос не закешировал данные,
+    которые еще могут быть откачены.
+    """
+    for name in ('after_insert', 'after_update', 'after_delete'):
+        if not event.contains(model_base, name, _on_model_change):
+            event.listen(model_base, name, _on_model_change, propagate=True)
+    if not event.contains(Session, 'after_commit', _on_commit):
+        event.listen(Session, 'after_commit', _on_commit)
+        event.listen(Session, 'after_rollback', _on_rollback)
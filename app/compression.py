@@ -0,0 +1,124 @@
+# app/compression.py
+
+import gzip
+from flask import current_app, request
+from .cache import get_cache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli не установлен
+    brotli = None
+
+# Типы ответов, которые имеет смысл сжимать
+COMPRESSIBLE_MIMETYPES = (
+    'application/json', 'application/x-ndjson', 'text/plain', 'text/html'
+)
+
+
+def available_encodings(config):
+    """Кодировки из COMPRESSION_ENCODINGS в порядке предпочтения сервера.
+
+    br пропускается, если модуль brotli не установлен.
+    """
+    encodings = []
+    for encoding in config.get('COMPRESSION_ENCODINGS', '').split(','):
+        encoding = encoding.strip()
+        if encoding == 'br' and brotli is None:
+            continue
+        if encoding in ('br', 'gzip'):
+            encodings.append(encoding)
+    return encodings
+
+
+def negotiate_encoding():
+    """Лучшая кодировка по Accept-Encoding запроса либо None.
+
+    Выбирается кодировка с наибольшим q; при равных q - в порядке
+    COMPRESSION_ENCODINGS. q=0 запрещает кодировку.
+    """
+    best, best_quality = None, 0
+    for encoding in current_app.extensions['compression']:
+        quality = request.accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body, encoding):
+    config = current_app.config
+    if encoding == 'br':
+        return brotli.compress(
+            body, quality=config['COMPRESSION_BROTLI_QUALITY']
+        )
+    return gzip.compress(
+        body, compresslevel=config['COMPRESSION_GZIP_LEVEL'], mtime=0
+    )
+
+
+def body_cache_key(etag, encoding):
+    """Ключ сжатого тела в кеше: представление задается путем и ETag."""
+    return f'{encoding}|{request.full_path}|{etag}'
+
+
+def cached_compressed_response(etag):
+    """Готовый сжатый ответ из кеша для ETag текущего запроса либо None.
+
+    Позволяет отдать популярный ответ без вызова обработчика, повторной
+    сериализации и сжатия.
+    """
+    cache = get_cache()
+    if cache is None or not current_app.extensions.get('compression'):
+        return None
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return None
+    body = cache.get_body(body_cache_key(etag, encoding))
+    if body is None:
+        return None
+    response = current_app.response_class(
+        body, mimetype=current_app.json.mimetype
+    )
+    response.content_encoding = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def compress_response(response):
+    """Сжатие ответа по Accept-Encoding (обработчик after_request).
+
+    Не сжимаются потоковые ответы, ответы с уже заданной кодировкой и
+    тела меньше COMPRESSION_MIN_SIZE. ETag сжатого ответа становится
+    слабым: байты представления отличаются, а смысл - нет. Сжатые тела
+    ответов с ETag сохраняются в кеше чтений.
+    """
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or response.direct_passthrough
+            or response.is_streamed or response.content_encoding):
+        return response
+    body = response.get_data()
+    if len(body) < current_app.config['COMPRESSION_MIN_SIZE']:
+        return response
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    compressed = compress(body, encoding)
+    response.set_data(compressed)
+    response.content_encoding = encoding
+    etag, weak = response.get_etag()
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+        cache = get_cache()
+        if cache is not None and request.method == 'GET':
+            cache.set_body(body_cache_key(etag, encoding), compressed)
+    return response
+
+
+def init_compression(app):
+    """Подключение сжатия ответов (пустой COMPRESSION_ENCODINGS - выкл.)."""
+    encodings = available_encodings(app.config)
+    app.extensions['compression'] = encodings
+    if encodings:
+        app.after_request(compress_response)
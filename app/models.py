@@ -1,10 +1,48 @@
 # app/models.py
 
-from datetime import datetime
+import sqlite3
+from datetime import date, datetime
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class RoutingSession(Session):
+    """Сессия, направляющая чтения запроса на реплику.
+
+    Если обработчик запроса выбрал реплику (g.read_replica, см.
+    replicas.read_replica), SELECT к основной базе выполняются на ней.
+    Запись, flush и запросы к другим базам (bind_key) идут как обычно.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper, clause, bind, **kwargs)
+        if bind is not None or self._flushing or not has_app_context():
+            return engine
+        replica = g.get('read_replica')
+        if (replica is not None and engine is self._db.engine
+                and getattr(clause, 'is_select', False)):
+            return replica
+        return engine
+
 
 # Инициализация SQLAlchemy
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+@event.listens_for(Engine, 'connect')
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """Включение проверки внешних ключей SQLite (по умолчанию выключена).
+
+    Сервисы полагаются на внешние ключи вместо предварительной выборки
+    родительской записи и отвечают 404 при их нарушении.
+    """
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
 
 
 class Author(db.Model):
@@ -16,13 +54,17 @@ class Author(db.Model):
     birth_date = db.Column(db.Date, nullable=True)
     bio = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Индекс нужен для max(updated_at) в валидаторах условного GET
     updated_at = db.Column(
-        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow,
+        index=True
     )
 
-    # Связь с моделью Book
+    # Связь с моделью Book. Книги удаляет сама СУБД (ON DELETE CASCADE),
+    # поэтому при удалении автора они не загружаются в сессию
     books = db.relationship(
-        'Book', backref='author', lazy=True, cascade='all, delete-orphan'
+        'Book', backref='author', lazy=True, cascade='all, delete-orphan',
+        passive_deletes=True
     )
 
     def __repr__(self):
@@ -47,54 +89,89 @@ class Book(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     isbn = db.Column(db.String(13), unique=True, nullable=True)
-    publication_date = db.Column(db.Date, nullable=True)
+    publication_date = db.Column(db.Date, nullable=True, index=True)
     description = db.Column(db.Text, nullable=True)
-    price = db.Column(db.Float, nullable=True)
+    price = db.Column(db.Float, nullable=True, index=True)
     author_id = db.Column(
-        db.Integer, db.ForeignKey('authors.id'), nullable=False
+        db.Integer, db.ForeignKey('authors.id', ondelete='CASCADE'),
+        nullable=False, index=True
     )
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
-        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow,
+        index=True
     )
 
-    # Связь с моделью Review
+    # Связь с моделью Review (удаляются каскадно на уровне СУБД)
     reviews = db.relationship(
-        'Review', backref='book', lazy=True, cascade='all, delete-orphan'
+        'Review', backref='book', lazy=True, cascade='all, delete-orphan',
+        passive_deletes=True
+    )
+    # Агрегаты оценок загружаются вместе с книгой одним JOIN
+    rating_stats = db.relationship(
+        'BookRatingStats', uselist=False, lazy='joined',
+        cascade='all, delete-orphan', passive_deletes=True
     )
 
     def __repr__(self):
         return f'<Book {self.title}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'isbn': self.isbn,
-            'publication_date': self.publication_date.isoformat()
-            if self.publication_date else None,
-            'description': self.description,
-            'price': self.price,
-            'author_id': self.author_id,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+    # Поля представления книги в порядке вывода (для ?fields=) и
+    # связанные объекты, которые можно встроить в ответ (для ?include=)
+    FIELDS = (
+        'id', 'title', 'isbn', 'publication_date', 'description', 'price',
+        'author_id', 'rating', 'created_at', 'updated_at'
+    )
+    INCLUDES = ('author', 'reviews')
+
+    def to_dict(self, fields=None, include=()):
+        """Представление книги.
+
+        fields - подмножество FIELDS (None - все поля, id выводится
+        всегда); обращение только к запрошенным атрибутам не загружает
+        отложенные load_only столбцы.
+        include - встраиваемые связи из INCLUDES.
+        """
+        data = {
+            name: self._field(name) for name in self.FIELDS
+            if fields is None or name in fields or name == 'id'
         }
+        if 'author' in include:
+            data['author'] = self.author.to_dict()
+        if 'reviews' in include:
+            data['reviews'] = [review.to_dict() for review in self.reviews]
+        return data
+
+    def _field(self, name):
+        if name == 'rating':
+            return BookRatingStats.to_rating(self.rating_stats)
+        value = getattr(self, name)
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        return value
 
 
 class Review(db.Model):
     """Модель отзыва."""
     __tablename__ = 'reviews'
+    __table_args__ = (
+        # Отзывы книги в хронологическом порядке
+        db.Index('ix_reviews_book_id_created_at', 'book_id', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     rating = db.Column(db.Integer, nullable=False)  # Оценка от 1-5
     comment = db.Column(db.Text, nullable=True)
     reviewer_name = db.Column(db.String(100), nullable=False)
+    # Отдельный индекс по book_id для keyset-пагинации отзывов книги по id
     book_id = db.Column(
-        db.Integer, db.ForeignKey('books.id'), nullable=False
+        db.Integer, db.ForeignKey('books.id', ondelete='CASCADE'),
+        nullable=False, index=True
     )
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
-        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow,
+        index=True
     )
 
     def __repr__(self):
@@ -112,16 +189,88 @@ class Review(db.Model):
         }
 
 
+class BookRatingStats(db.Model):
+    """Модель агрегатов оценок книги.
+
+    Поддерживается инкрементально при создании, изменении и удалении
+    отзывов, поэтому для рейтинга не нужно сканировать таблицу reviews.
+    """
+    __tablename__ = 'book_rating_stats'
+
+    RATINGS = (1, 2, 3, 4, 5)
+
+    book_id = db.Column(
+        db.Integer, db.ForeignKey('books.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    average = db.Column(db.Float, nullable=True, index=True)
+    rating_1 = db.Column(db.Integer, nullable=False, default=0)
+    rating_2 = db.Column(db.Integer, nullable=False, default=0)
+    rating_3 = db.Column(db.Integer, nullable=False, default=0)
+    rating_4 = db.Column(db.Integer, nullable=False, default=0)
+    rating_5 = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow,
+        index=True
+    )
+
+    def __repr__(self):
+        return f'<BookRatingStats for Book {self.book_id}>'
+
+    @staticmethod
+    def to_rating(stats):
+        """Рейтинг книги для to_dict() (нулевой, если отзывов еще нет)."""
+        if stats is None:
+            return BookRatingStats.make_rating(0, None, ())
+        return BookRatingStats.make_rating(stats.count, stats.average, [
+            getattr(stats, f'rating_{r}') for r in BookRatingStats.RATINGS
+        ])
+
+    @staticmethod
+    def make_rating(count, average, counts):
+        """Рейтинг из значений столбцов (counts - число оценок 1..5)."""
+        if not count:
+            return {
+                'count': 0,
+                'average': None,
+                'histogram': {str(r): 0 for r in BookRatingStats.RATINGS}
+            }
+        return {
+            'count': count,
+            'average': round(average, 2),
+            'histogram': {
+                str(r): n for r, n in zip(BookRatingStats.RATINGS, counts)
+            }
+        }
+
+
+class BookPopularity(db.Model):
+    """Модель сохраненной популярности книги.
+
+    log_score = log2(оценка популярности в момент t) + t / период
+    полураспада; не зависит от момента записи, поэтому строки разных
+    воркеров и сбросов сравниваются напрямую (см. PopularityTracker).
+    """
+    __tablename__ = 'book_popularity'
+
+    book_id = db.Column(
+        db.Integer, db.ForeignKey('books.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    log_score = db.Column(db.Float, nullable=False, index=True)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    def __repr__(self):
+        return f'<BookPopularity for Book {self.book_id}>'
+
+
 # Хранилище данных в памяти для данных, не хранящихся в БД
+# (недавние поиски - в app.recent, популярные книги - в app.popularity)
 memory_store = {
-    'recent_searches': [],
-    'popular_books': [
-        {'id': 1, 'title': 'Python для начинающих', 'popularity': 95},
-        {'id': 2, 'title': 'Чистый код', 'popularity': 92},
-        {'id': 3, 'title': 'Шаблоны проектирования', 'popularity': 88},
-        {'id': 4, 'title': 'Fluent Python', 'popularity': 85},
-        {'id': 5, 'title': 'Эффективный Python', 'popularity': 82},
-    ],
     'site_metrics': {
         'visitors': 12345,
         'page_views': 54321,
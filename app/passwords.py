@@ -0,0 +1,145 @@
+# app/passwords.py
+
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+
+# Формат хеша: pbkdf2_sha256$<итерации>$<соль>$<hex>; число итераций
+# хранится в самом хеше, поэтому его можно повышать без потери старых
+# паролей. Прежний формат <соль>$<hex> соответствует 100000 итераций.
+ALGORITHM = 'pbkdf2_sha256'
+LEGACY_ITERATIONS = 100000
+
+
+class HashingOverloaded(Exception):
+    """Очередь хеширования паролей переполнена."""
+
+
+class PasswordHasher:
+    """Сервис хеширования паролей на ограниченном пуле потоков.
+
+    hashlib.pbkdf2_hmac освобождает GIL, поэтому вычисления в пуле не
+    блокируют остальные потоки воркера. Число одновременно выполняемых и
+    ожидающих задач ограничено: при переполнении очереди сразу
+    выбрасывается HashingOverloaded (ответ 503), а не растет задержка
+    всех запросов.
+    """
+
+    def __init__(self, iterations=100000, max_workers=2, max_pending=8):
+        self.iterations = iterations
+        self.max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+
+    def _get_executor(self):
+        # Пул создается при первом использовании, т.е. уже после fork
+        # воркера gunicorn
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix='pbkdf2'
+                )
+            return self._executor
+
+    def run(self, fn, *args):
+        """Выполнить fn в пуле и дождаться результата."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HashingOverloaded('Очередь хеширования паролей переполнена')
+        with self._lock:
+            self._in_flight += 1
+        start = time.perf_counter()
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+                self._total_seconds += elapsed
+                self._max_seconds = max(self._max_seconds, elapsed)
+            self._slots.release()
+
+    @staticmethod
+    def _derive(password, salt, iterations):
+        return hashlib.pbkdf2_hmac(
+            'sha256', password.encode('utf-8'), salt.encode('utf-8'),
+            iterations
+        ).hex()
+
+    def hash(self, password, salt=None, iterations=None):
+        """Хеширование пароля с солью в формате с числом итераций."""
+        salt = salt or secrets.token_hex(8)
+        iterations = iterations or self.iterations
+        hashed = self.run(self._derive, password, salt, iterations)
+        return f'{ALGORITHM}${iterations}${salt}${hashed}'
+
+    @staticmethod
+    def parse(stored_password):
+        """Разбор хеша в (итерации, соль, hex) с поддержкой старого формата."""
+        parts = stored_password.split('$')
+        if len(parts) == 2:
+            return LEGACY_ITERATIONS, parts[0], parts[1]
+        if len(parts) == 4 and parts[0] == ALGORITHM:
+            return int(parts[1]), parts[2], parts[3]
+        raise ValueError('Неизвестный формат хеша пароля')
+
+    def verify(self, stored_password, provided_password):
+        """Проверка пароля со сравнением за постоянное время."""
+        iterations, salt, expected = self.parse(stored_password)
+        actual = self.run(self._derive, provided_password, salt, iterations)
+        return hmac.compare_digest(actual, expected)
+
+    def needs_rehash(self, stored_password):
+        """Нужно ли перехешировать пароль с текущими параметрами."""
+        iterations, _, _ = self.parse(stored_password)
+        return (
+            not stored_password.startswith(ALGORITHM + '$')
+            or iterations < self.iterations
+        )
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'iterations': self.iterations,
+                'workers': self.max_workers,
+                'in_flight': self._in_flight,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'avg_ms': round(
+                    self._total_seconds / self._completed * 1000, 3
+                ) if self._completed else 0.0,
+                'max_ms': round(self._max_seconds * 1000, 3)
+            }
+
+
+_default_hasher = PasswordHasher()
+
+
+def init_password_hasher(app):
+    """Создание сервиса хеширования паролей по настройкам приложения."""
+    app.extensions['password_hasher'] = PasswordHasher(
+        iterations=app.config['PASSWORD_HASH_ITERATIONS'],
+        max_workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_pending=app.config['PASSWORD_HASH_MAX_PENDING']
+    )
+
+
+def get_hasher():
+    """Сервис хеширования текущего приложения (вне контекста - общий)."""
+    if has_app_context():
+        hasher = current_app.extensions.get('password_hasher')
+        if hasher is not None:
+            return hasher
+    return _default_hasher
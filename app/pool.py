@@ -0,0 +1,157 @@
+# app/pool.py
+
+import threading
+import time
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool, измеряющий время ожидания свободного соединения.
+
+    Ожидание включает открытие нового соединения, если пул еще не
+    заполнен, и блокировку до pool_timeout, если все соединения заняты.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.failures = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._stats_lock:
+                self.failures += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+def engine_options(uri, config):
+    """Параметры create_engine() для URI с учетом диалекта.
+
+    Пул соединений задается на воркер: DB_POOL_SIZE постоянных
+    соединений и до DB_MAX_OVERFLOW временных сверх них. Соединения
+    старше DB_POOL_RECYCLE секунд переоткрываются (MySQL закрывает
+    простаивающие соединения по wait_timeout), pre-ping проверяет
+    соединение перед выдачей. Для серверных СУБД задаются тайм-ауты
+    подключения и выполнения запроса. SQLite в памяти использует
+    StaticPool, поэтому для нее параметры пула не задаются.
+    Явные SQLALCHEMY_ENGINE_OPTIONS имеют приоритет.
+    """
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    options = {}
+    if backend == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            return dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    else:
+        options['pool_pre_ping'] = config['DB_POOL_PRE_PING']
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=config['DB_POOL_SIZE'],
+        max_overflow=config['DB_MAX_OVERFLOW'],
+        # Flask-SQLAlchemy приводит pool_timeout к int (engine_from_config)
+        pool_timeout=config['DB_POOL_TIMEOUT'],
+        pool_recycle=config['DB_POOL_RECYCLE'],
+    )
+    connect_timeout = config['DB_CONNECT_TIMEOUT']
+    statement_timeout = config['DB_STATEMENT_TIMEOUT_MS']
+    if backend == 'postgresql':
+        connect_args = {'connect_timeout': connect_timeout}
+        if statement_timeout:
+            connect_args['options'] = (
+                f'-c statement_timeout={statement_timeout}'
+            )
+        options['connect_args'] = connect_args
+    elif backend == 'mysql':
+        connect_args = {'connect_timeout': connect_timeout}
+        if statement_timeout:
+            # Ограничивает только SELECT (MySQL 5.7.8+)
+            connect_args['init_command'] = (
+                f'SET SESSION max_execution_time={statement_timeout}'
+            )
+        options['connect_args'] = connect_args
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return options
+
+
+def init_engine_options(app):
+    """SQLALCHEMY_ENGINE_OPTIONS для основной базы перед db.init_app()."""
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+        app.config['SQLALCHEMY_DATABASE_URI'], app.config
+    )
+
+
+def pool_metrics(engine):
+    """Состояние пула engine: занятые соединения и время ожидания."""
+    pool = engine.pool
+    metrics = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        metrics.update(
+            size=pool.size(),
+            in_use=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0)
+        )
+    if isinstance(pool, TimedQueuePool):
+        with pool._stats_lock:
+            checkouts = pool.checkouts
+            metrics.update(
+                checkouts=checkouts,
+                failures=pool.failures,
+                avg_wait_ms=round(
+                    pool.wait_seconds / checkouts * 1000, 3
+                ) if checkouts else 0.0,
+                max_wait_ms=round(pool.max_wait_seconds * 1000, 3)
+            )
+    return metrics
+
+
+def warm_pool(engine, count):
+    """Открыть count соединений заранее, до приема запросов воркером.
+
+    Соединения открываются подряд, удерживаются одновременно (иначе пул
+    выдавал бы одно и то же) и возвращаются в пул, поэтому первые
+    запросы не платят за установку соединения. Возвращает число
+    открытых соединений.
+    """
+    pool = engine.pool
+    if not isinstance(pool, QueuePool) or count <= 0:
+        return 0
+    count = min(count, pool.size())
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(engine.raw_connection())
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
+def dispose_after_fork(engine):
+    """Сбросить унаследованные от родителя соединения пула engine.
+
+    Вызывается в дочернем процессе после fork (gunicorn --preload):
+    соединения родителя не закрываются (close=False), чтобы не разорвать
+    их у родителя, а пул начинает открывать собственные. SQLite в памяти
+    пропускается: ее данные живут в единственном соединении StaticPool,
+    и такую базу воркер создает заново (см. init_preload).
+    """
+    url = engine.url
+    if url.get_backend_name() == 'sqlite' and url.database in (
+            None, '', ':memory:'):
+        return False
+    engine.dispose(close=False)
+    return True
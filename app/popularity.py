@@ -0,0 +1,200 @@
+# app/popularity.py
+
+import heapq
+import math
+import random
+import threading
+import time
+from array import array
+from operator import itemgetter
+from flask import current_app, has_app_context
+
+# Простое число Мерсенна 2^61 - 1 для попарно независимых хешей
+PRIME = (1 << 61) - 1
+
+# Через сколько периодов полураспада веса пересчитываются к новой эпохе
+# (2^64 еще далек от переполнения float)
+RENORMALIZE_AFTER = 64
+
+
+class CountMinSketch:
+    """Count-Min Sketch: приближенные счетчики для целых ключей.
+
+    depth строк по width счетчиков; оценка ключа - минимум его счетчиков
+    по строкам, она не меньше истинного значения и превышает его не
+    более чем на долю e/width от суммы всех весов. Память фиксирована и
+    не зависит от числа ключей.
+    """
+
+    def __init__(self, width=2048, depth=4, seed=0):
+        rng = random.Random(seed)
+        self.width = width
+        self.depth = depth
+        self._hashes = [
+            (rng.randrange(1, PRIME), rng.randrange(PRIME))
+            for _ in range(depth)
+        ]
+        self._rows = [array('d', bytes(8 * width)) for _ in range(depth)]
+
+    def add(self, key, weight=1.0):
+        """Прибавить weight к ключу и вернуть его новую оценку."""
+        width = self.width
+        estimate = math.inf
+        for row, (a, b) in zip(self._rows, self._hashes):
+            i = (a * key + b) % PRIME % width
+            row[i] += weight
+            if row[i] < estimate:
+                estimate = row[i]
+        return estimate
+
+    def estimate(self, key):
+        width = self.width
+        return min(
+            row[(a * key + b) % PRIME % width]
+            for row, (a, b) in zip(self._rows, self._hashes)
+        )
+
+    def scale(self, factor):
+        """Умножить все счетчики на factor."""
+        for row in self._rows:
+            for i, value in enumerate(row):
+                if value:
+                    row[i] = value * factor
+
+    @property
+    def nbytes(self):
+        return sum(row.itemsize * len(row) for row in self._rows)
+
+
+class PopularityTracker:
+    """Самые популярные ключи с экспоненциальным затуханием.
+
+    Веса событий затухают вдвое за half_life секунд. Вместо уменьшения
+    всех счетчиков со временем новые события получают растущий вес
+    2^((t - epoch) / half_life) (forward decay); раз в RENORMALIZE_AFTER
+    периодов счетчики пересчитываются к новой эпохе.
+
+    Кандидаты в лидеры (capacity ключей с наибольшей оценкой) хранятся в
+    словаре и min-куче. Оценки в куче могут отставать от словаря: при
+    вытеснении устаревшая вершина сначала обновляется. Запись события -
+    O(depth + log capacity), память не зависит от размера каталога.
+    """
+
+    def __init__(self, capacity=100, width=2048, depth=4, half_life=3600,
+                 clock=time.time):
+        self.capacity = capacity
+        self.half_life = half_life
+        self.clock = clock
+        self.sketch = CountMinSketch(width, depth)
+        self._epoch = clock()
+        self._flushed = self._epoch
+        self._top = {}
+        self._heap = []
+        self._lock = threading.Lock()
+
+    def _exponent(self, now):
+        return (now - self._epoch) / self.half_life
+
+    def record(self, key, weight=1.0):
+        """Учесть событие для ключа с весом weight (в момент clock())."""
+        now = self.clock()
+        with self._lock:
+            exponent = self._exponent(now)
+            if exponent > RENORMALIZE_AFTER:
+                self._renormalize(now)
+                exponent = 0.0
+            self._offer(key, self.sketch.add(key, weight * 2 ** exponent))
+
+    def _renormalize(self, now):
+        factor = 2 ** -self._exponent(now)
+        self.sketch.scale(factor)
+        self._top = {key: score * factor for key, score in self._top.items()}
+        self._heap = [(score, key) for key, score in self._top.items()]
+        heapq.heapify(self._heap)
+        self._epoch = now
+
+    def _offer(self, key, estimate):
+        top = self._top
+        if key in top:
+            # Оценка в куче для ключа станет устаревшей (меньшей)
+            top[key] = estimate
+            return
+        if len(top) < self.capacity:
+            top[key] = estimate
+            heapq.heappush(self._heap, (estimate, key))
+            return
+        heap = self._heap
+        while True:
+            smallest, smallest_key = heap[0]
+            current = top[smallest_key]
+            if current != smallest:
+                heapq.heapreplace(heap, (current, smallest_key))
+                continue
+            if estimate > smallest:
+                heapq.heapreplace(heap, (estimate, key))
+                del top[smallest_key]
+                top[key] = estimate
+            return
+
+    def top(self, k):
+        """k самых популярных ключей: [(ключ, оценка на текущий момент)]."""
+        now = self.clock()
+        with self._lock:
+            factor = 2 ** -self._exponent(now)
+            leaders = heapq.nlargest(k, self._top.items(), key=itemgetter(1))
+        return [(key, score * factor) for key, score in leaders]
+
+    def discard(self, key):
+        """Исключить ключ из лидеров (например, удаленную книгу)."""
+        with self._lock:
+            if self._top.pop(key, None) is not None:
+                self._heap = [(s, k) for s, k in self._heap if k != key]
+                heapq.heapify(self._heap)
+
+    def flush_due(self, interval):
+        """Пора ли сбросить лидеров в БД (отмечает сброс начатым)."""
+        now = self.clock()
+        with self._lock:
+            if now - self._flushed < interval:
+                return False
+            self._flushed = now
+            return True
+
+    def snapshot(self):
+        """Лидеры с оценками в log2-шкале, не зависящей от времени.
+
+        log_score = log2(оценка в момент t) + t / half_life одинаков для
+        любого t, поэтому значения разных моментов и процессов можно
+        сравнивать напрямую.
+        """
+        with self._lock:
+            offset = self._epoch / self.half_life
+            return [
+                (key, math.log2(score) + offset)
+                for key, score in self._top.items() if score > 0
+            ]
+
+    def load(self, rows):
+        """Восстановление лидеров из пар (ключ, log_score) snapshot()."""
+        with self._lock:
+            offset = self._epoch / self.half_life
+            for key, log_score in rows:
+                weight = 2 ** min(log_score - offset, RENORMALIZE_AFTER)
+                self._offer(key, self.sketch.add(key, weight))
+
+
+def init_popularity(app):
+    """Создание трекера популярности по настройкам приложения."""
+    app.extensions['popularity'] = PopularityTracker(
+        capacity=app.config['POPULARITY_CAPACITY'],
+        width=app.config['POPULARITY_SKETCH_WIDTH'],
+        depth=app.config['POPULARITY_SKETCH_DEPTH'],
+        half_life=app.config['POPULARITY_HALF_LIFE']
+    )
+
+
+def get_popularity():
+    """Трекер популярности текущего приложения либо None."""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('popularity')
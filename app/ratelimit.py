@@ -0,0 +1,312 @@
+# app/ratelimit.py
+
+import logging
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+def sliding_window_decision(window_start, prev, curr, now, limit, window):
+    """Решение скользящего окна со счетчиками.
+
+    Число запросов за последние window секунд оценивается как
+    prev * (доля предыдущего окна, попадающая в интервал) + curr.
+    Возвращает кортеж (разрешен ли запрос, секунд до повтора).
+    """
+    weight = 1 - (now - window_start) / window
+    if prev * weight + curr >= limit:
+        return False, int(window_start + window - now) + 1
+    return True, 0
+
+
+def roll_window(state, now, window):
+    """Сдвиг состояния [window_start, prev, curr] к текущему окну."""
+    current_start = now - now % window
+    if state is None or current_start - state[0] >= 2 * window:
+        return [current_start, 0, 0]
+    if current_start - state[0] >= window:
+        return [current_start, state[2], 0]
+    return state
+
+
+class MemoryBackend:
+    """Хранилище счетчиков в памяти процесса.
+
+    Ключи хранятся в OrderedDict в порядке последнего обращения: ключи,
+    простаивающие дольше двух окон, удаляются как устаревшие, а при
+    превышении max_keys вытесняется самый давно активный ключ.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window, now):
+        with self._lock:
+            state = roll_window(self._keys.get(key), now, window)
+            self._keys[key] = state
+            self._keys.move_to_end(key)
+            allowed, retry_after = sliding_window_decision(
+                state[0], state[1], state[2], now, limit, window
+            )
+            if allowed:
+                state[2] += 1
+            self._evict(now - 2 * window)
+        return allowed, retry_after
+
+    def _evict(self, idle_before):
+        """Удаление простаивающих ключей и ограничение их числа.
+
+        Самые давно активные ключи находятся в начале словаря, поэтому
+        очистка останавливается на первом активном ключе.
+        """
+        keys = self._keys
+        while keys:
+            key = next(iter(keys))
+            if len(keys) > self.max_keys or keys[key][0] < idle_before:
+                del keys[key]
+            else:
+                break
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class SQLiteBackend:
+    """Хранилище счетчиков в файле SQLite, общее для воркеров gunicorn.
+
+    Файл открывается в режиме WAL с synchronous=OFF: счетчики не требуют
+    долговечности, а проверка укладывается в одну короткую транзакцию
+    BEGIN IMMEDIATE, которая сериализует обновление ключа между процессами.
+    """
+
+    EVICT_EVERY = 1000
+
+    def __init__(self, path, max_keys=100000):
+        self.path = path
+        self.max_keys = max_keys
+        self._local = threading.local()
+        self._hits = 0
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS rate_limits ('
+            'key TEXT PRIMARY KEY, window_start REAL NOT NULL, '
+            'prev INTEGER NOT NULL, curr INTEGER NOT NULL, '
+            'touched REAL NOT NULL)'
+        )
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS ix_rate_limits_touched '
+            'ON rate_limits (touched)'
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key, limit, window, now):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT window_start, prev, curr FROM rate_limits '
+                'WHERE key = ?', (key,)
+            ).fetchone()
+            state = roll_window(list(row) if row else None, now, window)
+            allowed, retry_after = sliding_window_decision(
+                state[0], state[1], state[2], now, limit, window
+            )
+            if allowed:
+                state[2] += 1
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limits '
+                '(key, window_start, prev, curr, touched) '
+                'VALUES (?, ?, ?, ?, ?)', (key, *state, now)
+            )
+            self._hits += 1
+            if self._hits % self.EVICT_EVERY == 0:
+                self._evict(conn, now - 2 * window)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, retry_after
+
+    def _evict(self, conn, idle_before):
+        conn.execute(
+            'DELETE FROM rate_limits WHERE touched < ?', (idle_before,)
+        )
+        conn.execute(
+            'DELETE FROM rate_limits WHERE key IN ('
+            'SELECT key FROM rate_limits ORDER BY touched DESC '
+            'LIMIT -1 OFFSET ?)', (self.max_keys,)
+        )
+
+    def __len__(self):
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM rate_limits'
+        ).fetchone()[0]
+
+
+class RedisError(Exception):
+    """Ошибка, возвращенная сервером по протоколу Redis (RESP)."""
+
+
+class RedisBackend:
+    """Хранилище счетчиков на сервере с протоколом Redis.
+
+    Использует минимальный клиент RESP без внешних зависимостей. Каждое
+    окно - отдельный ключ с TTL в два окна, поэтому неактивные IP удаляет
+    сам сервер. Проверка - один конвейер INCR/PEXPIRE/GET; запрос,
+    превысивший лимит, откатывается через DECR. При недоступности
+    сервера запросы пропускаются (fail open).
+    """
+
+    def __init__(self, url='redis://localhost:6379/0', prefix='rl:',
+                 timeout=0.5):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.password = parsed.password
+        self.prefix = prefix
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            sock = socket.create_connection(
+                (self.host, self.port), timeout=self.timeout
+            )
+            conn = (sock, sock.makefile('rb'))
+            self._local.conn = conn
+            setup = []
+            if self.password:
+                setup.append(('AUTH', self.password))
+            if self.db:
+                setup.append(('SELECT', self.db))
+            if setup:
+                self.execute(*setup)
+        return conn
+
+    def execute(self, *commands):
+        """Отправка команд одним конвейером и чтение ответов."""
+        try:
+            sock, reader = self._connection()
+            payload = b''.join(self._encode(c) for c in commands)
+            sock.sendall(payload)
+            replies = [self._read_reply(reader) for _ in commands]
+        except OSError:
+            self._reset()
+            raise
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    def _reset(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            conn[0].close()
+
+    @staticmethod
+    def _encode(command):
+        parts = [str(part).encode('utf-8') for part in command]
+        out = [b'*%d\r\n' % len(parts)]
+        for part in parts:
+            out.append(b'$%d\r\n%s\r\n' % (len(part), part))
+        return b''.join(out)
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError('Соединение с сервером закрыто')
+        kind, body = line[:1], line[1:-2]
+        if kind == b'+':
+            return body.decode('utf-8')
+        if kind == b'-':
+            return RedisError(body.decode('utf-8'))
+        if kind == b':':
+            return int(body)
+        if kind == b'$':
+            length = int(body)
+            if length == -1:
+                return None
+            return reader.read(length + 2)[:-2]
+        if kind == b'*':
+            return [self._read_reply(reader) for _ in range(int(body))]
+        raise RedisError(f'Неизвестный тип ответа: {line!r}')
+
+    def hit(self, key, limit, window, now):
+        index = int(now // window)
+        curr_key = f'{self.prefix}{key}:{index}'
+        prev_key = f'{self.prefix}{key}:{index - 1}'
+        try:
+            curr, _, prev = self.execute(
+                ('INCR', curr_key),
+                ('PEXPIRE', curr_key, int(window * 2000)),
+                ('GET', prev_key)
+            )
+            # curr уже включает текущий запрос
+            allowed, retry_after = sliding_window_decision(
+                index * window, int(prev or 0), curr - 1, now, limit, window
+            )
+            if not allowed:
+                self.execute(('DECR', curr_key))
+            return allowed, retry_after
+        except (OSError, RedisError) as e:
+            logger.warning(f'Ограничитель частоты недоступен: {e}')
+            return True, 0
+
+
+def create_backend(config, max_keys=100000):
+    """Создание хранилища счетчиков по настройкам приложения."""
+    backend = config.get('RATE_LIMIT_BACKEND', 'memory')
+    if backend == 'memory':
+        return MemoryBackend(max_keys)
+    if backend == 'sqlite':
+        return SQLiteBackend(config['RATE_LIMIT_SQLITE_PATH'], max_keys)
+    if backend == 'redis':
+        return RedisBackend(config['RATE_LIMIT_REDIS_URL'])
+    raise ValueError(f'Неизвестное хранилище ограничителя: {backend}')
+
+
+class SlidingWindowLimiter:
+    """Ограничитель частоты по алгоритму скользящего окна со счетчиками.
+
+    Для каждого ключа (IP) хранятся только начало текущего окна и два
+    счетчика - текущего и предыдущего окна, поэтому проверка выполняется
+    за O(1), а память на ключ не зависит от лимита. Состояние хранится в
+    backend: в памяти процесса (MemoryBackend) либо общим для всех
+    воркеров (SQLiteBackend, RedisBackend).
+    """
+
+    def __init__(self, requests_limit=100, time_window=60, max_keys=100000,
+                 backend=None, clock=time.time):
+        self.requests_limit = requests_limit
+        self.time_window = time_window
+        if backend is None:
+            backend = MemoryBackend(max_keys)
+        self.backend = backend
+        self.clock = clock
+
+    def hit(self, key):
+        """Учесть запрос и вернуть (разрешен ли он, секунд до повтора)."""
+        return self.backend.hit(
+            key, self.requests_limit, self.time_window, self.clock()
+        )
+
+    def __len__(self):
+        return len(self.backend)
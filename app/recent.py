@@ -0,0 +1,133 @@
+# app/recent.py
+
+import os
+import sqlite3
+import tempfile
+import threading
+from collections import deque
+from flask import current_app, has_app_context
+
+
+class MemoryRecentSearches:
+    """Кольцевой буфер недавних поисков в памяти процесса.
+
+    deque(maxlen=capacity) вытесняет самый старый запрос за O(1) без
+    копирования списка, а блокировка делает добавление и чтение
+    безопасными для потоков воркера.
+    """
+
+    def __init__(self, capacity=10):
+        self.capacity = capacity
+        self._items = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def add(self, query, timestamp):
+        with self._lock:
+            self._items.append({'query': query, 'timestamp': timestamp})
+
+    def items(self):
+        """Недавние поиски от самого старого к самому новому."""
+        with self._lock:
+            return list(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SQLiteRecentSearches:
+    """Кольцевой буфер недавних поисков в файле SQLite.
+
+    Общий для всех воркеров gunicorn, поэтому /api/memory отдает одну и ту
+    же историю независимо от воркера. Записи получают возрастающие id:
+    после вставки удаляются записи с id не больше нового id минус
+    capacity, т.е. хранится не более capacity последних запросов.
+    """
+
+    def __init__(self, path, capacity=10):
+        self.path = path
+        self.capacity = capacity
+        self._local = threading.local()
+        self._pid = os.getpid()
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS recent_searches ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, query TEXT NOT NULL, '
+            'timestamp TEXT NOT NULL)'
+        )
+
+    def _connection(self):
+        if self._pid != os.getpid():
+            # Соединение SQLite нельзя использовать после fork
+            self._local = threading.local()
+            self._pid = os.getpid()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def add(self, query, timestamp):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = conn.execute(
+                'INSERT INTO recent_searches (query, timestamp) '
+                'VALUES (?, ?)', (query, timestamp)
+            )
+            conn.execute(
+                'DELETE FROM recent_searches WHERE id <= ?',
+                (cursor.lastrowid - self.capacity,)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def items(self):
+        """Недавние поиски от самого старого к самому новому."""
+        rows = self._connection().execute(
+            'SELECT query, timestamp FROM recent_searches '
+            'ORDER BY id DESC LIMIT ?', (self.capacity,)
+        ).fetchall()
+        return [
+            {'query': query, 'timestamp': timestamp}
+            for query, timestamp in reversed(rows)
+        ]
+
+    def __len__(self):
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM recent_searches'
+        ).fetchone()[0]
+
+
+def create_recent_searches(config):
+    """Создание хранилища недавних поисков по настройкам приложения."""
+    backend = config.get('RECENT_SEARCHES_BACKEND', 'memory')
+    capacity = config.get('RECENT_SEARCHES_SIZE', 10)
+    if backend == 'memory':
+        return MemoryRecentSearches(capacity)
+    if backend == 'sqlite':
+        path = config.get('RECENT_SEARCHES_SQLITE_PATH') or os.path.join(
+            tempfile.gettempdir(), 'book_catalog_recent.sqlite3'
+        )
+        return SQLiteRecentSearches(path, capacity)
+    raise ValueError(f'Неизвестное хранилище недавних поисков: {backend}')
+
+
+_default_recent_searches = MemoryRecentSearches()
+
+
+def init_recent_searches(app):
+    """Подключение хранилища недавних поисков к приложению."""
+    app.extensions['recent_searches'] = create_recent_searches(app.config)
+
+
+def get_recent_searches():
+    """Хранилище текущего приложения (вне контекста - общее)."""
+    if has_app_context():
+        store = current_app.extensions.get('recent_searches')
+        if store is not None:
+            return store
+    return _default_recent_searches
@@ -0,0 +1,166 @@
+# app/replicas.py
+
+import itertools
+import threading
+import time
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from .pool import engine_options, pool_metrics
+from .storage import configure_sqlite
+
+# Cookie клиента, недавно записывавшего данные: до указанного момента
+# (unix-время) его чтения идут на основную базу
+PRIMARY_COOKIE = 'db_primary_until'
+
+# Методы, не изменяющие данные
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaSet:
+    """Реплики для чтения и выбор реплики на запрос.
+
+    round_robin перебирает реплики по кругу, least_connections выбирает
+    реплику с наименьшим числом занятых соединений пула (при равенстве -
+    по кругу). Счетчики чтений показывают распределение нагрузки.
+    """
+
+    STRATEGIES = ('round_robin', 'least_connections')
+
+    def __init__(self, engines, strategy='round_robin'):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(
+                f'Неизвестная стратегия выбора реплики: {strategy}'
+            )
+        self.engines = list(engines)
+        self.strategy = strategy
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self.reads = [0] * len(self.engines)
+        self.primary_reads = 0
+
+    def choose(self):
+        """Реплика для очередного запроса."""
+        start = next(self._counter) % len(self.engines)
+        order = self.engines[start:] + self.engines[:start]
+        if self.strategy == 'least_connections':
+            engine = min(order, key=lambda e: e.pool.checkedout())
+        else:
+            engine = order[0]
+        with self._lock:
+            self.reads[self.engines.index(engine)] += 1
+        return engine
+
+    def stick_to_primary(self):
+        """Учесть чтение, оставленное на основной базе."""
+        with self._lock:
+            self.primary_reads += 1
+
+    def stats(self):
+        with self._lock:
+            reads = list(self.reads)
+            primary_reads = self.primary_reads
+        return {
+            'strategy': self.strategy,
+            'primary_reads': primary_reads,
+            'replicas': [
+                dict(pool_metrics(engine), reads=count,
+                     url=engine.url.render_as_string(hide_password=True))
+                for engine, count in zip(self.engines, reads)
+            ]
+        }
+
+    def dispose(self):
+        for engine in self.engines:
+            engine.dispose()
+
+
+def create_replica_engine(uri, config):
+    """Engine реплики с теми же параметрами пула, что и у основной базы."""
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and url.database in (
+            None, '', ':memory:'):
+        raise ValueError('Реплика не может быть базой SQLite в памяти')
+    engine = create_engine(url, **engine_options(uri, config))
+    configure_sqlite(engine, config)
+    return engine
+
+
+def init_replicas(app):
+    """Создание реплик из READ_REPLICA_URIS (через запятую).
+
+    Вызывается до init_engine_options(): параметры engine реплик
+    строятся по исходным SQLALCHEMY_ENGINE_OPTIONS. Соединения
+    открываются при первом чтении.
+    """
+    uris = [uri.strip() for uri in
+            (app.config.get('READ_REPLICA_URIS') or '').split(',')
+            if uri.strip()]
+    if not uris:
+        app.extensions['replicas'] = None
+        return
+    app.extensions['replicas'] = ReplicaSet(
+        [create_replica_engine(uri, app.config) for uri in uris],
+        app.config['READ_REPLICA_STRATEGY']
+    )
+    app.after_request(remember_write)
+
+
+def get_replicas():
+    """Реплики текущего приложения либо None."""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('replicas')
+
+
+def remember_write(response):
+    """Закрепить клиента за основной базой после записи.
+
+    Cookie действует READ_YOUR_WRITES_SECONDS секунд: за это время
+    клиент читает с основной базы и видит свои изменения, даже если
+    реплики отстают. Cookie не зависит от воркера, принявшего запрос.
+    """
+    seconds = current_app.config['READ_YOUR_WRITES_SECONDS']
+    if (request.method not in SAFE_METHODS and response.status_code < 500
+            and seconds > 0):
+        response.set_cookie(
+            PRIMARY_COOKIE, f'{time.time() + seconds:.3f}',
+            max_age=int(seconds) + 1, httponly=True, samesite='Lax'
+        )
+    return response
+
+
+def sticks_to_primary():
+    """Записывал ли клиент данные в последние READ_YOUR_WRITES_SECONDS."""
+    try:
+        until = float(request.cookies.get(PRIMARY_COOKIE, 0))
+    except ValueError:
+        return False
+    return until > time.time()
+
+
+def read_replica(f):
+    """Декоратор GET-обработчика: чтения запроса идут на реплику.
+
+    Выбор действует только внутри обработчика (и валидатора conditional,
+    если декоратор стоит над ним); запись всегда идет на основную базу.
+    Без реплик и для недавно писавших клиентов обработчик читает
+    основную базу.
+    """
+    def wrapper(*args, **kwargs):
+        replicas = get_replicas()
+        if replicas is None:
+            return f(*args, **kwargs)
+        if sticks_to_primary():
+            replicas.stick_to_primary()
+            return f(*args, **kwargs)
+        previous = g.get('read_replica')
+        g.read_replica = replicas.choose()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            g.read_replica = previous
+
+    wrapper.__name__ = f.__name__
+    wrapper.__doc__ = f.__doc__
+    return wrapper
@@ -1,8 +1,18 @@
 # app/routes.py
 
-from flask import Blueprint, request, jsonify
-from .services import AuthorService, BookService, ReviewService, MemoryService
-from datetime import datetime
+import math
+from flask import (
+    Blueprint, Response, request, jsonify, stream_with_context, url_for
+)
+from .binds import bind_health
+from .models import Book
+from .services import (
+    AuthorService, BookService, ReviewService, MemoryService, ExportService,
+    PopularityService, SearchService, StatsService
+)
+from .replicas import read_replica
+from .utils import conditional, track_views
+from datetime import date, datetime
 # Removed: import json (F401 imported but unused)
 
 api = Blueprint('api', __name__)
@@ -16,15 +26,165 @@ def get_request_data():
     return {}
 
 
+def get_page_args(cursor=int):
+    """Извлечение параметров пагинации limit/after из строки запроса.
+
+    cursor - преобразование значения after (по умолчанию id последнего
+    элемента). Возвращает кортеж (limit, after, error), где error -
+    словарь с описанием ошибки для ответа 400 либо None.
+    """
+    try:
+        limit = request.args.get('limit')
+        after = request.args.get('after')
+        limit = int(limit) if limit is not None else None
+        after = cursor(after) if after is not None else None
+    except ValueError:
+        return None, None, {
+            'error': 'Параметры limit и after должны быть целыми числами'}
+    if limit is not None and limit < 1:
+        return None, None, {'error': 'Параметр limit должен быть больше 0'}
+    return limit, after, None
+
+
+def finite_float(value):
+    """float без nan/inf, которые не сравниваются с ценами осмысленно."""
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(value)
+    return value
+
+
+# Фильтры списка книг: параметр -> (аргумент сервиса, преобразование)
+BOOK_FILTERS = {
+    'author_id': ('author_id', int),
+    'price_min': ('price_min', finite_float),
+    'price_max': ('price_max', finite_float),
+    'published_after': ('published_after', date.fromisoformat),
+    'published_before': ('published_before', date.fromisoformat),
+}
+BOOK_ORDERS = ('asc', 'desc')
+
+
+def get_book_query_args():
+    """Извлечение фильтров и сортировки списка книг.
+
+    Принимаются только перечисленные в BOOK_FILTERS параметры, sort из
+    BookService.SORT_COLUMNS и order asc/desc. Возвращает кортеж
+    (аргументы для BookService.get_all_books, error).
+    """
+    args = {}
+    for param, (name, convert) in BOOK_FILTERS.items():
+        value = request.args.get(param)
+        if value is None:
+            continue
+        try:
+            args[name] = convert(value)
+        except ValueError:
+            return None, {'error': f'Некорректное значение параметра {param}'}
+    args['sort'] = request.args.get('sort', 'id')
+    if args['sort'] not in BookService.SORT_COLUMNS:
+        return None, {'error': 'Параметр sort должен быть одним из: '
+                               + ', '.join(BookService.SORT_COLUMNS)}
+    args['order'] = request.args.get('order', 'asc')
+    if args['order'] not in BOOK_ORDERS:
+        return None, {'error': 'Параметр order должен быть asc или desc'}
+    return args, None
+
+
+def get_view_args(model):
+    """Извлечение параметров fields=a,b и include=x,y представления.
+
+    Допустимые значения - model.FIELDS и model.INCLUDES. Возвращает кортеж
+    (аргументы to_dict(), error); fields равен None, если не задан.
+    """
+    view = {}
+    for param, allowed in (('fields', model.FIELDS),
+                           ('include', model.INCLUDES)):
+        raw = request.args.get(param)
+        if raw is None:
+            continue
+        # Отсортированный кортеж: один ключ кеша при любом порядке
+        values = tuple(sorted({v.strip() for v in raw.split(',')
+                               if v.strip()}))
+        unknown = [v for v in values if v not in allowed]
+        if unknown:
+            return None, {
+                'error': f'Неизвестные значения {param}: '
+                         f'{", ".join(unknown)}. Допустимые: '
+                         f'{", ".join(allowed)}'}
+        view[param] = values
+    return view, None
+
+
+def with_include(validator):
+    """Валидатор условного GET с учетом ?include= книг.
+
+    Встроенные авторы и отзывы входят в представление, поэтому их
+    изменения должны менять ETag. Некорректный include отклоняет сам
+    обработчик маршрута.
+    """
+    def wrapper(**kwargs):
+        view, _ = get_view_args(Book)
+        return validator(include=(view or {}).get('include', ()), **kwargs)
+    return wrapper
+
+
+def get_ids_arg():
+    """Извлечение списка id из параметра ids=1,2,3.
+
+    Возвращает кортеж (ids, error): ids равен None, если параметр не задан.
+    """
+    raw = request.args.get('ids')
+    if raw is None:
+        return None, None
+    try:
+        return [int(i) for i in raw.split(',') if i.strip()], None
+    except ValueError:
+        return None, {'error': 'Параметр ids должен быть списком целых чисел'}
+
+
+def page_response(data, status_code):
+    """Ответ со страницей коллекции.
+
+    Тело ответа остается списком объектов, курсор следующей страницы
+    передается в заголовках X-Next-Cursor и Link (rel="next").
+    """
+    if status_code != 200:
+        return jsonify(data), status_code
+    response = jsonify(data['items'])
+    if data['next'] is not None:
+        args = request.args.to_dict()
+        args['after'] = data['next']
+        response.headers['X-Next-Cursor'] = str(data['next'])
+        response.headers['Link'] = '<{}>; rel="next"'.format(
+            # Параметры пути важнее одноименных параметров запроса
+            url_for(request.endpoint, **{**args, **request.view_args})
+        )
+    return response, status_code
+
+
 # Маршруты авторов
 @api.route('/authors', methods=['GET'])
+@read_replica
+@conditional(AuthorService.get_authors_validator)
 def get_authors():
-    """Получить всех авторов."""
-    data, status_code = AuthorService.get_all_authors()
-    return jsonify(data), status_code
+    """Получить страницу авторов или авторов по списку ids."""
+    ids, error = get_ids_arg()
+    if error:
+        return jsonify(error), 400
+    if ids is not None:
+        data, status_code = AuthorService.get_authors_by_ids(ids)
+        return jsonify(data), status_code
+    limit, after, error = get_page_args()
+    if error:
+        return jsonify(error), 400
+    data, status_code = AuthorService.get_all_authors(limit, after)
+    return page_response(data, status_code)
 
 
 @api.route('/authors/<int:author_id>', methods=['GET'])
+@read_replica
+@conditional(AuthorService.get_author_validator)
 def get_author(author_id):
     """Получить автора по ID."""
     data, status_code = AuthorService.get_author(author_id)
@@ -54,18 +214,82 @@ def delete_author(author_id):
     return jsonify(result), status_code
 
 
+@api.route('/authors/bulk', methods=['POST'])
+def bulk_create_authors():
+    """Массово создать авторов."""
+    result, status_code = AuthorService.bulk_create(get_request_data())
+    return jsonify(result), status_code
+
+
+@api.route('/authors/bulk', methods=['PUT'])
+def bulk_update_authors():
+    """Массово обновить авторов."""
+    result, status_code = AuthorService.bulk_update(get_request_data())
+    return jsonify(result), status_code
+
+
+@api.route('/authors/bulk', methods=['DELETE'])
+def bulk_delete_authors():
+    """Массово удалить авторов по списку id."""
+    result, status_code = AuthorService.bulk_delete(get_request_data())
+    return jsonify(result), status_code
+
+
 # Маршруты книг
 @api.route('/books', methods=['GET'])
+@read_replica
+@conditional(with_include(BookService.get_books_validator))
 def get_books():
-    """Получить все книги."""
-    data, status_code = BookService.get_all_books()
-    return jsonify(data), status_code
+    """Получить страницу книг или книги по списку ids."""
+    ids, error = get_ids_arg()
+    if error:
+        return jsonify(error), 400
+    view, error = get_view_args(Book)
+    if error:
+        return jsonify(error), 400
+    if ids is not None:
+        data, status_code = BookService.get_books_by_ids(ids, **view)
+        return jsonify(data), status_code
+    query_args, error = get_book_query_args()
+    if error:
+        return jsonify(error), 400
+    # Курсор сортировки не по id - строка, ее разбирает сервис
+    limit, after, error = get_page_args(cursor=str)
+    if error:
+        return jsonify(error), 400
+    data, status_code = BookService.get_all_books(
+        limit, after, **query_args, **view
+    )
+    return page_response(data, status_code)
+
+
+@api.route('/books/top-rated', methods=['GET'])
+@read_replica
+@conditional(BookService.get_books_validator)
+def get_top_rated_books():
+    """Получить страницу книг с наивысшей средней оценкой."""
+    limit, after, error = get_page_args(cursor=str)
+    if error:
+        return jsonify(error), 400
+    try:
+        min_count = int(request.args.get('min_count', 1))
+    except ValueError:
+        return jsonify({
+            'error': 'Параметр min_count должен быть целым числом'}), 400
+    data, status_code = BookService.get_top_rated(limit, min_count, after)
+    return page_response(data, status_code)
 
 
 @api.route('/books/<int:book_id>', methods=['GET'])
+@track_views(PopularityService.record_view)
+@read_replica
+@conditional(with_include(BookService.get_book_validator))
 def get_book(book_id):
     """Получить книгу по ID."""
-    data, status_code = BookService.get_book(book_id)
+    view, error = get_view_args(Book)
+    if error:
+        return jsonify(error), 400
+    data, status_code = BookService.get_book(book_id, **view)
     return jsonify(data), status_code
 
 
@@ -92,22 +316,63 @@ def delete_book(book_id):
     return jsonify(result), status_code
 
 
+@api.route('/books/bulk', methods=['POST'])
+def bulk_create_books():
+    """Массово создать книги."""
+    result, status_code = BookService.bulk_create(get_request_data())
+    return jsonify(result), status_code
+
+
+@api.route('/books/bulk', methods=['PUT'])
+def bulk_update_books():
+    """Массово обновить книги."""
+    result, status_code = BookService.bulk_update(get_request_data())
+    return jsonify(result), status_code
+
+
+@api.route('/books/bulk', methods=['DELETE'])
+def bulk_delete_books():
+    """Массово удалить книги по списку id."""
+    result, status_code = BookService.bulk_delete(get_request_data())
+    return jsonify(result), status_code
+
+
 # Маршруты отзывов
 @api.route('/reviews', methods=['GET'])
+@read_replica
+@conditional(ReviewService.get_reviews_validator)
 def get_reviews():
-    """Получить все отзывы."""
-    data, status_code = ReviewService.get_all_reviews()
-    return jsonify(data), status_code
+    """Получить страницу отзывов или отзывы по списку ids."""
+    ids, error = get_ids_arg()
+    if error:
+        return jsonify(error), 400
+    if ids is not None:
+        data, status_code = ReviewService.get_reviews_by_ids(ids)
+        return jsonify(data), status_code
+    limit, after, error = get_page_args()
+    if error:
+        return jsonify(error), 400
+    data, status_code = ReviewService.get_all_reviews(limit, after)
+    return page_response(data, status_code)
 
 
 @api.route('/books/<int:book_id>/reviews', methods=['GET'])
+@read_replica
+@conditional(ReviewService.get_reviews_for_book_validator)
 def get_reviews_for_book(book_id):
-    """Получить все отзывы для конкретной книги."""
-    data, status_code = ReviewService.get_reviews_for_book(book_id)
-    return jsonify(data), status_code
+    """Получить страницу отзывов для конкретной книги."""
+    limit, after, error = get_page_args()
+    if error:
+        return jsonify(error), 400
+    data, status_code = ReviewService.get_reviews_for_book(
+        book_id, limit, after
+    )
+    return page_response(data, status_code)
 
 
 @api.route('/reviews/<int:review_id>', methods=['GET'])
+@read_replica
+@conditional(ReviewService.get_review_validator)
 def get_review(review_id):
     """Получить отзыв по ID."""
     data, status_code = ReviewService.get_review(review_id)
@@ -137,6 +402,61 @@ def delete_review(review_id):
     return jsonify(result), status_code
 
 
+@api.route('/reviews/bulk', methods=['POST'])
+def bulk_create_reviews():
+    """Массово создать отзывы."""
+    result, status_code = ReviewService.bulk_create(get_request_data())
+    return jsonify(result), status_code
+
+
+@api.route('/reviews/bulk', methods=['PUT'])
+def bulk_update_reviews():
+    """Массово обновить отзывы."""
+    result, status_code = ReviewService.bulk_update(get_request_data())
+    return jsonify(result), status_code
+
+
+@api.route('/reviews/bulk', methods=['DELETE'])
+def bulk_delete_reviews():
+    """Массово удалить отзывы по списку id."""
+    result, status_code = ReviewService.bulk_delete(get_request_data())
+    return jsonify(result), status_code
+
+
+# Маршрут полнотекстового поиска
+@api.route('/search', methods=['GET'])
+@read_replica
+def search():
+    """Полнотекстовый поиск по книгам и авторам."""
+    limit, _, error = get_page_args()
+    if error:
+        return jsonify(error), 400
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({
+            'error': 'Параметр offset должен быть целым числом'}), 400
+    data, status_code = SearchService.search(
+        request.args.get('q', ''), limit, offset
+    )
+    return jsonify(data), status_code
+
+
+# Маршруты потоковой выгрузки
+@api.route('/export/<string:entity>', methods=['GET'])
+def export_entity(entity):
+    """Потоковая выгрузка всех записей сущности в формате NDJSON."""
+    _, after, error = get_page_args()
+    if error:
+        return jsonify(error), 400
+    rows, status_code = ExportService.export(entity, after)
+    if status_code != 200:
+        return jsonify(rows), status_code
+    return Response(
+        stream_with_context(rows), mimetype='application/x-ndjson'
+    )
+
+
 # Маршруты хранилища в памяти
 @api.route('/memory', methods=['GET'])
 def get_memory():
@@ -168,12 +488,25 @@ def update_metrics():
     return jsonify(result), status_code
 
 
+# Маршрут служебной статистики
+@api.route('/stats', methods=['GET'])
+def get_stats():
+    """Получить служебную статистику (счетчики кеша и т.п.)."""
+    data, status_code = StatsService.get_stats()
+    return jsonify(data), status_code
+
+
 # Маршрут проверки работоспособности
 @api.route('/health', methods=['GET'])
 def health_check():
-    """Эндпоинт проверки работоспособности."""
+    """Эндпоинт проверки работоспособности.
+
+    databases - состояние дополнительных баз: pending (инициализация),
+    ready, error или unavailable (не установлен драйвер).
+    """
     return jsonify({
         'status': 'healthy',
-        'timestamp': str(datetime.utcnow())
+        'timestamp': str(datetime.utcnow()),
+        'databases': bind_health()
     }), 200
 # W292 no newline at end of file (added newline)
@@ -0,0 +1,162 @@
+# app/search.py
+
+import re
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# Индексируемые поля: таблица -> (тип результата, столбцы)
+SEARCH_TABLES = {
+    'books': ('book', ('title', 'description')),
+    'authors': ('author', ('name', 'bio')),
+}
+
+# Конфигурация текстового поиска PostgreSQL: 'simple' не зависит от языка,
+# что подходит для смешанного русско-английского каталога
+TS_CONFIG = 'simple'
+
+SQLITE_FTS_TABLE = """
+CREATE VIRTUAL TABLE {table}_fts USING fts5(
+    {columns}, content='{table}', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+"""
+
+SQLITE_FTS_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN
+    INSERT INTO {table}_fts(rowid, {columns})
+    VALUES (new.id, {new_values});
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN
+    INSERT INTO {table}_fts({table}_fts, rowid, {columns})
+    VALUES ('delete', old.id, {old_values});
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_fts_au
+AFTER UPDATE OF {columns} ON {table} BEGIN
+    INSERT INTO {table}_fts({table}_fts, rowid, {columns})
+    VALUES ('delete', old.id, {old_values});
+    INSERT INTO {table}_fts(rowid, {columns})
+    VALUES (new.id, {new_values});
+END;
+"""
+
+POSTGRES_INDEX = """
+CREATE INDEX IF NOT EXISTS ix_{table}_search ON {table}
+USING GIN ({document})
+"""
+
+
+def _tsvector(columns):
+    """Выражение tsvector по столбцам (должно совпадать с индексом)."""
+    joined = " || ' ' || ".join(f"coalesce({c}, '')" for c in columns)
+    return f"to_tsvector('{TS_CONFIG}', {joined})"
+
+
+def install_search(connection):
+    """Создание полнотекстовых индексов для текущего диалекта.
+
+    SQLite: внешние (content=) таблицы FTS5, синхронизируемые триггерами.
+    PostgreSQL: GIN-индексы по выражению tsvector, которые СУБД
+    поддерживает сама. Возвращает имя используемого бэкенда поиска.
+    """
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        try:
+            for table, (_, columns) in SEARCH_TABLES.items():
+                _install_sqlite_table(connection, table, columns)
+            return 'fts5'
+        except OperationalError:
+            # SQLite собран без FTS5
+            return 'like'
+    if dialect == 'postgresql':
+        for table, (_, columns) in SEARCH_TABLES.items():
+            connection.execute(text(POSTGRES_INDEX.format(
+                table=table, document=_tsvector(columns)
+            )))
+        return 'tsvector'
+    return 'like'
+
+
+def _install_sqlite_table(connection, table, columns):
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+        {'name': f'{table}_fts'}
+    ).first()
+    params = {
+        'table': table,
+        'columns': ', '.join(columns),
+        'new_values': ', '.join(f'new.{c}' for c in columns),
+        'old_values': ', '.join(f'old.{c}' for c in columns),
+    }
+    if not exists:
+        connection.execute(text(SQLITE_FTS_TABLE.format(**params)))
+        # Индексация строк, появившихся до создания индекса
+        connection.execute(text(
+            f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')"
+        ))
+    # Триггеры содержат ';' внутри BEGIN...END, поэтому разделяются по END;
+    for trigger in SQLITE_FTS_TRIGGERS.format(**params).split('END;'):
+        if trigger.strip():
+            connection.execute(text(trigger + 'END;'))
+
+
+def fts5_query(query):
+    """Преобразование пользовательской строки в безопасный запрос FTS5.
+
+    Слова берутся в кавычки (операторы FTS5 не интерпретируются),
+    последнее слово ищется по префиксу для поиска по мере ввода.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def ranked_matches_statement(backend):
+    """SQL-запрос (kind, id, rank) по всем индексируемым таблицам.
+
+    Результаты упорядочены по убыванию релевантности и принимают
+    параметры :query, :limit и :offset.
+    """
+    parts = []
+    for table, (kind, columns) in SEARCH_TABLES.items():
+        if backend == 'fts5':
+            parts.append(
+                f"SELECT '{kind}' AS kind, rowid AS id, "
+                f"-bm25({table}_fts) AS rank FROM {table}_fts "
+                f"WHERE {table}_fts MATCH :query"
+            )
+        elif backend == 'tsvector':
+            document = _tsvector(columns)
+            parts.append(
+                f"SELECT '{kind}' AS kind, id, "
+                f"ts_rank({document}, "
+                f"plainto_tsquery('{TS_CONFIG}', :query)) AS rank "
+                f"FROM {table} WHERE {document} @@ "
+                f"plainto_tsquery('{TS_CONFIG}', :query)"
+            )
+        else:
+            condition = ' OR '.join(
+                f"lower({c}) LIKE lower(:query)" for c in columns
+            )
+            parts.append(
+                f"SELECT '{kind}' AS kind, id, 0 AS rank FROM {table} "
+                f"WHERE {condition}"
+            )
+    return text(
+        ' UNION ALL '.join(parts)
+        + ' ORDER BY rank DESC, kind, id LIMIT :limit OFFSET :offset'
+    )
+
+
+def query_parameter(backend, query):
+    """Значение параметра :query для выбранного бэкенда либо None."""
+    if backend == 'fts5':
+        return fts5_query(query)
+    if not query.strip():
+        return None
+    if backend == 'like':
+        escaped = query.strip().replace('%', '').replace('_', '')
+        return f'%{escaped}%' if escaped else None
+    return query
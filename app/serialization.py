@@ -0,0 +1,143 @@
+# app/serialization.py
+
+import functools
+from datetime import date
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+from .models import db, Book, BookRatingStats
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson не установлен
+    orjson = None
+
+
+def json_default(value):
+    """Даты в ISO 8601, как в to_dict() (Flask по умолчанию - RFC 822)."""
+    if isinstance(value, date):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON-провайдер Flask на orjson.
+
+    Ключи сортируются, как у провайдера по умолчанию. Ответы
+    форматируются с отступами только при JSON_PRETTY (не зависит от
+    режима отладки). Без orjson, а также при дополнительных аргументах
+    json.dumps используется стандартный модуль json.
+    """
+
+    default = staticmethod(json_default)
+    if orjson is not None:
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default,
+                            option=self.option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self.option
+        if self._app.config.get('JSON_PRETTY'):
+            option |= orjson.OPT_INDENT_2
+        # Байты orjson уходят в ответ без промежуточной строки
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=option),
+            mimetype=self.mimetype
+        )
+
+
+def init_serialization(app):
+    """Подключение быстрого JSON-провайдера (SERIALIZATION_ENGINE=fast)."""
+    if app.config.get('SERIALIZATION_ENGINE', 'orm') == 'fast':
+        app.json = FastJSONProvider(app)
+        # Без orjson отступы тоже задает только JSON_PRETTY
+        app.json.compact = not app.config.get('JSON_PRETTY', False)
+
+
+class RowSerializer:
+    """Сериализация списков из кортежей строк Core без объектов ORM.
+
+    Запрос выбирает только нужные столбцы (with_entities), строки
+    превращаются в словари через zip, а даты переводятся в ISO 8601
+    одним проходом по каждому столбцу дат. Результат совпадает с
+    to_dict() модели, включая рейтинг книги.
+    """
+
+    RATING_COLUMNS = [
+        BookRatingStats.count.label('rating_count'),
+        BookRatingStats.average.label('rating_average'),
+    ] + [
+        getattr(BookRatingStats, f'rating_{r}').label(f'rating_{r}')
+        for r in BookRatingStats.RATINGS
+    ]
+
+    def __init__(self, model, fields=None):
+        self.model = model
+        self.columns = [
+            column for column in model.__table__.columns
+            if fields is None or column.key in fields or column.key == 'id'
+        ]
+        self.keys = [column.key for column in self.columns]
+        self.date_keys = [
+            column.key for column in self.columns
+            if isinstance(column.type, (db.Date, db.DateTime))
+        ]
+        self.rating = model is Book and (fields is None or 'rating' in fields)
+
+    def select(self, query):
+        """Тот же запрос (фильтры, порядок), но с выборкой столбцов."""
+        if not self.rating:
+            return query.with_entities(*self.columns)
+        return query.with_entities(
+            *self.columns, *self.RATING_COLUMNS
+        ).outerjoin(BookRatingStats, BookRatingStats.book_id == Book.id)
+
+    def statement(self):
+        """SELECT всех записей модели для выгрузки."""
+        statement = db.select(*self.columns)
+        if self.rating:
+            statement = statement.add_columns(
+                *self.RATING_COLUMNS
+            ).outerjoin(BookRatingStats, BookRatingStats.book_id == Book.id)
+        return statement
+
+    def __call__(self, rows):
+        """Список словарей из строк select()/statement()."""
+        keys = self.keys
+        width = len(keys)
+        items = [dict(zip(keys, row)) for row in rows]
+        for key in self.date_keys:
+            for item in items:
+                value = item[key]
+                if value is not None:
+                    item[key] = value.isoformat()
+        if self.rating:
+            make_rating = BookRatingStats.make_rating
+            for item, row in zip(items, rows):
+                item['rating'] = make_rating(
+                    row[width], row[width + 1], row[width + 2:]
+                )
+        return items
+
+
+@functools.lru_cache(maxsize=None)
+def _row_serializer(model, fields):
+    return RowSerializer(model, fields)
+
+
+def row_serializer(model, fields=None):
+    """Сериализатор строк для модели либо None, если он не включен."""
+    if current_app.config.get('SERIALIZATION_ENGINE', 'orm') != 'fast':
+        return None
+    return _row_serializer(model, fields)
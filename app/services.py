@@ -1,8 +1,620 @@
 # app/services.py
 
-from .models import db, Author, Book, Review, memory_store
+import base64
+import binascii
+import hashlib
+import json
+import os
+from .cache import cached, get_cache, mark_dirty
+from .models import (
+    db, Author, Book, BookPopularity, BookRatingStats, Review, memory_store
+)
+from .passwords import get_hasher
+from .pool import pool_metrics, warm_pool
+from .popularity import get_popularity
+from .recent import get_recent_searches
+from .replicas import get_replicas
+from .search import install_search, query_parameter, ranked_matches_statement
+from .storage import (
+    configure_sqlite, init_lock, is_file_database, restore_database
+)
+from .serialization import row_serializer
+from flask import current_app
+from sqlalchemy import bindparam, case, func
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from datetime import datetime
+from sqlalchemy.orm import (
+    contains_eager, joinedload, lazyload, load_only, selectinload
+)
+from sqlalchemy.orm.attributes import set_committed_value
+from datetime import date, datetime, timezone
+
+
+def page_size(limit=None):
+    """Размер страницы с учетом значения по умолчанию и максимума."""
+    if limit is None:
+        limit = current_app.config['PAGE_SIZE_DEFAULT']
+    return max(1, min(limit, current_app.config['PAGE_SIZE_MAX']))
+
+
+def paginate(query, model, limit=None, after=None):
+    """Keyset-пагинация запроса по первичному ключу.
+
+    Возвращает словарь со списком объектов страницы и курсором следующей
+    страницы (id последнего элемента) либо None, если страница последняя.
+    Выбирается на одну строку больше лимита, чтобы узнать о наличии
+    следующей страницы без отдельного COUNT.
+    """
+    limit = page_size(limit)
+    if after is not None:
+        query = query.filter(model.id > after)
+    rows = query.order_by(model.id).limit(limit + 1).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return {'items': rows[:limit], 'next': next_cursor}
+
+
+def encode_cursor(value, item_id):
+    """Непрозрачный курсор (значение сортировки, id) для строки запроса."""
+    if isinstance(value, date):
+        value = value.isoformat()
+    raw = json.dumps([value, item_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(
+        raw.encode('utf-8')
+    ).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, *columns):
+    """Разбор курсора encode_cursor(); ValueError, если он некорректен.
+
+    Для сортировки по нескольким столбцам значение курсора - список
+    значений этих столбцов.
+    """
+    try:
+        value, item_id = json.loads(base64.urlsafe_b64decode(
+            cursor.encode('ascii') + b'=' * (-len(cursor) % 4)
+        ))
+        values = value if len(columns) > 1 else [value]
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(value)
+        values = [
+            cursor_value(value, column)
+            for value, column in zip(values, columns)
+        ]
+        if not isinstance(item_id, int):
+            raise ValueError(item_id)
+    except (TypeError, UnicodeError, binascii.Error, json.JSONDecodeError):
+        raise ValueError(cursor)
+    return (values if len(columns) > 1 else values[0]), item_id
+
+
+def cursor_value(value, column):
+    """Значение столбца column из курсора; ValueError при неверном типе."""
+    if value is not None and isinstance(column.type, db.Date):
+        return date.fromisoformat(value)
+    if value is not None and not isinstance(value, (int, float)):
+        raise ValueError(value)
+    return value
+
+
+def paginate_sorted(query, model, column, descending=False, limit=None,
+                    after=None):
+    """Keyset-пагинация по (column, id) для сортировки по столбцу.
+
+    Порядок совпадает с порядком индекса по столбцу (в SQLite индекс
+    неявно включает rowid), NULL считается наименьшим значением: в
+    начале при сортировке по возрастанию и в конце - по убыванию.
+    Курсор after - значение encode_cursor() последней строки страницы.
+    Условие на столбец задается диапазоном, чтобы СУБД начинала чтение
+    индекса сразу с позиции курсора.
+    """
+    limit = page_size(limit)
+    key = model.id
+    if after is not None:
+        value, item_id = decode_cursor(after, column)
+        if not descending and value is None:
+            query = query.filter(db.or_(
+                column.isnot(None), db.and_(column.is_(None), key > item_id)
+            ))
+        elif not descending:
+            query = query.filter(
+                column >= value, db.or_(column > value, key > item_id)
+            )
+        elif value is None:
+            query = query.filter(column.is_(None), key < item_id)
+        else:
+            query = query.filter(db.or_(
+                db.and_(column <= value,
+                        db.or_(column < value, key < item_id)),
+                column.is_(None)
+            ))
+    if descending:
+        query = query.order_by(column.desc(), key.desc())
+    else:
+        query = query.order_by(column, key)
+    if db.session.get_bind().dialect.name == 'postgresql':
+        # В PostgreSQL NULL по умолчанию наибольшее значение
+        query = query.order_by(None).order_by(
+            column.desc().nulls_last() if descending
+            else column.asc().nulls_first(),
+            key.desc() if descending else key
+        )
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(getattr(last, column.key), last.id)
+    return {'items': rows[:limit], 'next': next_cursor}
+
+
+def serialize_page(page, serializer=None, **view):
+    """Сериализация страницы, полученной из paginate().
+
+    serializer - RowSerializer, если страница выбрана строками Core;
+    иначе вызывается to_dict() с аргументами view (fields/include) для
+    моделей, которые их поддерживают.
+    """
+    if serializer is not None:
+        items = serializer(page['items'])
+    else:
+        items = [item.to_dict(**view) for item in page['items']]
+    return {'items': items, 'next': page['next']}
+
+
+def paginate_model(query, model, limit=None, after=None):
+    """paginate() со строками Core при SERIALIZATION_ENGINE=fast."""
+    serializer = row_serializer(model)
+    if serializer is not None:
+        query = serializer.select(query)
+    return serialize_page(paginate(query, model, limit, after), serializer)
+
+
+def fetch_by_ids(model, ids, options=(), **view):
+    """Пакетная выборка записей по списку id одним запросом WHERE id IN.
+
+    Порядок результата совпадает с порядком запрошенных id, отсутствующие
+    id возвращаются отдельным списком. options - опции загрузки запроса,
+    view - аргументы to_dict().
+    """
+    limit = current_app.config['BATCH_MAX_IDS']
+    if len(ids) > limit:
+        return {'error': f'Слишком много id: максимум {limit}'}, 400
+    ids = list(dict.fromkeys(ids))
+    found = {
+        item.id: item
+        for item in db.session.scalars(
+            db.select(model).where(model.id.in_(ids)).options(*options)
+        ).unique()
+    }
+    return {
+        'items': [found[i].to_dict(**view) for i in ids if i in found],
+        'missing': [i for i in ids if i not in found]
+    }, 200
+
+
+def make_validator(parts, last_modified):
+    """Валидатор условного GET: ETag и время последнего изменения.
+
+    ETag - короткий хеш от составных частей (id/число строк и updated_at),
+    время возвращается как unix timestamp, чтобы валидатор можно было
+    хранить в любом бэкенде кеша.
+    """
+    etag = hashlib.blake2b(
+        repr(parts).encode('utf-8'), digest_size=12
+    ).hexdigest()
+    if last_modified is not None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc).timestamp()
+    return {'etag': etag, 'last_modified': last_modified}
+
+
+def item_validator(model, item_id, error):
+    """Валидатор одной записи по id+updated_at без загрузки объекта."""
+    try:
+        updated_at = db.session.scalar(
+            db.select(model.updated_at).where(model.id == item_id)
+        )
+        if updated_at is None:
+            return {'error': error}, 404
+        parts = (model.__tablename__, item_id, updated_at.isoformat())
+        return make_validator(parts, updated_at), 200
+    except SQLAlchemyError as e:
+        return {'error': str(e)}, 500
+
+
+def count_validator(model, count, last_modified):
+    """Валидатор коллекции из уже выбранных count и max(updated_at).
+
+    Время изменения коллекции не возвращается (Last-Modified не
+    отдается): max(updated_at) не меняется при удалении строки, и по
+    If-Modified-Since клиент получил бы 304 с удаленной записью. ETag
+    учитывает число строк и удаление замечает.
+    """
+    parts = (
+        model.__tablename__, count,
+        last_modified.isoformat() if last_modified else None
+    )
+    return make_validator(parts, None)
+
+
+def collection_validator(model, *criteria):
+    """Валидатор коллекции по числу строк и max(updated_at).
+
+    Агрегаты выбираются отдельными скалярными подзапросами: так SQLite
+    берет max(updated_at) из индекса за O(log n), а не сканирует таблицу.
+    """
+    try:
+        count, last_modified = db.session.execute(db.select(
+            db.select(func.count()).select_from(model)
+            .where(*criteria).scalar_subquery(),
+            db.select(func.max(model.updated_at))
+            .where(*criteria).scalar_subquery()
+        )).one()
+        return count_validator(model, count, last_modified), 200
+    except SQLAlchemyError as e:
+        return {'error': str(e)}, 500
+
+
+def item_with_children_validator(model, item_id, error, child, *criteria,
+                                 single_child=False):
+    """Валидатор записи вместе с зависимой коллекцией одним запросом.
+
+    Число строк и max(updated_at) коллекции выбираются скалярными
+    подзапросами к строке записи; ETag совпадает с combine_validators()
+    от item_validator() и collection_validator(). single_child - у записи
+    не больше одной строки child, удаляемой только вместе с записью:
+    тогда время изменения известно и для записи со строкой child.
+    """
+    try:
+        row = db.session.execute(
+            db.select(
+                model.updated_at,
+                db.select(func.count()).select_from(child)
+                .where(*criteria).scalar_subquery(),
+                db.select(func.max(child.updated_at))
+                .where(*criteria).scalar_subquery()
+            ).where(model.id == item_id)
+        ).first()
+        if row is None or row[0] is None:
+            return {'error': error}, 404
+        updated_at, count, last_modified = row
+        item = make_validator(
+            (model.__tablename__, item_id, updated_at.isoformat()),
+            updated_at
+        )
+        validator = combine_validators(
+            item, count_validator(child, count, last_modified)
+        )
+        if single_child:
+            validator['last_modified'] = make_validator(
+                (), max(filter(None, (updated_at, last_modified)))
+            )['last_modified']
+        return validator, 200
+    except SQLAlchemyError as e:
+        return {'error': str(e)}, 500
+
+
+def parse_date(value):
+    """Разбор даты в формате YYYY-MM-DD (пустое значение - None)."""
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def bulk_items(data):
+    """Проверка тела массового запроса: непустой список не длиннее лимита.
+
+    Возвращает кортеж (items, error), где error - ответ 400 либо None.
+    """
+    if not isinstance(data, list) or not data:
+        return None, ({'error': 'Ожидается непустой массив объектов'}, 400)
+    limit = current_app.config['BULK_MAX_ITEMS']
+    if len(data) > limit:
+        return None, ({
+            'error': f'Слишком много элементов: максимум {limit}'}, 400)
+    return data, None
+
+
+def existing_ids(model, ids):
+    """Множество id из переданных, существующих в таблице (один IN-запрос)."""
+    ids = {i for i in ids if is_id(i)}
+    if not ids:
+        return set()
+    return set(db.session.scalars(
+        db.select(model.id).where(model.id.in_(ids))
+    ))
+
+
+def bulk_insert(model, rows):
+    """Вставка строк одним executemany-запросом в текущей транзакции.
+
+    Возвращает список id созданных строк, если драйвер поддерживает
+    RETURNING для executemany (SQLite, PostgreSQL), иначе None.
+    """
+    if not rows:
+        return []
+    dialect = db.session.get_bind().dialect
+    if dialect.insert_executemany_returning:
+        return list(db.session.scalars(
+            db.insert(model).returning(model.id), rows
+        ))
+    db.session.execute(db.insert(model), rows)
+    return None
+
+
+def bulk_update(model, rows):
+    """Обновление строк по первичному ключу одним executemany-запросом."""
+    if rows:
+        now = datetime.utcnow()
+        for row in rows:
+            row['updated_at'] = now
+        db.session.execute(db.update(model), rows)
+
+
+def is_id(value):
+    """Целый id (bool в JSON - не число)."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def field_type_error(item, types):
+    """Ошибка для первого поля item, значение которого не подходит по типу.
+
+    types - словарь поле -> 'str' или 'number'; отсутствующие поля и null
+    допускаются (обязательность проверяет build_row). Списки и объекты
+    в полях иначе дошли бы до хеширования или драйвера БД.
+    """
+    for field, kind in types.items():
+        value = item.get(field)
+        if value is None:
+            continue
+        if kind == 'str' and not isinstance(value, str):
+            return f'Поле {field} должно быть строкой'
+        if kind == 'number' and (isinstance(value, bool) or not isinstance(
+                value, (int, float))):
+            return f'Поле {field} должно быть числом'
+    return None
+
+
+def collect_rows(items, build_row, partial=False):
+    """Построение строк для массовой операции с поэлементной проверкой.
+
+    Возвращает список пар (index, row) и список ошибок.
+    """
+    rows, errors = [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({'index': index, 'error': 'Ожидается объект'})
+            continue
+        if partial and not is_id(item.get('id')):
+            errors.append({'index': index, 'error': 'Не указан id'})
+            continue
+        try:
+            row, error = build_row(item, partial)
+        except (TypeError, ValueError):
+            row, error = None, 'Некорректный формат даты'
+        if error:
+            errors.append({'index': index, 'error': error})
+        else:
+            if partial:
+                row['id'] = item['id']
+            rows.append((index, row))
+    return rows, errors
+
+
+def bulk_response(done_key, ids, count, errors, status_code):
+    """Ответ массовой операции с поэлементными ошибками."""
+    if not count and errors:
+        status_code = 400
+    errors.sort(key=lambda error: error['index'])
+    return {
+        done_key: ids, 'count': count, 'errors': errors
+    }, status_code
+
+
+def bulk_create(model, namespaces, rows, errors, before_insert=None):
+    """Вставка проверенных строк и формирование ответа.
+
+    before_insert(rows) вызывается внутри транзакции перед вставкой.
+    """
+    def operation():
+        if before_insert:
+            before_insert([row for _, row in rows])
+        ids = bulk_insert(model, [row for _, row in rows])
+        return bulk_response('created', ids, len(rows), errors, 201)
+    return run_bulk(namespaces, operation)
+
+
+def bulk_apply_update(model, namespaces, rows, errors, error,
+                      before_update=None):
+    """Проверка существования id и обновление строк.
+
+    before_update(rows) вызывается внутри транзакции перед обновлением.
+    """
+    found = existing_ids(model, [row['id'] for _, row in rows])
+    valid = []
+    for index, row in rows:
+        if row['id'] in found:
+            valid.append(row)
+        else:
+            errors.append({'index': index, 'id': row['id'], 'error': error})
+
+    def operation():
+        if before_update:
+            before_update(valid)
+        bulk_update(model, valid)
+        return bulk_response(
+            'updated', [row['id'] for row in valid], len(valid), errors, 200
+        )
+    return run_bulk(namespaces, operation)
+
+
+def taken_isbns(isbns):
+    """Словарь isbn -> id книги для уже занятых ISBN (один IN-запрос)."""
+    isbns = {isbn for isbn in isbns if isbn}
+    if not isbns:
+        return {}
+    return dict(db.session.execute(
+        db.select(Book.isbn, Book.id).where(Book.isbn.in_(isbns))
+    ).all())
+
+
+def run_bulk(namespaces, operation):
+    """Выполнение массовой операции в одной транзакции.
+
+    Операции Core не вызывают события маппера, поэтому затронутые
+    пространства имен кеша отмечаются явно.
+    """
+    try:
+        result = operation()
+        mark_dirty(db.session, *namespaces)
+        db.session.commit()
+        return result
+    except IntegrityError:
+        db.session.rollback()
+        return {'error': 'Нарушено ограничение целостности данных'}, 409
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return {'error': str(e)}, 500
+
+
+def bulk_delete(model, namespaces, data, error, delete_rows):
+    """Массовое удаление по списку id.
+
+    delete_rows(ids) выполняет сами DELETE-запросы (вместе с зависимыми
+    строками) в общей транзакции.
+    """
+    items, response = bulk_items(data)
+    if response:
+        return response
+    found = existing_ids(model, [i for i in items if is_id(i)])
+    ids, errors = [], []
+    for index, item_id in enumerate(items):
+        if not is_id(item_id):
+            errors.append({'index': index, 'error': 'Ожидается целый id'})
+        elif item_id in found:
+            ids.append(item_id)
+        else:
+            errors.append({'index': index, 'id': item_id, 'error': error})
+
+    def operation():
+        if ids:
+            delete_rows(ids)
+        return bulk_response('deleted', ids, len(ids), errors, 200)
+    return run_bulk(namespaces, operation)
+
+
+def delete_where(model, *criteria):
+    """DELETE ... WHERE без синхронизации объектов сессии.
+
+    Зависимые строки удаляет СУБД по ON DELETE CASCADE. Возвращает
+    число удаленных строк.
+    """
+    return db.session.execute(
+        db.delete(model).where(*criteria)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def is_foreign_key_violation(error):
+    """Вызвана ли IntegrityError ссылкой на несуществующую запись."""
+    orig = getattr(error, 'orig', None)
+    # PostgreSQL: SQLSTATE 23503, MySQL: ошибка 1452
+    if getattr(orig, 'pgcode', None) == '23503':
+        return True
+    if orig is not None and orig.args and orig.args[0] == 1452:
+        return True
+    return 'FOREIGN KEY constraint failed' in str(orig)
+
+
+def combine_validators(*validators):
+    """Объединение нескольких валидаторов в один (ETag от всех частей).
+
+    Время изменения известно, только если оно есть у каждой части (у
+    коллекций его нет, см. count_validator).
+    """
+    last_modified = None
+    if validators and all(v['last_modified'] for v in validators):
+        last_modified = max(v['last_modified'] for v in validators)
+    if last_modified is not None:
+        last_modified = datetime.fromtimestamp(
+            last_modified, timezone.utc
+        ).replace(tzinfo=None)
+    return make_validator(tuple(v['etag'] for v in validators), last_modified)
+
+
+def is_rating(value):
+    """Целая оценка от 1 до 5 (bool в JSON - не число)."""
+    return is_id(value) and value in BookRatingStats.RATINGS
+
+
+def rating_delta(rating, sign=1):
+    """Изменение агрегатов книги от одной оценки (sign=-1 - удаление)."""
+    return {'count': sign, 'total': sign * rating, f'rating_{rating}': sign}
+
+
+def merge_rating_delta(deltas, book_id, delta):
+    """Накопление изменений агрегатов по книгам."""
+    target = deltas.setdefault(book_id, {})
+    for key, value in delta.items():
+        target[key] = target.get(key, 0) + value
+
+
+def apply_rating_deltas(deltas):
+    """Инкрементальное обновление book_rating_stats в текущей транзакции.
+
+    deltas - словарь book_id -> изменения счетчиков (count, total,
+    rating_N). Для одной книги выполняется один UPDATE (и INSERT, если
+    строки еще нет), для пачки - выборка существующих строк, один
+    executemany UPDATE и один executemany INSERT.
+    """
+    stats = BookRatingStats
+    columns = ['count', 'total'] + [f'rating_{r}' for r in stats.RATINGS]
+    deltas = {
+        book_id: {c: delta.get(c, 0) for c in columns}
+        for book_id, delta in deltas.items() if any(delta.values())
+    }
+    if not deltas:
+        return
+
+    update = db.update(stats.__table__).where(
+        stats.book_id == bindparam('stats_book_id')
+    ).values(
+        average=db.cast(
+            stats.total + bindparam('d_total'), db.Float
+        ) / func.nullif(stats.count + bindparam('d_count'), 0),
+        **{c: getattr(stats, c) + bindparam(f'd_{c}') for c in columns}
+    )
+
+    def update_params(book_id):
+        params = {f'd_{c}': v for c, v in deltas[book_id].items()}
+        params['stats_book_id'] = book_id
+        return params
+
+    if len(deltas) == 1:
+        (book_id,) = deltas
+        if db.session.execute(update, update_params(book_id)).rowcount:
+            missing = []
+        else:
+            missing = [book_id]
+    else:
+        present = set(db.session.scalars(
+            db.select(stats.book_id).where(stats.book_id.in_(deltas))
+        ))
+        if present:
+            db.session.execute(
+                update, [update_params(book_id) for book_id in present]
+            )
+        missing = [book_id for book_id in deltas if book_id not in present]
+
+    if missing:
+        now = datetime.utcnow()
+        db.session.execute(db.insert(stats.__table__), [
+            dict(
+                deltas[book_id], book_id=book_id, updated_at=now,
+                average=(deltas[book_id]['total'] / deltas[book_id]['count']
+                         if deltas[book_id]['count'] else None)
+            )
+            for book_id in missing
+        ])
+    # Рейтинг входит в представление книги
+    mark_dirty(db.session, 'books')
 
 
 class DatabaseService:
@@ -10,95 +622,180 @@ class DatabaseService:
 
     @staticmethod
     def init_sqlite_db(app):
-        """Инициализация SQLite базы данных."""
+        """Инициализация SQLite базы данных.
+
+        База в памяти создается create_all() либо загружается из снимка
+        SQLITE_SNAPSHOT_PATH. Файловая база (SQLITE_PATH) работает в
+        режиме WAL, создается и обновляется миграциями; воркеры
+        инициализируют ее по очереди под межпроцессной блокировкой.
+        """
         db.init_app(app)
         with app.app_context():
-            db.create_all()
-            DatabaseService.seed_data()
+            configure_sqlite(db.engine, app.config)
+        DatabaseService.create_database(app)
 
     @staticmethod
-    def init_postgres_db(app, uri):
-        """Инициализация PostgreSQL базы данных."""
-        app.config['SQLALCHEMY_DATABASE_URI'] = uri
-        # db.init_app(app)
+    def create_database(app):
+        """Схема, полнотекстовый поиск и начальные данные основной базы.
+
+        Вызывается из init_sqlite_db() и в воркере после fork, если база
+        в памяти (см. init_preload).
+        """
         with app.app_context():
-            db.create_all()
+            with init_lock(db.engine):
+                if is_file_database(db.engine):
+                    DatabaseService.upgrade_schema()
+                else:
+                    snapshot = app.config.get('SQLITE_SNAPSHOT_PATH')
+                    if snapshot and os.path.exists(snapshot):
+                        restore_database(db.engine, snapshot)
+                    # Только основная база: схема дополнительных баз
+                    # создается в фоне (init_additional_databases)
+                    db.create_all(bind_key=None)
+                with db.engine.begin() as connection:
+                    app.extensions['search_backend'] = install_search(
+                        connection
+                    )
+                DatabaseService.seed_data()
+            PopularityService.load()
 
     @staticmethod
-    def init_mysql_db(app, uri):
-        """Инициализация MySQL базы данных."""
-        app.config['SQLALCHEMY_DATABASE_URI'] = uri
-        # db.init_app(app)
-        with app.app_context():
-            db.create_all()
+    def upgrade_schema():
+        """Обновление схемы до последней миграции (flask db upgrade)."""
+        # alembic импортируется только для файловой базы
+        from alembic import command as alembic_command
+        config = current_app.extensions['migrate'].migrate.get_config()
+        config.attributes['configure_logger'] = False
+        alembic_command.upgrade(config, 'head')
+
+    @staticmethod
+    def init_bind_db(key):
+        """Создание схемы в дополнительной базе SQLALCHEMY_BINDS[key].
+
+        Модели не привязаны к bind_key, поэтому схема создается по общим
+        метаданным на engine этой базы; затем пул базы прогревается.
+        """
+        engine = db.engines[key]
+        configure_sqlite(engine, current_app.config)
+        db.metadata.create_all(bind=engine)
+        warm_pool(engine, current_app.config['DB_POOL_WARMUP'])
 
     @staticmethod
     def seed_data():
-        """Заполнение начальными данными для разработки."""
+        """Заполнение начальными данными для разработки.
+
+        Каждая таблица заполняется одним пакетным INSERT (executemany);
+        id родительских записей читаются после вставки, т.к. таблицы
+        пусты. Все данные вместе с агрегатами оценок фиксируются одной
+        транзакцией.
+        """
         if Author.query.first():
             return
 
-        authors = [
-            Author(name='Роберт Мартин',
-                   bio='Специалист по программной инженерии'),
-            Author(name='Эрик Маттес',
-                   bio='Школьный учитель математики и информатики'),
-            Author(name='Лучано Рамальо',
-                   bio='Python разработчик и тренер'),
-            Author(name='Эрих Гамма',
-                   bio='Специалист по информатике, соавтор книги "Приемы '
-                       'объектно-ориентированного проектирования"')
-        ]
-        db.session.add_all(authors)
-        db.session.commit()
+        def insert(model, rows):
+            db.session.execute(db.insert(model), rows)
+            return db.session.scalars(
+                db.select(model.id).order_by(model.id)
+            ).all()
 
-        books = [
-            Book(title='Чистый код', isbn='9780132350884', author_id=1,
-                 description='Руководство по гибкой разработке программного '
-                             'обеспечения', price=3500),
-            Book(title='Python Crash Course', isbn='9781593276034',
-                 author_id=2,
-                 description='Практический проектно-ориентированный курс по '
-                             'программированию', price=2900),
-            Book(title='Fluent Python', isbn='9781491946008', author_id=3,
-                 description='Ясное, лаконичное и эффективное '
-                             'программирование', price=3900),
-            Book(title='Design Patterns', isbn='9780201633610', author_id=4,
-                 description='Элементы многократно используемого '
-                             'объектно-ориентированного программного '
-                             'обеспечения', price=4500)
-        ]
-        db.session.add_all(books)
-        db.session.commit()
+        try:
+            author_ids = insert(Author, [
+                {'name': 'Роберт Мартин',
+                 'bio': 'Специалист по программной инженерии'},
+                {'name': 'Эрик Маттес',
+                 'bio': 'Школьный учитель математики и информатики'},
+                {'name': 'Лучано Рамальо',
+                 'bio': 'Python разработчик и тренер'},
+                {'name': 'Эрих Гамма',
+                 'bio': 'Специалист по информатике, соавтор книги "Приемы '
+                        'объектно-ориентированного проектирования"'}
+            ])
+            book_ids = insert(Book, [
+                {'title': 'Чистый код', 'isbn': '9780132350884',
+                 'author_id': author_ids[0],
+                 'description': 'Руководство по гибкой разработке '
+                                'программного обеспечения', 'price': 3500},
+                {'title': 'Python Crash Course', 'isbn': '9781593276034',
+                 'author_id': author_ids[1],
+                 'description': 'Практический проектно-ориентированный курс '
+                                'по программированию', 'price': 2900},
+                {'title': 'Fluent Python', 'isbn': '9781491946008',
+                 'author_id': author_ids[2],
+                 'description': 'Ясное, лаконичное и эффективное '
+                                'программирование', 'price': 3900},
+                {'title': 'Design Patterns', 'isbn': '9780201633610',
+                 'author_id': author_ids[3],
+                 'description': 'Элементы многократно используемого '
+                                'объектно-ориентированного программного '
+                                'обеспечения', 'price': 4500}
+            ])
+            db.session.execute(db.insert(Review), [
+                {'rating': 5,
+                 'comment': 'Отличная книга для изучения чистого кода',
+                 'reviewer_name': 'Иван Иванов', 'book_id': book_ids[0]},
+                {'rating': 4, 'comment': 'Хорошее введение в Python',
+                 'reviewer_name': 'Мария Сидорова', 'book_id': book_ids[1]},
+                {'rating': 5,
+                 'comment': 'Подробная книга по Python для разработчиков '
+                            'среднего уровня',
+                 'reviewer_name': 'Сергей Петров', 'book_id': book_ids[2]}
+            ])
+            DatabaseService.rebuild_rating_stats()
+            mark_dirty(db.session, 'authors', 'books', 'reviews')
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            raise
 
-        reviews = [
-            Review(rating=5,
-                   comment='Отличная книга для изучения чистого кода',
-                   reviewer_name='Иван Иванов', book_id=1),
-            Review(rating=4, comment='Хорошее введение в Python',
-                   reviewer_name='Мария Сидорова', book_id=2),
-            Review(rating=5,
-                   comment='Подробная книга по Python для разработчиков '
-                           'среднего уровня',
-                   reviewer_name='Сергей Петров', book_id=3)
-        ]
-        db.session.add_all(reviews)
-        db.session.commit()
+    @staticmethod
+    def rebuild_rating_stats():
+        """Пересчет book_rating_stats по таблице отзывов.
+
+        Нужен для заполнения агрегатов в уже существующей базе; при
+        обычной работе они поддерживаются инкрементально.
+        """
+        db.session.execute(db.delete(BookRatingStats))
+        count = func.count(Review.id)
+        total = func.sum(Review.rating)
+        select = db.select(
+            Review.book_id, count, total,
+            db.cast(total, db.Float) / count,
+            *[func.sum(case((Review.rating == r, 1), else_=0))
+              for r in BookRatingStats.RATINGS],
+            db.literal(datetime.utcnow(), db.DateTime)
+        ).group_by(Review.book_id)
+        db.session.execute(db.insert(BookRatingStats).from_select(
+            ['book_id', 'count', 'total', 'average']
+            + [f'rating_{r}' for r in BookRatingStats.RATINGS]
+            + ['updated_at'],
+            select
+        ))
+        mark_dirty(db.session, 'books')
 
 
 class AuthorService:
     """Сервисный класс для операций с авторами."""
 
     @staticmethod
-    def get_all_authors():
-        """Получить всех авторов."""
+    @cached('authors')
+    def get_all_authors(limit=None, after=None):
+        """Получить страницу авторов (keyset по id)."""
         try:
-            authors = Author.query.all()
-            return [author.to_dict() for author in authors], 200
+            return paginate_model(Author.query, Author, limit, after), 200
         except SQLAlchemyError as e:
             return {'error': str(e)}, 500
 
     @staticmethod
+    @cached('authors')
+    def get_authors_by_ids(ids):
+        """Получить авторов по списку ID одним запросом."""
+        try:
+            return fetch_by_ids(Author, ids)
+        except SQLAlchemyError as e:
+            return {'error': str(e)}, 500
+
+    @staticmethod
+    @cached('authors')
     def get_author(author_id):
         """Получить автора по ID."""
         try:
@@ -109,6 +806,18 @@ class AuthorService:
         except SQLAlchemyError as e:
             return {'error': str(e)}, 500
 
+    @staticmethod
+    @cached('authors')
+    def get_authors_validator():
+        """Получить валидатор условного GET для списка авторов."""
+        return collection_validator(Author)
+
+    @staticmethod
+    @cached('authors')
+    def get_author_validator(author_id):
+        """Получить валидатор условного GET для автора."""
+        return item_validator(Author, author_id, 'Автор не найден')
+
     @staticmethod
     def create_author(data):
         """Создать нового автора."""
@@ -124,8 +833,10 @@ class AuthorService:
                 bio=data.get('bio')
             )
             db.session.add(author)
+            db.session.flush()
+            result = author.to_dict()
             db.session.commit()
-            return author.to_dict(), 201
+            return result, 201
         except IntegrityError:
             db.session.rollback()
             return {
@@ -155,8 +866,10 @@ class AuthorService:
             if 'bio' in data:
                 author.bio = data['bio']
 
+            db.session.flush()
+            result = author.to_dict()
             db.session.commit()
-            return author.to_dict(), 200
+            return result, 200
         except IntegrityError:
             db.session.rollback()
             return {
@@ -167,51 +880,301 @@ class AuthorService:
 
     @staticmethod
     def delete_author(author_id):
-        """Удалить автора."""
+        """Удалить автора.
+
+        Книги автора, их отзывы и агрегаты оценок удаляет СУБД
+        (ON DELETE CASCADE) в рамках одного DELETE, без загрузки
+        зависимых записей в сессию.
+        """
         try:
-            author = Author.query.get(author_id)
-            if not author:
+            if not delete_where(Author, Author.id == author_id):
                 return {'error': 'Автор не найден'}, 404
 
-            db.session.delete(author)
+            mark_dirty(db.session, 'authors', 'books', 'reviews')
             db.session.commit()
             return {'message': f'Автор {author_id} успешно удален'}, 200
         except SQLAlchemyError as e:
             db.session.rollback()
             return {'error': str(e)}, 500
 
+    @staticmethod
+    def build_row(item, partial=False):
+        """Проверка элемента массового запроса и построение строки."""
+        error = field_type_error(item, {
+            'name': 'str', 'birth_date': 'str', 'bio': 'str'
+        })
+        if error:
+            return None, error
+        row = {}
+        if not partial or 'name' in item:
+            if not item.get('name'):
+                return None, 'Не указано имя автора'
+            row['name'] = item['name']
+        if not partial or 'birth_date' in item:
+            row['birth_date'] = parse_date(item.get('birth_date'))
+        if not partial or 'bio' in item:
+            row['bio'] = item.get('bio')
+        return row, None
+
+    @staticmethod
+    def bulk_create(data):
+        """Массово создать авторов в одной транзакции."""
+        items, response = bulk_items(data)
+        if response:
+            return response
+        rows, errors = collect_rows(items, AuthorService.build_row)
+        return bulk_create(Author, ('authors',), rows, errors)
+
+    @staticmethod
+    def bulk_update(data):
+        """Массово обновить авторов в одной транзакции."""
+        items, response = bulk_items(data)
+        if response:
+            return response
+        rows, errors = collect_rows(items, AuthorService.build_row, True)
+        return bulk_apply_update(
+            Author, ('authors',), rows, errors, 'Автор не найден'
+        )
+
+    @staticmethod
+    def bulk_delete(data):
+        """Массово удалить авторов вместе с их книгами и отзывами."""
+        def delete_rows(ids):
+            delete_where(Author, Author.id.in_(ids))
+        return bulk_delete(
+            Author, ('authors', 'books', 'reviews'), data,
+            'Автор не найден', delete_rows
+        )
+
 
 class BookService:
     """Сервисный класс для операций с книгами."""
 
+    # Допустимые поля сортировки: только индексированные столбцы
+    SORT_COLUMNS = {
+        'id': Book.id,
+        'price': Book.price,
+        'publication_date': Book.publication_date,
+    }
+
     @staticmethod
-    def get_all_books():
-        """Получить все книги."""
+    def filter_books(query, author_id=None, price_min=None, price_max=None,
+                     published_after=None, published_before=None):
+        """Условия фильтрации книг (по индексированным столбцам)."""
+        if author_id is not None:
+            query = query.filter(Book.author_id == author_id)
+        if price_min is not None:
+            query = query.filter(Book.price >= price_min)
+        if price_max is not None:
+            query = query.filter(Book.price <= price_max)
+        if published_after is not None:
+            query = query.filter(Book.publication_date > published_after)
+        if published_before is not None:
+            query = query.filter(Book.publication_date < published_before)
+        return query
+
+    @staticmethod
+    def load_options(fields=None, include=(), required=()):
+        """Опции загрузки книг для ?fields= и ?include=.
+
+        Выбираются только запрошенные столбцы (load_only) плюс required;
+        без поля rating агрегаты оценок не присоединяются. Автор
+        встраивается через JOIN, отзывы - одним дополнительным запросом
+        selectinload на всю страницу.
+        """
+        options = []
+        if fields is not None:
+            columns = {'id', *required}
+            columns.update(f for f in fields if f in Book.__table__.columns)
+            if 'author' in include:
+                columns.add('author_id')
+            options.append(load_only(*(getattr(Book, c) for c in columns)))
+            if 'rating' not in fields:
+                options.append(lazyload(Book.rating_stats))
+        if 'author' in include:
+            options.append(joinedload(Book.author))
+        if 'reviews' in include:
+            options.append(selectinload(Book.reviews))
+        return options
+
+    @staticmethod
+    @cached('books', 'authors', 'reviews')
+    def get_all_books(limit=None, after=None, sort='id', order='asc',
+                      fields=None, include=(), **filters):
+        """Получить страницу книг с фильтрами и сортировкой.
+
+        Фильтры и сортировка выполняются в SQL. При сортировке по id по
+        возрастанию курсор after - id последней книги, иначе - курсор
+        encode_cursor() из заголовка X-Next-Cursor. fields и include
+        задают поля и встраиваемые связи (см. Book.to_dict).
+        """
+        try:
+            query = BookService.filter_books(Book.query, **filters)
+            # Встраивание связей требует объектов ORM, а курсор - значения
+            # столбца сортировки в каждой строке
+            serializer = None
+            if not include and (fields is None or sort in fields + ('id',)):
+                serializer = row_serializer(Book, fields)
+            if serializer is not None:
+                query = serializer.select(query)
+            else:
+                query = query.options(
+                    *BookService.load_options(fields, include, (sort,))
+                )
+            if sort == 'id' and order == 'asc':
+                if after is not None:
+                    after = int(after)
+                page = paginate(query, Book, limit, after)
+            else:
+                page = paginate_sorted(
+                    query, Book, BookService.SORT_COLUMNS[sort],
+                    order == 'desc', limit, after
+                )
+            return serialize_page(
+                page, serializer, fields=fields, include=include
+            ), 200
+        except ValueError:
+            return {'error': 'Некорректный курсор after'}, 400
+        except SQLAlchemyError as e:
+            return {'error': str(e)}, 500
+
+    @staticmethod
+    @cached('books', 'authors', 'reviews')
+    def get_books_by_ids(ids, fields=None, include=()):
+        """Получить книги по списку ID одним запросом."""
         try:
-            books = Book.query.all()
-            return [book.to_dict() for book in books], 200
+            return fetch_by_ids(
+                Book, ids, BookService.load_options(fields, include),
+                fields=fields, include=include
+            )
         except SQLAlchemyError as e:
             return {'error': str(e)}, 500
 
     @staticmethod
-    def get_book(book_id):
+    @cached('books', 'authors', 'reviews')
+    def get_book(book_id, fields=None, include=()):
         """Получить книгу по ID."""
         try:
-            book = Book.query.get(book_id)
+            book = db.session.scalar(
+                db.select(Book).where(Book.id == book_id)
+                .options(*BookService.load_options(fields, include))
+            )
             if not book:
                 return {'error': 'Книга не найдена'}, 404
-            return book.to_dict(), 200
+            return book.to_dict(fields, include), 200
         except SQLAlchemyError as e:
             return {'error': str(e)}, 500
 
     @staticmethod
-    def create_book(data):
-        """Создать новую книгу."""
+    @cached('books')
+    def get_top_rated(limit=None, min_count=1, after=None):
+        """Получить страницу книг с наивысшей средней оценкой.
+
+        Сортировка идет по индексированному столбцу book_rating_stats.average,
+        таблица отзывов не сканируется. Keyset-пагинация по (average, count,
+        id): курсор after - encode_cursor() последней книги страницы.
+        """
         try:
-            author = Author.query.get(data.get('author_id'))
-            if not author:
-                return {'error': 'Автор не найден'}, 404
+            stats = BookRatingStats
+            limit = page_size(limit)
+            query = (
+                db.select(Book).join(Book.rating_stats)
+                .options(contains_eager(Book.rating_stats))
+                .where(stats.count >= max(min_count, 1))
+            )
+            if after is not None:
+                (average, count), book_id = decode_cursor(
+                    after, stats.average, stats.count
+                )
+                query = query.where(db.or_(
+                    stats.average < average,
+                    db.and_(stats.average == average, db.or_(
+                        stats.count < count,
+                        db.and_(stats.count == count, Book.id > book_id)
+                    ))
+                ))
+            books = db.session.scalars(
+                query.order_by(
+                    stats.average.desc(), stats.count.desc(), Book.id
+                ).limit(limit + 1)
+            ).all()
+            next_cursor = None
+            if len(books) > limit:
+                last = books[limit - 1]
+                next_cursor = encode_cursor(
+                    [last.rating_stats.average, last.rating_stats.count],
+                    last.id
+                )
+            return {
+                'items': [book.to_dict() for book in books[:limit]],
+                'next': next_cursor
+            }, 200
+        except ValueError:
+            return {'error': 'Некорректный курсор after'}, 400
+        except SQLAlchemyError as e:
+            return {'error': str(e)}, 500
 
+    @staticmethod
+    def with_included(validator, include, authors=(), reviews=()):
+        """Добавление в валидатор встроенных связей (?include=).
+
+        authors/reviews - условия на строки связанных таблиц, входящие в
+        представление.
+        """
+        parts = [validator]
+        for name, model, criteria in (('author', Author, authors),
+                                      ('reviews', Review, reviews)):
+            if name in include:
+                part, status_code = collection_validator(model, *criteria)
+                if status_code != 200:
+                    return part, status_code
+                parts.append(part)
+        if len(parts) == 1:
+            return validator, 200
+        return combine_validators(*parts), 200
+
+    @staticmethod
+    @cached('books', 'authors', 'reviews')
+    def get_books_validator(include=()):
+        """Получить валидатор условного GET для списка книг."""
+        books, status_code = collection_validator(Book)
+        if status_code != 200:
+            return books, status_code
+        stats, status_code = collection_validator(BookRatingStats)
+        if status_code != 200:
+            return stats, status_code
+        return BookService.with_included(
+            combine_validators(books, stats), include
+        )
+
+    @staticmethod
+    @cached('books', 'authors', 'reviews')
+    def get_book_validator(book_id, include=()):
+        """Получить валидатор условного GET для книги (с учетом рейтинга)."""
+        book, status_code = item_with_children_validator(
+            Book, book_id, 'Книга не найдена',
+            BookRatingStats, BookRatingStats.book_id == book_id,
+            single_child=True
+        )
+        if status_code != 200:
+            return book, status_code
+        author_id = db.select(Book.author_id).where(Book.id == book_id)
+        return BookService.with_included(
+            book, include,
+            authors=(Author.id == author_id.scalar_subquery(),),
+            reviews=(Review.book_id == book_id,)
+        )
+
+    @staticmethod
+    def create_book(data):
+        """Создать новую книгу.
+
+        Существование автора проверяет внешний ключ при INSERT, без
+        отдельной выборки автора.
+        """
+        if not is_id(data.get('author_id')):
+            return {'error': 'Автор не найден'}, 404
+        try:
             pub_date_str = data.get('publication_date')
             publication_date = None
             if pub_date_str:
@@ -226,10 +1189,17 @@ class BookService:
                 author_id=data.get('author_id')
             )
             db.session.add(book)
+            db.session.flush()
+            # У новой книги еще нет агрегатов оценок, а сериализация до
+            # commit не требует повторной загрузки книги
+            set_committed_value(book, 'rating_stats', None)
+            result = book.to_dict()
             db.session.commit()
-            return book.to_dict(), 201
-        except IntegrityError:
+            return result, 201
+        except IntegrityError as e:
             db.session.rollback()
+            if is_foreign_key_violation(e):
+                return {'error': 'Автор не найден'}, 404
             return {
                 'error': 'Книга уже существует или нарушено ограничение '
                          'целостности данных'}, 409
@@ -261,15 +1231,18 @@ class BookService:
             if 'price' in data:
                 book.price = data['price']
             if 'author_id' in data:
-                author = Author.query.get(data['author_id'])
-                if not author:
+                if not is_id(data['author_id']):
                     return {'error': 'Автор не найден'}, 404
                 book.author_id = data['author_id']
 
+            db.session.flush()
+            result = book.to_dict()
             db.session.commit()
-            return book.to_dict(), 200
-        except IntegrityError:
+            return result, 200
+        except IntegrityError as e:
             db.session.rollback()
+            if is_foreign_key_violation(e):
+                return {'error': 'Автор не найден'}, 404
             return {
                 'error': 'Нарушено ограничение целостности данных'}, 409
         except SQLAlchemyError as e:
@@ -278,46 +1251,158 @@ class BookService:
 
     @staticmethod
     def delete_book(book_id):
-        """Удалить книгу."""
+        """Удалить книгу (отзывы и агрегаты удаляются каскадно в СУБД)."""
         try:
-            book = Book.query.get(book_id)
-            if not book:
+            if not delete_where(Book, Book.id == book_id):
                 return {'error': 'Книга не найдена'}, 404
 
-            db.session.delete(book)
+            mark_dirty(db.session, 'books', 'reviews')
             db.session.commit()
             return {'message': f'Книга {book_id} успешно удалена'}, 200
         except SQLAlchemyError as e:
             db.session.rollback()
             return {'error': str(e)}, 500
 
+    @staticmethod
+    def build_row(item, partial=False):
+        """Проверка элемента массового запроса и построение строки."""
+        error = field_type_error(item, {
+            'title': 'str', 'isbn': 'str', 'description': 'str',
+            'publication_date': 'str', 'price': 'number'
+        })
+        if error:
+            return None, error
+        row = {}
+        if not partial or 'title' in item:
+            if not item.get('title'):
+                return None, 'Не указано название книги'
+            row['title'] = item['title']
+        if not partial or 'author_id' in item:
+            if not is_id(item.get('author_id')):
+                return None, 'Не указан автор'
+            row['author_id'] = item['author_id']
+        if not partial or 'publication_date' in item:
+            row['publication_date'] = parse_date(item.get('publication_date'))
+        for field in ('isbn', 'description', 'price'):
+            if not partial or field in item:
+                row[field] = item.get(field)
+        return row, None
+
+    @staticmethod
+    def check_references(rows, errors):
+        """Проверка авторов и уникальности ISBN для пачки строк.
+
+        Выполняет по одному IN-запросу на авторов и на ISBN вместо
+        отдельного запроса для каждого элемента.
+        """
+        authors = existing_ids(
+            Author, [row['author_id'] for _, row in rows if 'author_id' in row]
+        )
+        taken = taken_isbns(row.get('isbn') for _, row in rows)
+        valid, seen = [], set()
+        for index, row in rows:
+            isbn = row.get('isbn')
+            if 'author_id' in row and row['author_id'] not in authors:
+                errors.append({'index': index, 'error': 'Автор не найден'})
+            elif isbn and (
+                isbn in seen or taken.get(isbn, row.get('id')) != row.get('id')
+            ):
+                errors.append({
+                    'index': index, 'error': f'ISBN {isbn} уже используется'})
+            else:
+                seen.add(isbn)
+                valid.append((index, row))
+        return valid
+
+    @staticmethod
+    def bulk_create(data):
+        """Массово создать книги в одной транзакции."""
+        items, response = bulk_items(data)
+        if response:
+            return response
+        rows, errors = collect_rows(items, BookService.build_row)
+        rows = BookService.check_references(rows, errors)
+        return bulk_create(Book, ('books',), rows, errors)
+
+    @staticmethod
+    def bulk_update(data):
+        """Массово обновить книги в одной транзакции."""
+        items, response = bulk_items(data)
+        if response:
+            return response
+        rows, errors = collect_rows(items, BookService.build_row, True)
+        rows = BookService.check_references(rows, errors)
+        return bulk_apply_update(
+            Book, ('books',), rows, errors, 'Книга не найдена'
+        )
+
+    @staticmethod
+    def bulk_delete(data):
+        """Массово удалить книги вместе с их отзывами."""
+        def delete_rows(ids):
+            delete_where(Book, Book.id.in_(ids))
+        return bulk_delete(
+            Book, ('books', 'reviews'), data, 'Книга не найдена', delete_rows
+        )
+
 
 class ReviewService:
     """Сервисный класс для операций с отзывами."""
 
     @staticmethod
-    def get_all_reviews():
-        """Получить все отзывы."""
+    @cached('reviews')
+    def get_all_reviews(limit=None, after=None):
+        """Получить страницу отзывов (keyset по id)."""
         try:
-            reviews = Review.query.all()
-            return [review.to_dict() for review in reviews], 200
+            return paginate_model(Review.query, Review, limit, after), 200
         except SQLAlchemyError as e:
             return {'error': str(e)}, 500
 
     @staticmethod
-    def get_reviews_for_book(book_id):
-        """Получить все отзывы для конкретной книги."""
+    @cached('reviews', 'books')
+    def get_reviews_for_book(book_id, limit=None, after=None):
+        """Получить страницу отзывов для конкретной книги.
+
+        Книга и ее отзывы выбираются одним запросом через LEFT JOIN:
+        отсутствие строк означает, что книги нет, а строка без отзыва -
+        что у книги нет отзывов на этой странице.
+        """
         try:
-            book = Book.query.get(book_id)
-            if not book:
+            limit = page_size(limit)
+            condition = Review.book_id == Book.id
+            if after is not None:
+                condition &= Review.id > after
+            rows = db.session.execute(
+                db.select(Book.id, Review)
+                .outerjoin(Review, condition)
+                .where(Book.id == book_id)
+                .order_by(Review.id)
+                .limit(limit + 1)
+            ).all()
+            if not rows:
                 return {'error': 'Книга не найдена'}, 404
 
-            reviews = Review.query.filter_by(book_id=book_id).all()
-            return [review.to_dict() for review in reviews], 200
+            reviews = [review for _, review in rows if review is not None]
+            next_cursor = (
+                reviews[limit - 1].id if len(reviews) > limit else None
+            )
+            return serialize_page(
+                {'items': reviews[:limit], 'next': next_cursor}
+            ), 200
+        except SQLAlchemyError as e:
+            return {'error': str(e)}, 500
+
+    @staticmethod
+    @cached('reviews')
+    def get_reviews_by_ids(ids):
+        """Получить отзывы по списку ID одним запросом."""
+        try:
+            return fetch_by_ids(Review, ids)
         except SQLAlchemyError as e:
             return {'error': str(e)}, 500
 
     @staticmethod
+    @cached('reviews')
     def get_review(review_id):
         """Получить отзыв по ID."""
         try:
@@ -328,16 +1413,43 @@ class ReviewService:
         except SQLAlchemyError as e:
             return {'error': str(e)}, 500
 
+    @staticmethod
+    @cached('reviews')
+    def get_reviews_validator():
+        """Получить валидатор условного GET для списка отзывов."""
+        return collection_validator(Review)
+
+    @staticmethod
+    @cached('reviews', 'books')
+    def get_reviews_for_book_validator(book_id):
+        """Получить валидатор условного GET для отзывов книги.
+
+        В валидатор входит и updated_at самой книги, чтобы пустой список
+        отзывов существующей книги отличался от удаленной книги.
+        """
+        return item_with_children_validator(
+            Book, book_id, 'Книга не найдена',
+            Review, Review.book_id == book_id
+        )
+
+    @staticmethod
+    @cached('reviews')
+    def get_review_validator(review_id):
+        """Получить валидатор условного GET для отзыва."""
+        return item_validator(Review, review_id, 'Отзыв не найден')
+
     @staticmethod
     def create_review(data):
-        """Создать новый отзыв."""
-        try:
-            book = Book.query.get(data.get('book_id'))
-            if not book:
-                return {'error': 'Книга не найдена'}, 404
+        """Создать новый отзыв.
 
+        Существование книги проверяет внешний ключ (агрегатов оценок и
+        самого отзыва), без отдельной выборки книги.
+        """
+        if not is_id(data.get('book_id')):
+            return {'error': 'Книга не найдена'}, 404
+        try:
             rating = data.get('rating')
-            if rating is None or not (1 <= rating <= 5):
+            if not is_rating(rating):
                 return {'error': 'Оценка должна быть от 1 до 5'}, 400
 
             review = Review(
@@ -347,10 +1459,16 @@ class ReviewService:
                 book_id=data.get('book_id')
             )
             db.session.add(review)
+            apply_rating_deltas({review.book_id: rating_delta(rating)})
+            db.session.flush()
+            result = review.to_dict()
             db.session.commit()
-            return review.to_dict(), 201
-        except IntegrityError:
+            PopularityService.record_review(result['book_id'])
+            return result, 201
+        except IntegrityError as e:
             db.session.rollback()
+            if is_foreign_key_violation(e):
+                return {'error': 'Книга не найдена'}, 404
             return {
                 'error': 'Нарушено ограничение целостности данных'}, 409
         except SQLAlchemyError as e:
@@ -367,16 +1485,28 @@ class ReviewService:
 
             if 'rating' in data:
                 rating = data['rating']
-                if not (1 <= rating <= 5):
+                if not is_rating(rating):
                     return {'error': 'Оценка должна быть от 1 до 5'}, 400
+                if rating != review.rating:
+                    deltas = {}
+                    merge_rating_delta(
+                        deltas, review.book_id, rating_delta(review.rating, -1)
+                    )
+                    merge_rating_delta(
+                        deltas, review.book_id, rating_delta(rating)
+                    )
+                    apply_rating_deltas(deltas)
                 review.rating = rating
             if 'comment' in data:
                 review.comment = data['comment']
             if 'reviewer_name' in data:
                 review.reviewer_name = data['reviewer_name']
 
+            db.session.flush()
+            result = review.to_dict()
             db.session.commit()
-            return review.to_dict(), 200
+            PopularityService.record_review(result['book_id'])
+            return result, 200
         except IntegrityError:
             db.session.rollback()
             return {
@@ -394,12 +1524,366 @@ class ReviewService:
                 return {'error': 'Отзыв не найден'}, 404
 
             db.session.delete(review)
+            apply_rating_deltas(
+                {review.book_id: rating_delta(review.rating, -1)}
+            )
             db.session.commit()
             return {'message': f'Отзыв {review_id} успешно удален'}, 200
         except SQLAlchemyError as e:
             db.session.rollback()
             return {'error': str(e)}, 500
 
+    @staticmethod
+    def build_row(item, partial=False):
+        """Проверка элемента массового запроса и построение строки."""
+        error = field_type_error(item, {
+            'reviewer_name': 'str', 'comment': 'str'
+        })
+        if error:
+            return None, error
+        row = {}
+        if not partial or 'rating' in item:
+            rating = item.get('rating')
+            if not is_rating(rating):
+                return None, 'Оценка должна быть от 1 до 5'
+            row['rating'] = rating
+        if not partial or 'reviewer_name' in item:
+            if not item.get('reviewer_name'):
+                return None, 'Не указано имя рецензента'
+            row['reviewer_name'] = item['reviewer_name']
+        if not partial:
+            if not is_id(item.get('book_id')):
+                return None, 'Не указана книга'
+            row['book_id'] = item['book_id']
+        if not partial or 'comment' in item:
+            row['comment'] = item.get('comment')
+        return row, None
+
+    @staticmethod
+    def bulk_create(data):
+        """Массово создать отзывы в одной транзакции."""
+        items, response = bulk_items(data)
+        if response:
+            return response
+        rows, errors = collect_rows(items, ReviewService.build_row)
+        books = existing_ids(Book, [row['book_id'] for _, row in rows])
+        valid = []
+        for index, row in rows:
+            if row['book_id'] in books:
+                valid.append((index, row))
+            else:
+                errors.append({'index': index, 'error': 'Книга не найдена'})
+
+        def before_insert(rows):
+            deltas = {}
+            for row in rows:
+                merge_rating_delta(
+                    deltas, row['book_id'], rating_delta(row['rating'])
+                )
+            apply_rating_deltas(deltas)
+        return bulk_create(Review, ('reviews',), valid, errors, before_insert)
+
+    @staticmethod
+    def bulk_update(data):
+        """Массово обновить отзывы в одной транзакции."""
+        items, response = bulk_items(data)
+        if response:
+            return response
+        rows, errors = collect_rows(items, ReviewService.build_row, True)
+
+        def before_update(rows):
+            changed = {row['id']: row['rating'] for row in rows
+                       if 'rating' in row}
+            if changed:
+                ReviewService.apply_rating_changes(changed)
+        return bulk_apply_update(
+            Review, ('reviews',), rows, errors, 'Отзыв не найден',
+            before_update
+        )
+
+    @staticmethod
+    def apply_rating_changes(ratings):
+        """Обновление агрегатов книг для изменения/удаления отзывов.
+
+        ratings - словарь review_id -> новая оценка (None при удалении);
+        прежние оценки читаются одним IN-запросом.
+        """
+        deltas = {}
+        for review_id, book_id, old_rating in db.session.execute(
+            db.select(Review.id, Review.book_id, Review.rating)
+            .where(Review.id.in_(ratings))
+        ):
+            new_rating = ratings[review_id]
+            if new_rating == old_rating:
+                continue
+            merge_rating_delta(deltas, book_id, rating_delta(old_rating, -1))
+            if new_rating is not None:
+                merge_rating_delta(deltas, book_id, rating_delta(new_rating))
+        apply_rating_deltas(deltas)
+
+    @staticmethod
+    def bulk_delete(data):
+        """Массово удалить отзывы."""
+        def delete_rows(ids):
+            ReviewService.apply_rating_changes(dict.fromkeys(ids))
+            delete_where(Review, Review.id.in_(ids))
+        return bulk_delete(
+            Review, ('reviews',), data, 'Отзыв не найден', delete_rows
+        )
+
+
+class SearchService:
+    """Сервисный класс для полнотекстового поиска по книгам и авторам."""
+
+    MODELS = {'book': Book, 'author': Author}
+
+    @staticmethod
+    def search(query, limit=None, offset=0):
+        """Найти книги и авторов, упорядочив их по релевантности.
+
+        Запрос автоматически попадает в список недавних поисков.
+        """
+        if not query or not query.strip():
+            return {'error': 'Не задан поисковый запрос'}, 400
+        MemoryService.add_search_query(query)
+        return SearchService.ranked(query, page_size(limit), offset)
+
+    @staticmethod
+    @cached('books', 'authors')
+    def ranked(query, limit, offset):
+        """Получить страницу результатов поиска с оценкой релевантности."""
+        try:
+            backend = current_app.extensions.get('search_backend', 'like')
+            parameter = query_parameter(backend, query)
+            if parameter is None:
+                return {'query': query, 'items': [], 'next': None}, 200
+            rows = db.session.execute(
+                ranked_matches_statement(backend),
+                {'query': parameter, 'limit': limit + 1, 'offset': offset}
+            ).all()
+            next_offset = offset + limit if len(rows) > limit else None
+            rows = rows[:limit]
+
+            # По одному IN-запросу на тип результата
+            found = {}
+            for kind, model in SearchService.MODELS.items():
+                ids = [row.id for row in rows if row.kind == kind]
+                if ids:
+                    found[kind] = {
+                        item.id: item for item in db.session.scalars(
+                            db.select(model).where(model.id.in_(ids))
+                        )
+                    }
+            items = [
+                {
+                    'type': row.kind,
+                    'score': round(float(row.rank), 4),
+                    'item': found[row.kind][row.id].to_dict()
+                }
+                for row in rows if row.id in found.get(row.kind, {})
+            ]
+            return {'query': query, 'items': items, 'next': next_offset}, 200
+        except SQLAlchemyError as e:
+            return {'error': str(e)}, 500
+
+
+class ExportService:
+    """Сервисный класс для потоковой выгрузки коллекций в NDJSON."""
+
+    MODELS = {'authors': Author, 'books': Book, 'reviews': Review}
+
+    @staticmethod
+    def export(entity, after=None):
+        """Получить генератор строк NDJSON для выгрузки сущности.
+
+        Строки читаются из БД пачками по EXPORT_BATCH_SIZE (yield_per, на
+        PostgreSQL/MySQL - серверный курсор), поэтому потребление памяти не
+        зависит от размера таблицы. Параметр after позволяет продолжить
+        прерванную выгрузку с указанного id.
+        """
+        model = ExportService.MODELS.get(entity)
+        if model is None:
+            return {'error': f'Неизвестная сущность "{entity}"'}, 404
+        return ExportService._iter_ndjson(model, after), 200
+
+    @staticmethod
+    def _iter_ndjson(model, after):
+        """Генератор строк NDJSON для всех записей модели."""
+        batch_size = current_app.config['EXPORT_BATCH_SIZE']
+        serializer = row_serializer(model)
+        if serializer is not None:
+            # Пачки строк Core сериализуются целиком, без объектов ORM
+            stmt = serializer.statement()
+        else:
+            stmt = db.select(model)
+        stmt = stmt.order_by(model.id).execution_options(
+            yield_per=batch_size
+        )
+        if after is not None:
+            stmt = stmt.where(model.id > after)
+        if serializer is None:
+            for item in db.session.scalars(stmt):
+                yield current_app.json.dumps(item.to_dict()) + '\n'
+            return
+        dumps = current_app.json.dumps
+        for rows in db.session.execute(stmt).partitions(batch_size):
+            yield ''.join(dumps(item) + '\n' for item in serializer(rows))
+
+
+class StatsService:
+    """Сервисный класс для служебной статистики приложения."""
+
+    @staticmethod
+    def get_stats():
+        """Получить счетчики кеша чтений, хеширования паролей и пулов БД."""
+        cache = get_cache()
+        replicas = get_replicas()
+        return {
+            'cache': cache.stats() if cache else None,
+            'password_hashing': get_hasher().metrics(),
+            'db_pool': pool_metrics(db.engine),
+            'db_replicas': replicas.stats() if replicas else None,
+            'db_binds': {
+                key: pool_metrics(engine)
+                for key, engine in db.engines.items() if key is not None
+            }
+        }, 200
+
+
+class PopularityService:
+    """Сервисный класс для популярности книг.
+
+    Просмотры книг и активность в отзывах учитываются в PopularityTracker
+    в памяти воркера; раз в POPULARITY_FLUSH_INTERVAL секунд лидеры
+    сбрасываются в book_popularity, откуда загружаются при запуске.
+    """
+
+    @staticmethod
+    def record(book_id, weight=1.0):
+        """Учесть событие для книги с весом weight."""
+        tracker = get_popularity()
+        if tracker is None:
+            return
+        tracker.record(book_id, weight)
+        interval = current_app.config['POPULARITY_FLUSH_INTERVAL']
+        if tracker.flush_due(interval):
+            PopularityService.flush()
+
+    @staticmethod
+    def record_view(book_id):
+        """Учесть просмотр книги (GET /api/books/<id>)."""
+        PopularityService.record(book_id)
+
+    @staticmethod
+    def record_review(book_id):
+        """Учесть создание или изменение отзыва о книге."""
+        PopularityService.record(
+            book_id, current_app.config['POPULARITY_REVIEW_WEIGHT']
+        )
+
+    @staticmethod
+    def get_popular_books():
+        """Получить POPULARITY_TOP_K самых популярных книг.
+
+        Лидеры берутся из памяти за O(k), названия - одним запросом по
+        первичному ключу. Удаленные книги исключаются из лидеров.
+        """
+        tracker = get_popularity()
+        if tracker is None:
+            return [], 200
+        leaders = tracker.top(current_app.config['POPULARITY_TOP_K'])
+        try:
+            titles = dict(db.session.execute(
+                db.select(Book.id, Book.title).where(
+                    Book.id.in_([book_id for book_id, _ in leaders])
+                )
+            ).all()) if leaders else {}
+        except SQLAlchemyError as e:
+            return {'error': str(e)}, 500
+        popular = []
+        for book_id, score in leaders:
+            if book_id not in titles:
+                tracker.discard(book_id)
+                continue
+            popular.append({
+                'id': book_id,
+                'title': titles[book_id],
+                'popularity': round(score, 3)
+            })
+        return popular, 200
+
+    @staticmethod
+    def flush():
+        """Сохранить лидеров текущего воркера в book_popularity.
+
+        Строка обновляется, только если новая оценка больше сохраненной
+        (log_score сравним между воркерами), поэтому воркеры не
+        затирают лидеров друг друга. Хранится не более
+        POPULARITY_CAPACITY строк с наибольшими оценками.
+        """
+        tracker = get_popularity()
+        if tracker is None:
+            return
+        scores = dict(tracker.snapshot())
+        table = BookPopularity.__table__
+        try:
+            stored = dict(db.session.execute(
+                db.select(BookPopularity.book_id, BookPopularity.log_score)
+                .where(BookPopularity.book_id.in_(scores))
+            ).all()) if scores else {}
+            books = set(db.session.scalars(
+                db.select(Book.id).where(Book.id.in_(
+                    [book_id for book_id in scores if book_id not in stored]
+                ))
+            )) if len(stored) < len(scores) else set()
+            now = datetime.utcnow()
+            updates = [
+                {'b_id': book_id, 'log_score': score, 'updated_at': now}
+                for book_id, score in scores.items()
+                if book_id in stored and score > stored[book_id]
+            ]
+            inserts = [
+                {'book_id': book_id, 'log_score': score, 'updated_at': now}
+                for book_id, score in scores.items() if book_id in books
+            ]
+            if updates:
+                db.session.execute(
+                    db.update(table)
+                    .where(table.c.book_id == bindparam('b_id'))
+                    .values(log_score=bindparam('log_score'),
+                            updated_at=bindparam('updated_at')),
+                    updates
+                )
+            if inserts:
+                db.session.execute(db.insert(table), inserts)
+            threshold = db.session.scalar(
+                db.select(table.c.log_score)
+                .order_by(table.c.log_score.desc())
+                .offset(tracker.capacity - 1).limit(1)
+            )
+            if threshold is not None:
+                db.session.execute(
+                    db.delete(table).where(table.c.log_score < threshold)
+                )
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.warning(
+                f'Не удалось сохранить популярность книг: {e}'
+            )
+
+    @staticmethod
+    def load():
+        """Загрузить сохраненных лидеров в трекер текущего воркера."""
+        tracker = get_popularity()
+        if tracker is None:
+            return
+        tracker.load(db.session.execute(
+            db.select(BookPopularity.book_id, BookPopularity.log_score)
+            .order_by(BookPopularity.log_score.desc())
+            .limit(tracker.capacity)
+        ).all())
+
 
 class MemoryService:
     """Сервисный класс для операций с данными в памяти."""
@@ -407,11 +1891,22 @@ class MemoryService:
     @staticmethod
     def get_all_memory_data():
         """Получить все данные из памяти."""
-        return memory_store, 200
+        return {
+            'recent_searches': get_recent_searches().items(),
+            'popular_books': PopularityService.get_popular_books()[0],
+            **memory_store
+        }, 200
 
     @staticmethod
     def get_memory_data(key):
         """Получить конкретные данные из памяти по ключу."""
+        if key == 'recent_searches':
+            return {key: get_recent_searches().items()}, 200
+        if key == 'popular_books':
+            data, status_code = PopularityService.get_popular_books()
+            if status_code != 200:
+                return data, status_code
+            return {key: data}, 200
         if key not in memory_store:
             return {
                 'error': f'Ключ "{key}" не найден в хранилище памяти'}, 404
@@ -419,13 +1914,12 @@ class MemoryService:
 
     @staticmethod
     def add_search_query(query):
-        """Добавить поисковый запрос в недавние поиски."""
-        memory_store['recent_searches'].append({
-            'query': query,
-            'timestamp': datetime.utcnow().isoformat()
-        })
-        memory_store['recent_searches'] = \
-            memory_store['recent_searches'][-10:]
+        """Добавить поисковый запрос в недавние поиски.
+
+        Хранится не более RECENT_SEARCHES_SIZE последних запросов; при
+        RECENT_SEARCHES_BACKEND=sqlite история общая для всех воркеров.
+        """
+        get_recent_searches().add(query, datetime.utcnow().isoformat())
         return {'message': 'Поисковый запрос добавлен'}, 200
 
     @staticmethod
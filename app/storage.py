@@ -0,0 +1,200 @@
+# app/storage.py
+
+import atexit
+import contextlib
+import os
+import sqlite3
+import time
+import click
+from flask.cli import AppGroup
+from sqlalchemy import event
+from .models import db
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+def is_file_url(url):
+    """Указывает ли URL на файловую базу SQLite (а не :memory:)."""
+    return (
+        url.get_backend_name() == 'sqlite'
+        and url.database not in (None, '', ':memory:')
+    )
+
+
+def is_file_database(engine):
+    """Файловая ли база SQLite (а не :memory:)."""
+    return is_file_url(engine.url)
+
+
+def is_memory_database(engine):
+    """База SQLite в памяти (у каждого процесса - своя)."""
+    return (
+        engine.url.get_backend_name() == 'sqlite'
+        and not is_file_database(engine)
+    )
+
+
+def sqlite_pragmas(config):
+    """PRAGMA для соединений с файловой базой SQLite.
+
+    WAL позволяет читателям не ждать писателя, synchronous=NORMAL в
+    режиме WAL не теряет целостность при сбое процесса, mmap_size и
+    cache_size уменьшают число системных вызовов чтения, а busy_timeout
+    заставляет писателей разных воркеров ждать блокировку, а не сразу
+    получать "database is locked".
+    """
+    return (
+        ('journal_mode', 'WAL'),
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        ('mmap_size', config['SQLITE_MMAP_SIZE']),
+        ('cache_size', config['SQLITE_CACHE_SIZE']),
+        ('busy_timeout', config['SQLITE_BUSY_TIMEOUT']),
+        ('temp_store', 'MEMORY'),
+    )
+
+
+def configure_sqlite(engine, config):
+    """Применение sqlite_pragmas() к каждому новому соединению engine."""
+    if not is_file_database(engine):
+        return
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+@contextlib.contextmanager
+def init_lock(engine):
+    """Межпроцессная блокировка инициализации файловой базы.
+
+    Воркеры gunicorn запускаются одновременно; без блокировки несколько
+    из них начнут создавать схему и начальные данные параллельно.
+    """
+    if not is_file_database(engine):
+        yield
+        return
+    with file_lock(engine.url.database):
+        yield
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Межпроцессная блокировка файла path (flock на path.lock)."""
+    if fcntl is None:
+        yield
+        return
+    with open(path + '.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _copy(source, target, pages):
+    """Онлайн-копирование через sqlite3.Connection.backup.
+
+    При pages > 0 копирование идет пачками страниц, между которыми
+    источник доступен другим соединениям; их изменения перезапускают
+    копирование, так что снимок всегда согласован.
+    """
+    started = time.perf_counter()
+    source.backup(target, pages=pages)
+    return time.perf_counter() - started
+
+
+def snapshot_database(engine, path, pages=-1):
+    """Снимок базы engine (в т.ч. :memory:) в файл path.
+
+    Снимок пишется во временный файл и атомарно заменяет path, поэтому
+    прерванная запись не портит предыдущий снимок. Процессы, сохраняющие
+    снимок в один path, делают это по очереди (file_lock). Возвращает
+    время копирования в секундах.
+    """
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with file_lock(path):
+        raw = engine.raw_connection()
+        try:
+            target = sqlite3.connect(tmp_path)
+            try:
+                elapsed = _copy(raw.driver_connection, target, pages)
+            finally:
+                target.close()
+        finally:
+            raw.close()
+        os.replace(tmp_path, path)
+    return elapsed
+
+
+def restore_database(engine, path, pages=-1):
+    """Загрузка снимка path в базу engine с заменой ее содержимого.
+
+    Для :memory: база заменяется в единственном соединении StaticPool,
+    которое используют все сессии приложения. Возвращает время
+    копирования в секундах.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    source = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    raw = engine.raw_connection()
+    try:
+        elapsed = _copy(source, raw.driver_connection, pages)
+    finally:
+        raw.close()
+        source.close()
+    # Соединения пула могли закешировать прежнюю схему
+    if is_file_database(engine):
+        engine.dispose()
+    return elapsed
+
+
+snapshot_cli = AppGroup('snapshot', help='Снимки базы SQLite.')
+
+
+@snapshot_cli.command('save')
+@click.argument('path')
+def save_snapshot(path):
+    """Сохранить снимок базы приложения в файл PATH."""
+    elapsed = snapshot_database(db.engine, path)
+    click.echo(f'Снимок сохранен в {path} за {elapsed:.3f} с')
+
+
+@snapshot_cli.command('load')
+@click.argument('path')
+def load_snapshot(path):
+    """Заменить содержимое файловой базы снимком PATH."""
+    if not is_file_database(db.engine):
+        raise click.ClickException(
+            'База в памяти загружается из SQLITE_SNAPSHOT_PATH при запуске'
+        )
+    elapsed = restore_database(db.engine, path)
+    click.echo(f'Снимок {path} загружен за {elapsed:.3f} с')
+
+
+def init_snapshots(app):
+    """Команды flask snapshot и сохранение базы в памяти при выходе.
+
+    Базу сохраняет процесс, обслуживающий запросы. Процесс, запустивший
+    воркеры через fork (мастер gunicorn --preload), при выходе базу не
+    сохраняет: его копия базы - состояние до fork, и она затерла бы
+    данные воркеров. Воркеры наследуют обработчик при fork.
+    """
+    app.cli.add_command(snapshot_cli)
+    path = app.config.get('SQLITE_SNAPSHOT_PATH')
+    if path and app.config.get('SQLITE_SNAPSHOT_ON_EXIT'):
+        def save_on_exit():
+            with app.app_context():
+                if not is_file_database(db.engine):
+                    snapshot_database(db.engine, path)
+        atexit.register(save_on_exit)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(
+                after_in_parent=lambda: atexit.unregister(save_on_exit)
+            )
@@ -3,8 +3,11 @@
 import re
 import hashlib
 import secrets
-from datetime import datetime, timedelta
-from flask import request, jsonify
+from datetime import datetime, timezone
+from flask import current_app, request, jsonify, make_response
+from .compression import cached_compressed_response
+from .passwords import get_hasher
+from .ratelimit import SlidingWindowLimiter, create_backend
 # flask.current_app was F401 in the log, so it's removed.
 
 
@@ -25,51 +28,49 @@ def generate_secure_token(length=32):
 
 
 def hash_password(password, salt=None):
-    """Хеширование пароля с солью."""
-    if not salt:
-        salt = secrets.token_hex(8)
+    """Хеширование пароля с солью.
 
-    # Создание хеша с солью
-    hashed = hashlib.pbkdf2_hmac(
-        'sha256',
-        password.encode('utf-8'),
-        salt.encode('utf-8'),
-        100000
-    ).hex()
-
-    return f"{salt}${hashed}"
+    Выполняется в ограниченном пуле потоков сервиса хеширования; при
+    переполнении очереди выбрасывается HashingOverloaded (ответ 503).
+    """
+    return get_hasher().hash(password, salt)
 
 
 def verify_password(stored_password, provided_password):
     """Проверка пароля на соответствие хранимому хешу."""
-    salt, hashed = stored_password.split('$')
-    return stored_password == hash_password(provided_password, salt)
-
+    return get_hasher().verify(stored_password, provided_password)
 
-def rate_limit(requests_limit=100, time_window=60):
-    """Декоратор для реализации базового ограничения частоты запросов."""
-    # Хранение временных меток запросов по IP
-    ip_requests = {}
 
-    def decorator(f):
-        def wrapper(*args, **kwargs):
-            ip = request.remote_addr
-            current_time = datetime.utcnow()
+def rate_limit(requests_limit=100, time_window=60, max_keys=100000):
+    """Декоратор для ограничения частоты запросов по IP.
 
-            if ip not in ip_requests:
-                ip_requests[ip] = []
+    Использует скользящее окно со счетчиками: O(1) на проверку и
+    фиксированный объем памяти на IP, простаивающие IP вытесняются,
+    а число отслеживаемых IP ограничено max_keys. Хранилище счетчиков
+    выбирается настройкой RATE_LIMIT_BACKEND при первом запросе: при
+    sqlite/redis лимит действует на все воркеры gunicorn вместе.
+    """
+    limiters = []
 
-            cutoff_time = current_time - timedelta(seconds=time_window)
-            ip_requests[ip] = [t for t in ip_requests[ip]
-                               if t >= cutoff_time]
+    def get_limiter():
+        if not limiters:
+            limiters.append(SlidingWindowLimiter(
+                requests_limit, time_window, max_keys,
+                backend=create_backend(current_app.config, max_keys)
+            ))
+        return limiters[0]
 
-            if len(ip_requests[ip]) >= requests_limit:
+    def decorator(f):
+        def wrapper(*args, **kwargs):
+            # Имя маршрута в ключе разделяет лимиты в общем хранилище
+            allowed, retry_after = get_limiter().hit(
+                f'{f.__name__}:{request.remote_addr}'
+            )
+            if not allowed:
                 return jsonify({
                     'error': 'Превышен лимит запросов',
-                    'retry_after': time_window
+                    'retry_after': retry_after
                 }), 429
-
-            ip_requests[ip].append(current_time)
             return f(*args, **kwargs)
 
         wrapper.__name__ = f.__name__
@@ -78,6 +79,90 @@ def rate_limit(requests_limit=100, time_window=60):
     return decorator
 
 
+def conditional(validator):
+    """Декоратор условного GET с ETag и Last-Modified.
+
+    validator вызывается с аргументами маршрута и возвращает
+    ({'etag': ..., 'last_modified': ...}, status_code). Если клиент прислал
+    совпадающий If-None-Match (или If-Modified-Since не старше изменения),
+    ответ 304 отдается до вызова обработчика, т.е. без сериализации данных.
+    При last_modified=None (коллекции) Last-Modified не отдается и
+    If-Modified-Since не учитывается.
+    Сжатое тело, сохраненное в кеше для того же ETag, также отдается без
+    вызова обработчика.
+    """
+    def decorator(f):
+        def wrapper(*args, **kwargs):
+            data, status_code = validator(**kwargs)
+            if status_code == 404:
+                # Запись уже не найдена валидатором - обработчик не нужен
+                return jsonify(data), 404
+            if status_code != 200:
+                return f(*args, **kwargs)
+
+            etag = data['etag']
+            if request.query_string:
+                # Разные страницы/фильтры коллекции - разные представления
+                etag = hashlib.blake2b(
+                    etag.encode('utf-8') + b'?' + request.query_string,
+                    digest_size=12
+                ).hexdigest()
+            last_modified = None
+            if data['last_modified'] is not None:
+                last_modified = datetime.fromtimestamp(
+                    data['last_modified'], timezone.utc
+                ).replace(microsecond=0)
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                not_modified = bool(
+                    request.if_modified_since and last_modified
+                    and last_modified <= request.if_modified_since
+                )
+
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                # Сжатое тело этого представления могло остаться в кеше
+                response = cached_compressed_response(etag)
+                if response is None:
+                    response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            # Сжатое представление получает слабый ETag (см. compression)
+            response.set_etag(etag, weak=bool(response.content_encoding))
+            if last_modified is not None:
+                # Присваивание None Werkzeug заменяет текущим временем
+                response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            return response
+
+        wrapper.__name__ = f.__name__
+        wrapper.__doc__ = f.__doc__
+        return wrapper
+    return decorator
+
+
+def track_views(record):
+    """Декоратор учета просмотров записи.
+
+    record вызывается с аргументами маршрута после ответа 200 или 304,
+    т.е. просмотры учитываются и при повторной проверке по ETag.
+    """
+    def decorator(f):
+        def wrapper(*args, **kwargs):
+            response = make_response(f(*args, **kwargs))
+            if response.status_code in (200, 304):
+                record(**kwargs)
+            return response
+
+        wrapper.__name__ = f.__name__
+        wrapper.__doc__ = f.__doc__
+        return wrapper
+    return decorator
+
+
 def log_request(logger):
     """Декоратор для логирования запросов."""
     def decorator(f):
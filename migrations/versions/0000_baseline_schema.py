@@ -0,0 +1,66 @@
+"""baseline schema
+
+Схема, которую до появления миграций создавал db.create_all(): авторы,
+книги и отзывы без каскадного удаления. Для существующей базы:
+flask db stamp 0000 && flask db upgrade.
+
+Revision ID: 0000
+Revises:
+Create Date: 2026-10-17 20:48:14.938295
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0000'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'authors',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('birth_date', sa.Date(), nullable=True),
+        sa.Column('bio', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'books',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('isbn', sa.String(length=13), nullable=True),
+        sa.Column('publication_date', sa.Date(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('price', sa.Float(), nullable=True),
+        sa.Column('author_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['author_id'], ['authors.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('isbn')
+    )
+    op.create_table(
+        'reviews',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('rating', sa.Integer(), nullable=False),
+        sa.Column('comment', sa.Text(), nullable=True),
+        sa.Column('reviewer_name', sa.String(length=100), nullable=False),
+        sa.Column('book_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['book_id'], ['books.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('reviews')
+    op.drop_table('books')
+    op.drop_table('authors')
@@ -0,0 +1,92 @@
+"""rating stats and cascades
+
+Агрегаты оценок книг (book_rating_stats) заполняются по существующим
+отзывам, внешние ключи книг и отзывов получают ON DELETE CASCADE.
+
+Revision ID: 0001
+Revises: 0000
+Create Date: 2026-10-17 20:48:14.938295
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = '0000'
+branch_labels = None
+depends_on = None
+
+# Имена безымянных внешних ключей SQLite при пересоздании таблицы
+NAMING_CONVENTION = {
+    'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'
+}
+RATINGS = (1, 2, 3, 4, 5)
+
+
+def replace_foreign_key(table, column, referred, ondelete):
+    """Пересоздать внешний ключ table.column -> referred.id."""
+    name = next(
+        fk['name']
+        for fk in sa.inspect(op.get_bind()).get_foreign_keys(table)
+        if fk['constrained_columns'] == [column]
+    ) or f'fk_{table}_{column}_{referred}'
+    with op.batch_alter_table(
+            table, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(name, type_='foreignkey')
+        batch_op.create_foreign_key(
+            name, referred, [column], ['id'], ondelete=ondelete
+        )
+
+
+def upgrade():
+    replace_foreign_key('books', 'author_id', 'authors', 'CASCADE')
+    replace_foreign_key('reviews', 'book_id', 'books', 'CASCADE')
+    stats = op.create_table(
+        'book_rating_stats',
+        sa.Column('book_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('average', sa.Float(), nullable=True),
+        sa.Column('rating_1', sa.Integer(), nullable=False),
+        sa.Column('rating_2', sa.Integer(), nullable=False),
+        sa.Column('rating_3', sa.Integer(), nullable=False),
+        sa.Column('rating_4', sa.Integer(), nullable=False),
+        sa.Column('rating_5', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ['book_id'], ['books.id'], ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint('book_id')
+    )
+    op.create_index(
+        'ix_book_rating_stats_average', 'book_rating_stats', ['average']
+    )
+
+    reviews = sa.table(
+        'reviews', sa.column('book_id', sa.Integer),
+        sa.column('rating', sa.Integer)
+    )
+    total = sa.func.sum(reviews.c.rating)
+    op.execute(stats.insert().from_select(
+        ['book_id', 'count', 'total', 'average']
+        + [f'rating_{r}' for r in RATINGS] + ['updated_at'],
+        sa.select(
+            reviews.c.book_id, sa.func.count(), total,
+            sa.cast(total, sa.Float) / sa.func.count(),
+            *[
+                sa.func.sum(sa.case((reviews.c.rating == r, 1), else_=0))
+                for r in RATINGS
+            ],
+            sa.literal(datetime.utcnow(), sa.DateTime)
+        ).group_by(reviews.c.book_id)
+    ))
+
+
+def downgrade():
+    op.drop_index('ix_book_rating_stats_average', 'book_rating_stats')
+    op.drop_table('book_rating_stats')
+    replace_foreign_key('reviews', 'book_id', 'books', None)
+    replace_foreign_key('books', 'author_id', 'authors', None)
@@ -0,0 +1,38 @@
+"""indexes on hot filter columns
+
+Внешние ключи books.author_id и reviews.book_id, фильтры books.price и
+books.publication_date, отзывы книги по дате (book_id, created_at).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 20:52:03.114021
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_books_author_id', 'books', ['author_id'])
+    op.create_index('ix_books_price', 'books', ['price'])
+    op.create_index(
+        'ix_books_publication_date', 'books', ['publication_date']
+    )
+    op.create_index('ix_reviews_book_id', 'reviews', ['book_id'])
+    op.create_index(
+        'ix_reviews_book_id_created_at', 'reviews', ['book_id', 'created_at']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_reviews_book_id_created_at', 'reviews')
+    op.drop_index('ix_reviews_book_id', 'reviews')
+    op.drop_index('ix_books_publication_date', 'books')
+    op.drop_index('ix_books_price', 'books')
+    op.drop_index('ix_books_author_id', 'books')
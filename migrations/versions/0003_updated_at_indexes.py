@@ -0,0 +1,30 @@
+"""indexes on updated_at
+
+max(updated_at) в валидаторах условного GET для коллекций читается из
+индекса вместо полного сканирования таблицы.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 21:24:40.518302
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+TABLES = ('authors', 'books', 'reviews', 'book_rating_stats')
+
+
+def upgrade():
+    for table in TABLES:
+        op.create_index(f'ix_{table}_updated_at', table, ['updated_at'])
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_index(f'ix_{table}_updated_at', table)
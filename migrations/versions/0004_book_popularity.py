@@ -0,0 +1,40 @@
+"""book popularity
+
+Сохраненные оценки популярности книг (Count-Min Sketch + top-k в памяти
+воркеров, периодический сброс в БД).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 22:05:12.114820
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'book_popularity',
+        sa.Column('book_id', sa.Integer(), nullable=False),
+        sa.Column('log_score', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ['book_id'], ['books.id'], ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint('book_id')
+    )
+    op.create_index(
+        'ix_book_popularity_log_score', 'book_popularity', ['log_score']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_book_popularity_log_score', 'book_popularity')
+    op.drop_table('book_popularity')
@@ -1,15 +1,13 @@
 #!/usr/bin/env python
 import os
-from dotenv import load_dotenv
+# Переменные окружения из .env загружает app.config при импорте
 from app import create_app, init_additional_databases
 
-# Загрузка переменных окружения
-load_dotenv()
-
 # Получение конфигурации из переменной окружения
 config_name = os.environ.get('FLASK_CONFIG') or 'default'
 
-# Создание приложения
+# Создание приложения; с gunicorn --preload выполняется один раз в
+# мастере до fork воркеров
 app = create_app(config_name)
 
 # Инициализация дополнительных баз данных
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Задержка GET /api/books с фильтрами и сортировкой на большом каталоге:
+p50/p95/p99 для типовых сочетаний параметров (кеш чтений отключен)
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app  # noqa: E402
+from app.models import db, Author, Book  # noqa: E402
+
+QUERIES = {
+    'автор + цена, по цене': 'author_id={author}&price_max={price}'
+                             '&sort=price',
+    'автор + дата, новые': 'author_id={author}&published_after={date}'
+                           '&sort=publication_date&order=desc',
+    'диапазон цен, по цене': 'price_min={price}&price_max={price_hi}'
+                             '&sort=price',
+    'после даты, по дате': 'published_after={date}&sort=publication_date',
+    'все, по цене (убыв.)': 'sort=price&order=desc',
+}
+
+
+def seed(count, authors, batch=50000):
+    """count книг у authors авторов со случайными ценой и датой."""
+    now = datetime.utcnow()
+    db.session.execute(db.insert(Author), [
+        {'name': f'Автор {i}', 'created_at': now, 'updated_at': now}
+        for i in range(authors)
+    ])
+    first_author = db.session.scalar(db.select(db.func.min(Author.id)))
+    start = date(1950, 1, 1)
+    for offset in range(0, count, batch):
+        db.session.execute(db.insert(Book), [
+            {
+                'title': f'Книга {i}',
+                'author_id': first_author + random.randrange(authors),
+                'price': (None if random.random() < 0.05
+                          else round(random.uniform(100, 10000), 2)),
+                'publication_date': (
+                    start + timedelta(days=random.randrange(27000))),
+                'created_at': now, 'updated_at': now
+            }
+            for i in range(offset, min(offset + batch, count))
+        ])
+    db.session.commit()
+    return first_author
+
+
+def random_args(first_author, authors):
+    price = random.randint(100, 9000)
+    return {
+        'author': first_author + random.randrange(authors),
+        'price': price,
+        'price_hi': price + 500,
+        'date': (date(1950, 1, 1) + timedelta(
+            days=random.randrange(27000))).isoformat()
+    }
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=1000000,
+                        help='Число книг в каталоге')
+    parser.add_argument('--authors', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=500,
+                        help='Число запросов на каждый вид выборки')
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--pages', type=int, default=3,
+                        help='Глубина обхода страниц по курсору')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    app.extensions['cache'] = None
+    client = app.test_client()
+    with app.app_context():
+        started = time.perf_counter()
+        first_author = seed(args.books, args.authors)
+        print(f'Каталог: {args.books} книг, {args.authors} авторов '
+              f'(заполнение {time.perf_counter() - started:.1f} с)')
+
+    print(f"{'Выборка':<26}{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}")
+    for name, template in QUERIES.items():
+        samples = []
+        for _ in range(args.requests):
+            query = template.format(**random_args(first_author, args.authors))
+            url = f'/api/books?{query}&limit={args.limit}'
+            for _ in range(args.pages):
+                start = time.perf_counter()
+                response = client.get(url)
+                samples.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.data
+                cursor = response.headers.get('X-Next-Cursor')
+                if cursor is None:
+                    break
+                url = f'/api/books?{query}&limit={args.limit}&after={cursor}'
+        print(f'{name:<26}{percentile(samples, 0.5):>10.2f}'
+              f'{percentile(samples, 0.95):>10.2f}'
+              f'{percentile(samples, 0.99):>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Сравнение пропускной способности создания книг:
+поэлементный POST /api/books против массового POST /api/books/bulk
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app  # noqa: E402
+
+
+def make_books(count, offset):
+    return [
+        {
+            'title': f'Книга {offset + i}',
+            'isbn': f'{offset + i:013d}',
+            'author_id': 1 + i % 4,
+            'price': 1000 + i % 500,
+            'publication_date': '2020-01-01',
+            'description': 'Описание книги для нагрузочного теста'
+        }
+        for i in range(count)
+    ]
+
+
+def bench_single(client, books):
+    start = time.perf_counter()
+    for book in books:
+        response = client.post(
+            '/api/books', data=json.dumps(book),
+            content_type='application/json'
+        )
+        assert response.status_code == 201, response.data
+    return time.perf_counter() - start
+
+
+def bench_bulk(client, books, batch_size):
+    start = time.perf_counter()
+    for i in range(0, len(books), batch_size):
+        response = client.post(
+            '/api/books/bulk', data=json.dumps(books[i:i + batch_size]),
+            content_type='application/json'
+        )
+        assert response.status_code == 201, response.data
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=2000,
+                        help='Число создаваемых книг')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Размер пачки для /api/books/bulk')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    app.config['BULK_MAX_ITEMS'] = max(args.batch_size, 1)
+    client = app.test_client()
+
+    single = bench_single(client, make_books(args.count, 10 ** 6))
+    bulk = bench_bulk(
+        client, make_books(args.count, 2 * 10 ** 6), args.batch_size
+    )
+
+    print(f"{'Способ':<24}{'Время, с':>12}{'Книг/с':>12}")
+    print(f"{'POST /api/books':<24}{single:>12.3f}"
+          f"{args.count / single:>12.0f}")
+    print(f"{'POST /api/books/bulk':<24}{bulk:>12.3f}"
+          f"{args.count / bulk:>12.0f}")
+    print(f"Ускорение: x{single / bulk:.1f}")
+
+
+if __name__ == '__main__':
+    main()
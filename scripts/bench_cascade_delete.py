@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Сравнение удаления автора с большим числом книг и отзывов:
+каскад ORM (загрузка всех книг и отзывов в сессию и удаление по одной
+строке) против одного DELETE с ON DELETE CASCADE на уровне СУБД
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app  # noqa: E402
+from app.models import db, Author, Book, Review  # noqa: E402
+from app.services import AuthorService  # noqa: E402
+
+
+def seed_author(books, reviews):
+    """Автор с books книгами и reviews отзывами на каждую."""
+    now = datetime.utcnow()
+    author = Author(name='Плодовитый автор')
+    db.session.add(author)
+    db.session.flush()
+    first = db.session.scalar(db.select(db.func.max(Book.id))) or 0
+    db.session.execute(db.insert(Book), [
+        {'title': f'Книга {i}', 'author_id': author.id,
+         'created_at': now, 'updated_at': now}
+        for i in range(books)
+    ])
+    db.session.execute(db.insert(Review), [
+        {'rating': 1 + j % 5, 'reviewer_name': 'Читатель',
+         'book_id': first + 1 + i, 'created_at': now, 'updated_at': now}
+        for i in range(books) for j in range(reviews)
+    ])
+    db.session.commit()
+    return author.id
+
+
+def delete_orm(author_id):
+    """Прежний способ: каскад ORM с загрузкой зависимых объектов."""
+    author = db.session.get(Author, author_id)
+    for book in author.books:
+        book.reviews
+    db.session.delete(author)
+    db.session.commit()
+
+
+def delete_cascade(author_id):
+    """Один DELETE, зависимые строки удаляет СУБД."""
+    data, status_code = AuthorService.delete_author(author_id)
+    assert status_code == 200, data
+
+
+def measure(app, delete, books, reviews):
+    with app.app_context():
+        author_id = seed_author(books, reviews)
+        db.session.remove()
+        tracemalloc.start()
+        start = time.perf_counter()
+        delete(author_id)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        left = db.session.scalar(
+            db.select(db.func.count()).select_from(Review)
+            .join(Book).where(Book.author_id == author_id)
+        )
+        assert left == 0, left
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=200,
+                        help='Число книг автора')
+    parser.add_argument('--reviews', type=int, default=50,
+                        help='Число отзывов на книгу')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    app.extensions['cache'] = None
+
+    print(f'Автор: {args.books} книг, {args.books * args.reviews} отзывов')
+    print(f"{'Способ':<24}{'Время, с':>12}{'Пик памяти, МБ':>18}")
+    results = {}
+    for name, delete in (('ORM cascade', delete_orm),
+                         ('ON DELETE CASCADE', delete_cascade)):
+        elapsed, peak = measure(app, delete, args.books, args.reviews)
+        results[name] = elapsed
+        print(f'{name:<24}{elapsed:>12.3f}{peak / 2 ** 20:>18.1f}')
+    print(f"Ускорение: x"
+          f"{results['ORM cascade'] / results['ON DELETE CASCADE']:.1f}")
+
+
+if __name__ == '__main__':
+    main()
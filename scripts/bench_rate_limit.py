@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк ограничителя частоты запросов: стоимость одной проверки
+и число хранимых ключей при 10k, 100k и 1M различных IP для прежней
+реализации (список меток времени на IP) и скользящего окна со счетчиками
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.ratelimit import SlidingWindowLimiter  # noqa: E402
+
+
+class LegacyLimiter:
+    """Прежний алгоритм utils.rate_limit без привязки к Flask."""
+
+    def __init__(self, requests_limit, time_window):
+        self.requests_limit = requests_limit
+        self.time_window = time_window
+        self.ip_requests = {}
+
+    def hit(self, ip):
+        current_time = datetime.utcnow()
+        if ip not in self.ip_requests:
+            self.ip_requests[ip] = []
+        cutoff_time = current_time - timedelta(seconds=self.time_window)
+        self.ip_requests[ip] = [t for t in self.ip_requests[ip]
+                                if t >= cutoff_time]
+        if len(self.ip_requests[ip]) >= self.requests_limit:
+            return False, self.time_window
+        self.ip_requests[ip].append(current_time)
+        return True, 0
+
+    def __len__(self):
+        return len(self.ip_requests)
+
+
+def make_ips(count):
+    return [f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}'
+            for i in range(count)]
+
+
+def bench(limiter, ips, checks):
+    # Прогрев: каждый IP делает хотя бы один запрос
+    for ip in ips:
+        limiter.hit(ip)
+    sample = [random.choice(ips) for _ in range(checks)]
+    start = time.perf_counter()
+    for ip in sample:
+        limiter.hit(ip)
+    return (time.perf_counter() - start) / checks * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='Числа различных IP через запятую')
+    parser.add_argument('--checks', type=int, default=200000,
+                        help='Число замеряемых проверок')
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--max-keys', type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'IP':>10}{'Реализация':>14}{'нс/проверку':>14}{'Ключей':>10}")
+    for size in map(int, args.sizes.split(',')):
+        ips = make_ips(size)
+        limiters = [
+            ('legacy', LegacyLimiter(args.limit, 60)),
+            ('sliding', SlidingWindowLimiter(
+                args.limit, 60, max_keys=args.max_keys)),
+        ]
+        for name, limiter in limiters:
+            cost = bench(limiter, ips, args.checks)
+            print(f'{size:>10}{name:>14}{cost:>14.0f}{len(limiter):>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Пропускная способность сериализации (строк/с) для движков orm и fast:
+обход GET /api/books страницами по курсору и потоковая выгрузка
+/api/export/books (кеш чтений отключен)
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app  # noqa: E402
+from app.models import db, Author, Book  # noqa: E402
+from app.serialization import FastJSONProvider  # noqa: E402
+
+ENGINES = ('orm', 'fast')
+
+
+def seed(count, authors, batch=50000):
+    """count книг у authors авторов со случайными ценой и датой."""
+    now = datetime.utcnow()
+    db.session.execute(db.insert(Author), [
+        {'name': f'Автор {i}', 'created_at': now, 'updated_at': now}
+        for i in range(authors)
+    ])
+    first_author = db.session.scalar(db.select(db.func.min(Author.id)))
+    start = date(1950, 1, 1)
+    for offset in range(0, count, batch):
+        db.session.execute(db.insert(Book), [
+            {
+                'title': f'Книга {i}',
+                'isbn': f'978{i:010d}',
+                'description': 'Описание книги ' * 4,
+                'author_id': first_author + random.randrange(authors),
+                'price': round(random.uniform(100, 10000), 2),
+                'publication_date': (
+                    start + timedelta(days=random.randrange(27000))),
+                'created_at': now, 'updated_at': now
+            }
+            for i in range(offset, min(offset + batch, count))
+        ])
+    db.session.commit()
+
+
+def use_engine(app, engine):
+    app.config['SERIALIZATION_ENGINE'] = engine
+    app.json = FastJSONProvider(app)
+
+
+def walk_pages(client, query, limit):
+    """Обход всех страниц; возвращает число полученных строк."""
+    rows = 0
+    url = f'/api/books?{query}limit={limit}'
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.data
+        rows += len(response.get_json())
+        cursor = response.headers.get('X-Next-Cursor')
+        url = cursor and f'/api/books?{query}limit={limit}&after={cursor}'
+    return rows
+
+
+def export(client):
+    response = client.get('/api/export/books')
+    assert response.status_code == 200, response.data
+    return response.data.count(b'\n')
+
+
+def measure(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return rows / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=100000,
+                        help='Число книг в каталоге')
+    parser.add_argument('--authors', type=int, default=1000)
+    parser.add_argument('--limit', type=int, default=500,
+                        help='Размер страницы списка')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Число повторов (берется лучший результат)')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    app.extensions['cache'] = None
+    client = app.test_client()
+    with app.app_context():
+        seed(args.books, args.authors)
+
+    cases = {
+        'список по id': lambda: walk_pages(client, '', args.limit),
+        'список по цене': lambda: walk_pages(client, 'sort=price&',
+                                             args.limit),
+        'список, 2 поля': lambda: walk_pages(client, 'fields=title,price&',
+                                             args.limit),
+        'выгрузка NDJSON': lambda: export(client),
+    }
+    print(f'Каталог: {args.books} книг, страница {args.limit}')
+    print(f"{'Сценарий':<18}"
+          + ''.join(f'{e + ", стр/с":>14}' for e in ENGINES) + f"{'x':>7}")
+    for name, fn in cases.items():
+        rates = []
+        for engine in ENGINES:
+            use_engine(app, engine)
+            rates.append(measure(fn, args.repeat))
+        print(f'{name:<18}' + ''.join(f'{r:>14.0f}' for r in rates)
+              + f'{rates[-1] / rates[0]:>7.1f}')
+
+
+if __name__ == '__main__':
+    main()
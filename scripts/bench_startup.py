@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Время запуска: импорт пакета app (python -X importtime) и время от старта
+процесса сервера до первого ответа 200 на /api/health (run.py и, если
+установлен, gunicorn с --preload и без него). С --json результаты
+выводятся одной строкой JSON для сравнения между релизами.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def import_times(top):
+    """Общее время импорта app и самые медленные модули (мс)."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=ROOT, env=server_env(), capture_output=True, text=True,
+        check=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append(
+            (name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000)
+        )
+    total = next(cum for name, _, cum in modules if name == 'app')
+    slowest = sorted(modules, key=lambda m: m[2], reverse=True)
+    # Модули верхнего уровня, импортируемые пакетом app
+    slowest = [m for m in slowest if '.' not in m[0] and m[0] != 'app'][:top]
+    return total, slowest
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_env(**extra):
+    env = dict(os.environ, FLASK_CONFIG='production', **extra)
+    # Внешние базы не подключаются, чтобы мерить только запуск
+    env.update(POSTGRES_URI='', MYSQL_URI='')
+    return env
+
+
+def time_to_first_200(command, port, timeout):
+    """Секунды от запуска command до ответа 200 на /api/health."""
+    url = f'http://127.0.0.1:{port}/api/health'
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        command, cwd=ROOT, env=server_env(PORT=str(port)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f'Сервер завершился: {command}')
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise RuntimeError(f'Нет ответа 200 за {timeout} с: {command}')
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def servers(workers):
+    """Команды запуска сервера: (название, функция port -> команда)."""
+    yield 'run.py', lambda port: [sys.executable, 'run.py']
+    gunicorn = shutil.which('gunicorn')
+    if gunicorn is None:
+        return
+    for preload in (False, True):
+        name = f'gunicorn -w {workers}' + (' --preload' if preload else '')
+        yield name, lambda port, preload=preload: [
+            gunicorn, '-b', f'127.0.0.1:{port}', '-w', str(workers),
+            *(['--preload'] if preload else []), 'run:app'
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Число повторов (берется медиана)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Число воркеров gunicorn')
+    parser.add_argument('--top', type=int, default=10,
+                        help='Число самых медленных импортов в отчете')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--json', action='store_true',
+                        help='Вывести результаты в JSON')
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.repeat):
+        total, slowest = import_times(args.top)
+        totals.append(total)
+    results = {
+        'import_ms': round(statistics.median(totals), 1),
+        'slowest_imports_ms': {
+            name: round(cumulative, 1) for name, _, cumulative in slowest
+        },
+        'first_200_ms': {}
+    }
+    for name, command in servers(args.workers):
+        samples = [
+            time_to_first_200(command(port), port, args.timeout)
+            for port in (free_port() for _ in range(args.repeat))
+        ]
+        results['first_200_ms'][name] = round(
+            statistics.median(samples) * 1000, 1
+        )
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False))
+        return
+    print(f"Импорт app: {results['import_ms']:.1f} мс "
+          f'(медиана из {args.repeat})')
+    for name, ms in results['slowest_imports_ms'].items():
+        print(f'  {name:<30}{ms:>10.1f} мс')
+    print('Первый ответ 200 на /api/health:')
+    for name, ms in results['first_200_ms'].items():
+        print(f'  {name:<30}{ms:>10.1f} мс')
+
+
+if __name__ == '__main__':
+    main()
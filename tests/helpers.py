@@ -0,0 +1,10 @@
+from unittest import mock
+from app import create_app
+from app.config import config, TestingConfig
+
+
+def create_test_app(**options):
+    """Приложение с конфигурацией TestingConfig, дополненной options."""
+    test_config = type('CustomTestConfig', (TestingConfig,), options)
+    with mock.patch.dict(config, {'custom': test_config}):
+        return create_app('custom')
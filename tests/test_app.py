@@ -151,5 +151,574 @@ class AppTestCase(unittest.TestCase):
         searches = memory_data['recent_searches']
         self.assertTrue(any(s['query'] == 'тестовый поиск' for s in searches))
 
+    def test_books_keyset_pagination(self):
+        """Тест keyset-пагинации списка книг через limit/after."""
+        response = self.client.get('/api/books?limit=2')
+        self.assertEqual(response.status_code, 200)
+        first_page = json.loads(response.data)
+        self.assertEqual([b['id'] for b in first_page], [1, 2])
+        self.assertEqual(response.headers['X-Next-Cursor'], '2')
+        self.assertIn('after=2', response.headers['Link'])
+
+        response = self.client.get('/api/books?limit=2&after=2')
+        second_page = json.loads(response.data)
+        self.assertEqual([b['id'] for b in second_page], [3, 4])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def collect_books(self, query):
+        """Обход всех страниц /api/books по заголовку X-Next-Cursor."""
+        books, after = [], None
+        while True:
+            url = f'/api/books?{query}&limit=2'
+            if after is not None:
+                url += f'&after={after}'
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+            books.extend(json.loads(response.data))
+            after = response.headers.get('X-Next-Cursor')
+            if after is None:
+                return books
+
+    def test_books_filters(self):
+        """Тест фильтрации книг по автору, цене и дате публикации."""
+        for title, price, published in (('Дешевая', 100, '2001-05-01'),
+                                        ('Новая', 2000, '2021-03-01')):
+            self.client.post('/api/books', data=json.dumps({
+                'title': title, 'author_id': 2, 'price': price,
+                'publication_date': published
+            }), content_type='application/json')
+
+        books = self.collect_books('author_id=2')
+        self.assertTrue(all(b['author_id'] == 2 for b in books))
+        books = self.collect_books('author_id=2&price_max=2000&price_min=200')
+        self.assertEqual([b['title'] for b in books], ['Новая'])
+        books = self.collect_books('published_after=2001-05-01')
+        self.assertEqual([b['title'] for b in books], ['Новая'])
+        books = self.collect_books('published_before=2021-01-01')
+        self.assertEqual([b['title'] for b in books], ['Дешевая'])
+
+    def test_books_sorting_with_cursor(self):
+        """Тест сортировки книг с обходом страниц и пустыми значениями."""
+        for title, price in (('Без цены 1', None), ('Без цены 2', None),
+                             ('Та же цена', 3500)):
+            self.client.post('/api/books', data=json.dumps({
+                'title': title, 'author_id': 1, 'price': price
+            }), content_type='application/json')
+        all_books = json.loads(self.client.get('/api/books').data)
+
+        def key(book):
+            return (book['price'] is not None, book['price'] or 0, book['id'])
+
+        ascending = self.collect_books('sort=price')
+        self.assertEqual(ascending, sorted(all_books, key=key))
+        descending = self.collect_books('sort=price&order=desc')
+        self.assertEqual(descending, sorted(all_books, key=key, reverse=True))
+        by_id = self.collect_books('sort=id&order=desc')
+        self.assertEqual([b['id'] for b in by_id],
+                         sorted((b['id'] for b in all_books), reverse=True))
+
+    def test_books_query_validation(self):
+        """Тест отклонения неизвестной сортировки и некорректных значений."""
+        for query in ('sort=title', 'order=up', 'price_min=abc',
+                      'price_max=inf', 'published_after=2020-13-01',
+                      'author_id=x', 'sort=price&after=not-a-cursor',
+                      'after=abc'):
+            response = self.client.get(f'/api/books?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_books_sparse_fields(self):
+        """Тест выбора полей книги параметром fields."""
+        full = self.client.get('/api/books')
+        sparse = self.client.get('/api/books?fields=title,price')
+        self.assertEqual(sparse.status_code, 200)
+        books = json.loads(sparse.data)
+        self.assertEqual(set(books[0]), {'id', 'title', 'price'})
+        self.assertLess(len(sparse.data) * 4, len(full.data))
+        self.assertNotEqual(sparse.headers['ETag'], full.headers['ETag'])
+
+        book = json.loads(
+            self.client.get('/api/books/1?fields=rating').data)
+        self.assertEqual(set(book), {'id', 'rating'})
+        data = json.loads(
+            self.client.get('/api/books?ids=2,1&fields=isbn').data)
+        self.assertEqual([set(b) for b in data['items']],
+                         [{'id', 'isbn'}, {'id', 'isbn'}])
+
+    def test_books_include_related(self):
+        """Тест встраивания автора и отзывов параметром include."""
+        books = json.loads(self.client.get(
+            '/api/books?include=author,reviews&fields=title').data)
+        first = books[0]
+        self.assertEqual(first['author']['id'], 1)
+        self.assertEqual([r['book_id'] for r in first['reviews']], [1])
+        book = json.loads(
+            self.client.get('/api/books/1?include=author').data)
+        self.assertEqual(book['author']['name'], 'Роберт Мартин')
+        self.assertNotIn('reviews', book)
+
+    def test_books_include_changes_etag(self):
+        """Тест изменения ETag при изменении встроенного автора."""
+        url = '/api/books/1?include=author'
+        etag = self.client.get(url).headers['ETag']
+        self.client.put('/api/authors/1', data=json.dumps(
+            {'name': 'Дядюшка Боб'}), content_type='application/json')
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.data)['author']['name'], 'Дядюшка Боб')
+
+    def test_books_view_validation(self):
+        """Тест отклонения неизвестных полей и связей."""
+        for url in ('/api/books?fields=title,secret',
+                    '/api/books?include=publisher',
+                    '/api/books/1?fields=password'):
+            self.assertEqual(self.client.get(url).status_code, 400, url)
+
+    def test_pagination_limit_is_capped(self):
+        """Тест ограничения размера страницы серверным максимумом."""
+        self.app.config['PAGE_SIZE_MAX'] = 1
+        response = self.client.get('/api/authors?limit=1000')
+        data = json.loads(response.data)
+        self.assertEqual(len(data), 1)
+        self.assertEqual(response.headers['X-Next-Cursor'], '1')
+
+    def test_pagination_link_keeps_path_args(self):
+        """Тест ссылки на следующую страницу при совпадении имен параметров."""
+        self.client.post('/api/reviews', json={
+            'book_id': 1, 'reviewer_name': 'Читатель', 'rating': 4
+        })
+        response = self.client.get('/api/books/1/reviews?limit=1&book_id=7')
+        self.assertEqual(response.status_code, 200)
+        link = response.headers['Link']
+        self.assertIn('/api/books/1/reviews?', link)
+        self.assertNotIn('book_id=7', link)
+
+    def test_pagination_invalid_args(self):
+        """Тест отклонения некорректных параметров пагинации."""
+        response = self.client.get('/api/reviews?limit=abc')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/reviews?limit=0')
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_ndjson(self):
+        """Тест потоковой выгрузки книг в формате NDJSON."""
+        response = self.client.get('/api/export/books')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.get_data(as_text=True).splitlines()
+        books = [json.loads(line) for line in lines]
+        self.assertEqual([b['id'] for b in books], [1, 2, 3, 4])
+
+        response = self.client.get('/api/export/books?after=3')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [4])
+
+    def test_export_unknown_entity(self):
+        """Тест выгрузки несуществующей сущности."""
+        response = self.client.get('/api/export/users')
+        self.assertEqual(response.status_code, 404)
+
+    def test_read_cache_hits_and_invalidation(self):
+        """Тест попаданий в кеш чтений и его инвалидации при изменении."""
+        self.client.get('/api/books/1')
+        self.client.get('/api/books/1')
+        stats = json.loads(self.client.get('/api/stats').data)['cache']
+        # Кешируются и данные книги, и ее валидатор условного GET
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 2)
+
+        self.client.put(
+            '/api/books/1',
+            data=json.dumps({'title': 'Чистый код (2-е изд.)'}),
+            content_type='application/json'
+        )
+        response = self.client.get('/api/books/1')
+        data = json.loads(response.data)
+        self.assertEqual(data['title'], 'Чистый код (2-е изд.)')
+
+    def test_conditional_get_item(self):
+        """Тест ответа 304 по If-None-Match и смены ETag после изменения."""
+        response = self.client.get('/api/books/1')
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        self.assertIsNotNone(response.headers.get('Last-Modified'))
+
+        response = self.client.get(
+            '/api/books/1', headers={'If-None-Match': etag}
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+        self.client.put(
+            '/api/books/1',
+            data=json.dumps({'price': 3700}),
+            content_type='application/json'
+        )
+        response = self.client.get(
+            '/api/books/1', headers={'If-None-Match': etag}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_conditional_get_collection(self):
+        """Тест ETag для коллекций."""
+        response = self.client.get('/api/authors')
+        etag = response.headers['ETag']
+        page = self.client.get('/api/authors?limit=1')
+        self.assertNotEqual(page.headers['ETag'], etag)
+
+        response = self.client.get(
+            '/api/authors', headers={'If-None-Match': etag}
+        )
+        self.assertEqual(response.status_code, 304)
+
+        self.client.post(
+            '/api/authors',
+            data=json.dumps({'name': 'Новый Автор'}),
+            content_type='application/json'
+        )
+        response = self.client.get(
+            '/api/authors', headers={'If-None-Match': etag}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_get_collection_after_delete(self):
+        """Тест повторной проверки коллекции после удаления строки."""
+        item = self.client.get('/api/books/1')
+        for url in ('/api/books', '/api/reviews', '/api/books/1/reviews',
+                    '/api/books?include=author'):
+            response = self.client.get(url)
+            self.assertIsNone(response.headers.get('Last-Modified'), url)
+        self.client.delete('/api/books/2')
+        for url in ('/api/books', '/api/reviews'):
+            response = self.client.get(url, headers={
+                'If-Modified-Since': item.headers['Last-Modified']
+            })
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNotIn(2, [row.get('book_id', row['id'])
+                                 for row in response.get_json()])
+
+    def test_bulk_create_books(self):
+        """Тест массового создания книг с поэлементными ошибками."""
+        books = [
+            {'title': 'Книга 1', 'author_id': 1, 'isbn': '1111111111111'},
+            {'title': 'Книга 2', 'author_id': 999},
+            {'title': 'Книга 3', 'author_id': 2, 'isbn': '9780132350884'},
+            {'author_id': 2},
+            {'title': 'Книга 5', 'author_id': 2,
+             'publication_date': '2020-01-31'},
+        ]
+        response = self.client.post(
+            '/api/books/bulk',
+            data=json.dumps(books),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        data = json.loads(response.data)
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(len(data['created']), 2)
+        self.assertEqual([e['index'] for e in data['errors']], [1, 2, 3])
+
+        book = json.loads(
+            self.client.get(f"/api/books/{data['created'][1]}").data
+        )
+        self.assertEqual(book['publication_date'], '2020-01-31')
+
+    def test_bulk_update_and_delete_reviews(self):
+        """Тест массового обновления и удаления отзывов."""
+        response = self.client.put(
+            '/api/reviews/bulk',
+            data=json.dumps([{'id': 1, 'rating': 3}, {'id': 999,
+                                                      'rating': 4}]),
+            content_type='application/json'
+        )
+        data = json.loads(response.data)
+        self.assertEqual(data['updated'], [1])
+        self.assertEqual(data['errors'][0]['id'], 999)
+        review = json.loads(self.client.get('/api/reviews/1').data)
+        self.assertEqual(review['rating'], 3)
+
+        response = self.client.delete(
+            '/api/reviews/bulk',
+            data=json.dumps([1, 2]),
+            content_type='application/json'
+        )
+        self.assertEqual(json.loads(response.data)['deleted'], [1, 2])
+        self.assertEqual(self.client.get('/api/reviews/1').status_code, 404)
+
+    def test_bulk_delete_authors_cascades(self):
+        """Тест массового удаления авторов вместе с книгами и отзывами."""
+        response = self.client.delete(
+            '/api/authors/bulk',
+            data=json.dumps([1]),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/books/1').status_code, 404)
+        self.assertEqual(self.client.get('/api/reviews/1').status_code, 404)
+
+    def test_bulk_rejects_non_scalar_values(self):
+        """Тест поэлементных ошибок для списков и объектов в полях."""
+        response = self.client.post(
+            '/api/books/bulk',
+            data=json.dumps([
+                {'title': 'Книга', 'author_id': 1, 'isbn': ['x']},
+                {'title': {'ru': 'Книга'}, 'author_id': 1},
+                {'title': 'Книга', 'author_id': 1, 'price': '100'},
+                {'title': 'Целая книга', 'author_id': 1},
+            ]),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        data = json.loads(response.data)
+        self.assertEqual(data['count'], 1)
+        self.assertEqual([e['index'] for e in data['errors']], [0, 1, 2])
+
+        response = self.client.delete(
+            '/api/books/bulk',
+            data=json.dumps([[1], {'id': 2}, True]),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        data = json.loads(response.data)
+        self.assertEqual([e['index'] for e in data['errors']], [0, 1, 2])
+        self.assertEqual(self.client.get('/api/books/1').status_code, 200)
+
+        response = self.client.put(
+            '/api/reviews/bulk',
+            data=json.dumps([{'id': 1, 'comment': ['спам']}]),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_boolean_ids_and_ratings_rejected(self):
+        """Тест отклонения true вместо id и оценки."""
+        response = self.client.post('/api/books', json={
+            'title': 'Книга', 'author_id': True
+        })
+        self.assertEqual(response.status_code, 404)
+        response = self.client.put('/api/books/1', json={'author_id': True})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post('/api/reviews', json={
+            'book_id': True, 'rating': 5, 'reviewer_name': 'Читатель'
+        })
+        self.assertEqual(response.status_code, 404)
+
+        before = self.client.get('/api/books/1').get_json()['rating']
+        response = self.client.post('/api/reviews/bulk', json=[
+            {'book_id': 1, 'rating': True, 'reviewer_name': 'Читатель'},
+            {'book_id': 1, 'rating': 4.5, 'reviewer_name': 'Читатель'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [e['index'] for e in response.get_json()['errors']], [0, 1]
+        )
+        self.assertEqual(
+            self.client.get('/api/books/1').get_json()['rating'], before
+        )
+
+    def test_delete_author_cascades_in_database(self):
+        """Тест каскадного удаления книг, отзывов и агрегатов автора."""
+        from app.models import Book, BookRatingStats, Review
+        book_ids = db.session.scalars(
+            db.select(Book.id).where(Book.author_id == 1)
+        ).all()
+        self.assertTrue(book_ids)
+        response = self.client.delete('/api/authors/1')
+        self.assertEqual(response.status_code, 200)
+        for model, column in ((Book, Book.id), (Review, Review.book_id),
+                              (BookRatingStats, BookRatingStats.book_id)):
+            count = db.session.scalar(
+                db.select(db.func.count()).select_from(model)
+                .where(column.in_(book_ids))
+            )
+            self.assertEqual(count, 0, model.__tablename__)
+        self.assertEqual(self.client.get('/api/authors/1').status_code, 404)
+        self.assertEqual(self.client.delete('/api/authors/1').status_code, 404)
+
+    def test_bulk_rejects_invalid_payload(self):
+        """Тест отклонения пустого и слишком большого массива."""
+        response = self.client.post(
+            '/api/authors/bulk',
+            data=json.dumps({'name': 'не массив'}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.app.config['BULK_MAX_ITEMS'] = 1
+        response = self.client.post(
+            '/api/authors/bulk',
+            data=json.dumps([{'name': 'А'}, {'name': 'Б'}]),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_fetch_by_ids(self):
+        """Тест пакетной выборки книг по списку id с сохранением порядка."""
+        response = self.client.get('/api/books?ids=3,1,42,3')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual([b['id'] for b in data['items']], [3, 1])
+        self.assertEqual(data['missing'], [42])
+
+    def test_batch_fetch_limits(self):
+        """Тест ограничения размера пакета и проверки формата ids."""
+        self.app.config['BATCH_MAX_IDS'] = 2
+        response = self.client.get('/api/authors?ids=1,2,3')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/reviews?ids=1,x')
+        self.assertEqual(response.status_code, 400)
+
+    def test_search(self):
+        """Тест полнотекстового поиска и синхронизации индекса."""
+        response = self.client.get('/api/search?q=Fluent')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['items'][0]['type'], 'book')
+        self.assertEqual(data['items'][0]['item']['title'], 'Fluent Python')
+
+        self.client.put(
+            '/api/authors/1',
+            data=json.dumps({'bio': 'Автор принципов SOLID'}),
+            content_type='application/json'
+        )
+        data = json.loads(self.client.get('/api/search?q=solid').data)
+        self.assertEqual(
+            [(i['type'], i['item']['id']) for i in data['items']],
+            [('author', 1)]
+        )
+
+        memory = json.loads(
+            self.client.get('/api/memory/recent_searches').data
+        )
+        queries = [s['query'] for s in memory['recent_searches']]
+        self.assertIn('solid', queries)
+
+    def test_search_pagination_and_validation(self):
+        """Тест постраничной выдачи поиска и пустого запроса."""
+        data = json.loads(self.client.get('/api/search?q=python&limit=1').data)
+        self.assertEqual(len(data['items']), 1)
+        self.assertEqual(data['next'], 1)
+        response = self.client.get('/api/search?q=%20')
+        self.assertEqual(response.status_code, 400)
+
+    def _post_review(self, book_id, rating):
+        return self.client.post(
+            '/api/reviews',
+            data=json.dumps({'book_id': book_id, 'rating': rating,
+                             'reviewer_name': 'Читатель'}),
+            content_type='application/json'
+        )
+
+    def test_rating_stats_incremental(self):
+        """Тест инкрементального обновления рейтинга книги."""
+        review_id = json.loads(self._post_review(4, 2).data)['id']
+        self._post_review(4, 4)
+        rating = json.loads(self.client.get('/api/books/4').data)['rating']
+        self.assertEqual(rating['count'], 2)
+        self.assertEqual(rating['average'], 3.0)
+        self.assertEqual(rating['histogram']['2'], 1)
+
+        self.client.put(
+            f'/api/reviews/{review_id}',
+            data=json.dumps({'rating': 5}),
+            content_type='application/json'
+        )
+        rating = json.loads(self.client.get('/api/books/4').data)['rating']
+        self.assertEqual(rating['average'], 4.5)
+        self.assertEqual(rating['histogram']['2'], 0)
+
+        self.client.delete(f'/api/reviews/{review_id}')
+        rating = json.loads(self.client.get('/api/books/4').data)['rating']
+        self.assertEqual(rating['count'], 1)
+        self.assertEqual(rating['average'], 4.0)
+
+    def test_rating_must_be_integer(self):
+        """Тест отклонения дробных и логических оценок."""
+        review_id = json.loads(self._post_review(4, 4).data)['id']
+        before = json.loads(self.client.get('/api/books/4').data)['rating']
+        for rating in (4.5, True, '5', 0, 6):
+            response = self._post_review(4, rating)
+            self.assertEqual(response.status_code, 400, rating)
+            response = self.client.put(
+                f'/api/reviews/{review_id}',
+                data=json.dumps({'rating': rating}),
+                content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 400, rating)
+        rating = json.loads(self.client.get('/api/books/4').data)['rating']
+        self.assertEqual(rating, before)
+        self.assertEqual(rating['count'], sum(rating['histogram'].values()))
+
+    def test_rating_stats_match_rebuild_after_bulk(self):
+        """Тест совпадения инкрементальных агрегатов с полным пересчетом."""
+        from app.models import BookRatingStats
+        from app.services import DatabaseService
+        reviews = [{'book_id': 1 + i % 3, 'rating': 1 + i % 5,
+                    'reviewer_name': 'Читатель'} for i in range(20)]
+        self.client.post(
+            '/api/reviews/bulk', data=json.dumps(reviews),
+            content_type='application/json'
+        )
+        self.client.put(
+            '/api/reviews/bulk',
+            data=json.dumps([{'id': 4, 'rating': 1}, {'id': 5, 'rating': 5}]),
+            content_type='application/json'
+        )
+        self.client.delete(
+            '/api/reviews/bulk', data=json.dumps([1, 6, 7]),
+            content_type='application/json'
+        )
+
+        def snapshot():
+            return sorted(
+                (s.book_id, s.count, s.total, round(s.average, 6),
+                 s.rating_1, s.rating_5)
+                for s in BookRatingStats.query.filter(
+                    BookRatingStats.count > 0
+                )
+            )
+        incremental = snapshot()
+        DatabaseService.rebuild_rating_stats()
+        db.session.commit()
+        self.assertEqual(incremental, snapshot())
+
+    def test_top_rated_books(self):
+        """Тест списка книг с наивысшим рейтингом."""
+        self._post_review(4, 5)
+        self._post_review(2, 1)
+        response = self.client.get('/api/books/top-rated')
+        self.assertEqual(response.status_code, 200)
+        books = json.loads(response.data)
+        self.assertEqual([b['id'] for b in books][:3], [1, 3, 4])
+        self.assertNotIn(
+            2, [b['id'] for b in json.loads(
+                self.client.get('/api/books/top-rated?limit=3').data)]
+        )
+
+    def test_top_rated_books_pages(self):
+        """Тест обхода рейтинга книг по курсору after."""
+        self._post_review(4, 5)
+        self._post_review(2, 1)
+        expected = [b['id'] for b in json.loads(
+            self.client.get('/api/books/top-rated').data)]
+        ids, after = [], None
+        while True:
+            url = '/api/books/top-rated?limit=1'
+            if after is not None:
+                url += f'&after={after}'
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = json.loads(response.data)
+            self.assertLessEqual(len(page), 1)
+            ids += [b['id'] for b in page]
+            after = response.headers.get('X-Next-Cursor')
+            if after is None:
+                break
+            self.assertIn(f'after={after}', response.headers['Link'])
+        self.assertEqual(ids, expected)
+        self.assertGreater(len(ids), 2)
+        response = self.client.get('/api/books/top-rated?after=abc')
+        self.assertEqual(response.status_code, 400)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
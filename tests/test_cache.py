@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from app.cache import (
+    MISSING, MemoryCacheBackend, ResponseCache, SQLiteCacheBackend
+)
+from tests.helpers import create_test_app
+
+
+class MemoryCacheBackendTestCase(unittest.TestCase):
+    """Тесты LRU/TTL кеша в памяти процесса."""
+
+    def test_lru_eviction(self):
+        """Тест вытеснения самой давно использованной записи."""
+        backend = MemoryCacheBackend(max_entries=2, ttl=60)
+        backend.set('a', 1)
+        backend.set('b', 2)
+        backend.get('a')
+        backend.set('c', 3)
+        self.assertEqual(backend.get('a'), 1)
+        self.assertIs(backend.get('b'), MISSING)
+        self.assertEqual(backend.get('c'), 3)
+
+    def test_ttl_expiration(self):
+        """Тест устаревания записи по TTL."""
+        backend = MemoryCacheBackend(max_entries=10, ttl=0.01)
+        backend.set('a', 1)
+        time.sleep(0.02)
+        self.assertIs(backend.get('a'), MISSING)
+
+
+class SQLiteCacheBackendTestCase(unittest.TestCase):
+    """Тесты общего для воркеров кеша в файле SQLite."""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_shared_between_instances(self):
+        """Тест видимости записей и версий между экземплярами (воркерами)."""
+        first = ResponseCache(SQLiteCacheBackend(self.path))
+        second = ResponseCache(SQLiteCacheBackend(self.path))
+
+        calls = []
+
+        def producer():
+            calls.append(1)
+            return {'items': [1, 2]}, 200
+
+        self.assertEqual(
+            first.get_or_call(('books',), 'k', producer),
+            ({'items': [1, 2]}, 200)
+        )
+        self.assertEqual(
+            second.get_or_call(('books',), 'k', producer),
+            ({'items': [1, 2]}, 200)
+        )
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(second.hits, 1)
+
+        first.invalidate('books')
+        second.get_or_call(('books',), 'k', producer)
+        self.assertEqual(len(calls), 2)
+
+
+class SharedDatabaseCacheTestCase(unittest.TestCase):
+    """Кеш по умолчанию для воркеров с общей файловой SQLite."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.uri = f'sqlite:///{os.path.join(self.dir, "catalog.sqlite3")}'
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_write_in_other_worker_invalidates(self):
+        first = create_test_app(SQLALCHEMY_DATABASE_URI=self.uri)
+        second = create_test_app(SQLALCHEMY_DATABASE_URI=self.uri)
+        self.assertEqual(first.extensions['cache'].stats()['backend'],
+                         'SQLiteCacheBackend')
+        reader = first.test_client()
+        response = reader.get('/api/books/1')
+        etag = response.headers['ETag']
+
+        response = second.test_client().put(
+            '/api/books/1', json={'title': 'Новое название'}
+        )
+        self.assertEqual(response.status_code, 200)
+        response = reader.get('/api/books/1', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['title'], 'Новое название')
+
+    def test_memory_without_shared_database(self):
+        app = create_test_app()
+        self.assertEqual(app.extensions['cache'].stats()['backend'],
+                         'MemoryCacheBackend')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import gzip
+import json
+import unittest
+from unittest import mock
+from app import create_app
+from app import compression
+
+
+class CompressionTestCase(unittest.TestCase):
+    """Тесты сжатия ответов и кеша сжатых тел."""
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        # Список книг заведомо больше COMPRESSION_MIN_SIZE
+        self.client.post('/api/books/bulk', data=json.dumps([
+            {'title': f'Книга {i}', 'author_id': 1,
+             'description': 'Длинное описание книги ' * 5}
+            for i in range(30)
+        ]), content_type='application/json')
+
+    def get(self, url, encoding='gzip', **headers):
+        if encoding is not None:
+            headers['Accept-Encoding'] = encoding
+        return self.client.get(url, headers=headers)
+
+    def test_gzip_negotiation(self):
+        plain = self.get('/api/books', encoding=None)
+        response = self.get('/api/books')
+        self.assertIsNone(plain.content_encoding)
+        self.assertEqual(response.content_encoding, 'gzip')
+        self.assertIn('Accept-Encoding', response.vary)
+        self.assertLess(len(response.data), len(plain.data))
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+
+    def test_weak_etag_revalidates(self):
+        response = self.get('/api/books')
+        etag, weak = response.get_etag()
+        self.assertTrue(weak)
+        self.assertEqual(etag, self.get('/api/books', None).get_etag()[0])
+        response = self.get(
+            '/api/books', **{'If-None-Match': response.headers['ETag']}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_skipped_responses(self):
+        # Маленькое тело, запрет кодировки и потоковая выгрузка
+        self.assertIsNone(self.get('/api/authors/1').content_encoding)
+        self.assertIsNone(
+            self.get('/api/books', 'gzip;q=0, identity').content_encoding
+        )
+        self.assertIsNone(self.get('/api/export/books').content_encoding)
+
+    def test_brotli_preferred_when_available(self):
+        response = self.get('/api/books', 'gzip, br')
+        if compression.brotli is None:
+            self.assertEqual(response.content_encoding, 'gzip')
+        else:
+            self.assertEqual(response.content_encoding, 'br')
+        # Явно более высокий q клиента важнее порядка сервера
+        response = self.get('/api/books', 'gzip;q=1, br;q=0.5')
+        self.assertEqual(response.content_encoding, 'gzip')
+
+    def test_brotli_skipped_without_module(self):
+        with mock.patch.object(compression, 'brotli', None):
+            self.assertEqual(
+                compression.available_encodings(
+                    {'COMPRESSION_ENCODINGS': 'br,gzip'}
+                ), ['gzip']
+            )
+
+    def test_precompressed_cache(self):
+        first = self.get('/api/books')
+        with mock.patch(
+            'app.services.BookService.get_all_books'
+        ) as get_all_books:
+            second = self.get('/api/books')
+        get_all_books.assert_not_called()
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second.headers['ETag'], first.headers['ETag'])
+        self.assertEqual(second.content_encoding, 'gzip')
+        stats = self.client.get('/api/stats').get_json()['cache']
+        self.assertEqual(stats['compressed_hits'], 1)
+
+        # Изменение данных меняет ETag, старое тело не используется
+        self.client.post('/api/books', data=json.dumps(
+            {'title': 'Новая книга', 'author_id': 1}
+        ), content_type='application/json')
+        third = self.get('/api/books')
+        self.assertNotEqual(third.headers['ETag'], first.headers['ETag'])
+        self.assertNotEqual(third.data, first.data)
@@ -0,0 +1,182 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+import flask_migrate
+from flask import Flask
+from app import create_app, migrate
+from app.models import db, Book, Review
+from app.search import install_search
+from app.services import encode_cursor, paginate_sorted
+
+
+class IndexUsageTestCase(unittest.TestCase):
+    """Горячие выборки должны идти по индексам, а не полным сканированием.
+
+    Проверяется план EXPLAIN QUERY PLAN SQLite для тех же запросов, что
+    строят сервисы.
+    """
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    def plan(self, statement):
+        sql = statement.compile(
+            dialect=db.engine.dialect,
+            compile_kwargs={'literal_binds': True}
+        )
+        rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'))
+        return [row[-1] for row in rows]
+
+    def assertUsesIndex(self, statement, index):
+        plan = self.plan(statement)
+        self.assertTrue(
+            any(step.startswith('SEARCH') and index in step
+                for step in plan),
+            f'Ожидался поиск по индексу {index}, план: {plan}'
+        )
+        for step in plan:
+            self.assertNotRegex(
+                step, r'^SCAN \w+$', f'Полное сканирование: {plan}'
+            )
+
+    def test_reviews_by_book(self):
+        self.assertUsesIndex(
+            db.select(Review).where(Review.book_id == 1)
+            .order_by(Review.id), 'ix_reviews_book_id'
+        )
+
+    def test_reviews_by_book_and_date(self):
+        self.assertUsesIndex(
+            db.select(Review).where(Review.book_id == 1)
+            .order_by(Review.created_at.desc()),
+            'ix_reviews_book_id_created_at'
+        )
+
+    def test_books_by_author(self):
+        self.assertUsesIndex(
+            db.select(Book).where(Book.author_id == 1), 'ix_books_author_id'
+        )
+
+    def test_books_by_price(self):
+        self.assertUsesIndex(
+            db.select(Book).where(Book.price.between(1000, 2000)),
+            'ix_books_price'
+        )
+
+    def test_books_by_publication_date(self):
+        self.assertUsesIndex(
+            db.select(Book.id).where(
+                Book.publication_date >= date(2020, 1, 1)
+            ), 'ix_books_publication_date'
+        )
+
+    def test_sorted_page_reads_index_in_order(self):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, *args):
+            if statement.startswith('SELECT books.id'):
+                statements.append((statement, parameters))
+
+        db.event.listen(db.engine, 'before_cursor_execute', record)
+        with self.app.test_request_context():
+            paginate_sorted(
+                Book.query, Book, Book.price, False, 10,
+                encode_cursor(3000.0, 2)
+            )
+        db.event.remove(db.engine, 'before_cursor_execute', record)
+        (statement, parameters), = statements
+        plan = [
+            row[-1] for row in db.session.connection().exec_driver_sql(
+                f'EXPLAIN QUERY PLAN {statement}', parameters
+            )
+        ]
+        self.assertTrue(any('ix_books_price' in step for step in plan), plan)
+        self.assertFalse(any('TEMP B-TREE' in step for step in plan), plan)
+
+    def test_collection_validator_uses_index(self):
+        self.assertUsesIndex(
+            db.select(db.func.max(Book.updated_at)), 'ix_books_updated_at'
+        )
+
+
+class MigrationsTestCase(unittest.TestCase):
+    """Миграции должны приводить схему в точное соответствие с моделями."""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{self.path}'
+        db.init_app(self.app)
+        migrate.init_app(self.app, db)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_upgrade_matches_models(self):
+        with self.app.app_context():
+            flask_migrate.upgrade()
+            # Таблицы FTS5 не должны попадать в autogenerate
+            with db.engine.begin() as connection:
+                install_search(connection)
+            try:
+                flask_migrate.check()
+            except SystemExit:
+                self.fail('Модели расходятся с миграциями')
+            indexes = {
+                index['name']
+                for table in ('books', 'reviews')
+                for index in db.inspect(db.engine).get_indexes(table)
+            }
+            db.engine.dispose()
+        self.assertTrue({
+            'ix_books_author_id', 'ix_books_price',
+            'ix_books_publication_date', 'ix_reviews_book_id',
+            'ix_reviews_book_id_created_at'
+        } <= indexes)
+
+    def test_upgrade_database_created_before_migrations(self):
+        with self.app.app_context():
+            # Схема db.create_all() до миграций: ревизия 0000
+            flask_migrate.upgrade(revision='0000')
+            with db.engine.begin() as connection:
+                connection.exec_driver_sql(
+                    "INSERT INTO authors (id, name) VALUES (1, 'Автор')"
+                )
+                connection.exec_driver_sql(
+                    "INSERT INTO books (id, title, author_id) "
+                    "VALUES (1, 'Книга', 1), (2, 'Другая', 1)"
+                )
+                connection.exec_driver_sql(
+                    "INSERT INTO reviews (rating, reviewer_name, book_id) "
+                    "VALUES (5, 'А', 1), (4, 'Б', 1), (4, 'В', 1)"
+                )
+            flask_migrate.upgrade()
+            with db.engine.begin() as connection:
+                stats = connection.exec_driver_sql(
+                    'SELECT book_id, count, total, average, rating_4, '
+                    'rating_5 FROM book_rating_stats'
+                ).all()
+                self.assertEqual(
+                    [tuple(row) for row in stats],
+                    [(1, 3, 13, 13 / 3, 2, 1)]
+                )
+                self.assertEqual(connection.exec_driver_sql(
+                    'PRAGMA foreign_keys'
+                ).scalar(), 1)
+                # Каскадное удаление добавлено миграцией
+                connection.exec_driver_sql('DELETE FROM authors')
+                self.assertEqual(connection.exec_driver_sql(
+                    'SELECT count(*) FROM reviews'
+                ).scalar(), 0)
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
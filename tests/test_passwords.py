@@ -0,0 +1,93 @@
+import hashlib
+import threading
+import unittest
+from app import create_app
+from app.passwords import HashingOverloaded, PasswordHasher
+from app.utils import hash_password, verify_password
+
+
+class PasswordHasherTestCase(unittest.TestCase):
+    """Тесты сервиса хеширования паролей."""
+
+    def setUp(self):
+        self.hasher = PasswordHasher(iterations=1000)
+
+    def test_hash_and_verify(self):
+        stored = self.hasher.hash('secret')
+        self.assertTrue(stored.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(self.hasher.verify(stored, 'secret'))
+        self.assertFalse(self.hasher.verify(stored, 'wrong'))
+
+    def test_verify_legacy_format(self):
+        hashed = hashlib.pbkdf2_hmac(
+            'sha256', b'secret', b'salt', 100000
+        ).hex()
+        stored = f'salt${hashed}'
+        self.assertTrue(self.hasher.verify(stored, 'secret'))
+        self.assertFalse(self.hasher.verify(stored, 'wrong'))
+
+    def test_needs_rehash(self):
+        self.assertTrue(self.hasher.needs_rehash('salt$abcd'))
+        self.assertFalse(
+            self.hasher.needs_rehash(self.hasher.hash('secret'))
+        )
+        stronger = PasswordHasher(iterations=2000)
+        self.assertTrue(stronger.needs_rehash(self.hasher.hash('secret')))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.hasher.verify('md5$1$2$3$4', 'secret')
+
+    def test_overload_rejected(self):
+        hasher = PasswordHasher(max_workers=1, max_pending=0)
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking():
+            started.set()
+            release.wait(5)
+
+        worker = threading.Thread(target=hasher.run, args=(blocking,))
+        worker.start()
+        started.wait(5)
+        try:
+            with self.assertRaises(HashingOverloaded):
+                hasher.run(lambda: None)
+        finally:
+            release.set()
+            worker.join(5)
+
+        metrics = hasher.metrics()
+        self.assertEqual(metrics['rejected'], 1)
+        self.assertEqual(metrics['completed'], 1)
+        self.assertEqual(metrics['in_flight'], 0)
+        # После освобождения слота задачи снова принимаются
+        self.assertEqual(hasher.run(lambda: 42), 42)
+
+
+class PasswordUtilsTestCase(unittest.TestCase):
+    """Тесты функций hash_password/verify_password в приложении."""
+
+    def setUp(self):
+        self.app = create_app('testing')
+
+    def test_round_trip_uses_app_hasher(self):
+        with self.app.app_context():
+            stored = hash_password('secret')
+            self.assertTrue(verify_password(stored, 'secret'))
+            self.assertFalse(verify_password(stored, 'wrong'))
+            stats = self.app.test_client().get('/api/stats').get_json()
+        self.assertEqual(stats['password_hashing']['completed'], 3)
+
+    def test_overload_returns_503(self):
+        @self.app.route('/overloaded')
+        def overloaded():
+            raise HashingOverloaded()
+
+        response = self.app.test_client().get('/overloaded')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import unittest
+from sqlalchemy.exc import TimeoutError
+from app.config import Config
+from app.models import db
+from app.pool import TimedQueuePool, engine_options, pool_metrics
+from tests.helpers import create_test_app
+
+
+def base_config(**overrides):
+    options = {
+        key: getattr(Config, key) for key in dir(Config) if key.isupper()
+    }
+    options.update(overrides)
+    return options
+
+
+class EngineOptionsTestCase(unittest.TestCase):
+    """Параметры пула и тайм-аутов по диалекту."""
+
+    def test_postgresql(self):
+        options = engine_options(
+            'postgresql://user:pass@db/books', base_config()
+        )
+        self.assertIs(options['poolclass'], TimedQueuePool)
+        self.assertEqual(options['pool_size'], 5)
+        self.assertTrue(options['pool_pre_ping'])
+        self.assertEqual(options['connect_args'], {
+            'connect_timeout': 5, 'options': '-c statement_timeout=15000'
+        })
+
+    def test_mysql(self):
+        options = engine_options(
+            'mysql+pymysql://user:pass@db/books',
+            base_config(DB_STATEMENT_TIMEOUT_MS=0, DB_POOL_RECYCLE=300)
+        )
+        self.assertEqual(options['pool_recycle'], 300)
+        self.assertEqual(options['connect_args'], {'connect_timeout': 5})
+
+    def test_sqlite_and_overrides(self):
+        self.assertEqual(
+            engine_options('sqlite:///:memory:', base_config()), {}
+        )
+        options = engine_options('sqlite:////tmp/x.sqlite3', base_config(
+            SQLALCHEMY_ENGINE_OPTIONS={'pool_size': 1, 'echo': True}
+        ))
+        self.assertNotIn('pool_pre_ping', options)
+        self.assertEqual(options['pool_size'], 1)
+        self.assertTrue(options['echo'])
+
+
+class PoolMetricsTestCase(unittest.TestCase):
+    """Метрики и прогрев пула на файловой SQLite."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.app = create_test_app(
+            SQLALCHEMY_DATABASE_URI='sqlite:///' + os.path.join(
+                self.dir, 'catalog.sqlite3'
+            ),
+            DB_POOL_SIZE=2, DB_MAX_OVERFLOW=1, DB_POOL_TIMEOUT=1
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_warmup_and_metrics(self):
+        with self.app.app_context():
+            self.assertIsInstance(db.engine.pool, TimedQueuePool)
+            # Прогрев оставил в пуле DB_POOL_WARMUP (не больше размера)
+            self.assertEqual(pool_metrics(db.engine)['idle'], 2)
+        stats = self.app.test_client().get('/api/stats').get_json()
+        self.assertEqual(stats['db_pool']['in_use'], 0)
+        self.assertGreater(stats['db_pool']['checkouts'], 0)
+
+    def test_exhausted_pool(self):
+        with self.app.app_context():
+            held = [db.engine.connect() for _ in range(3)]
+            try:
+                self.assertEqual(pool_metrics(db.engine)['in_use'], 3)
+                with self.assertRaises(TimeoutError):
+                    db.engine.connect()
+                metrics = pool_metrics(db.engine)
+                self.assertEqual(metrics['failures'], 1)
+                self.assertGreaterEqual(metrics['max_wait_ms'], 1000)
+            finally:
+                for connection in held:
+                    connection.close()
@@ -0,0 +1,138 @@
+import json
+import random
+import unittest
+from app import create_app
+from app.models import db, BookPopularity
+from app.popularity import CountMinSketch, PopularityTracker
+from app.services import PopularityService
+
+
+class FakeClock:
+    """Управляемые из теста часы."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class CountMinSketchTestCase(unittest.TestCase):
+
+    def test_estimates_never_undercount(self):
+        sketch = CountMinSketch(width=64, depth=4)
+        counts = {}
+        rng = random.Random(1)
+        for _ in range(5000):
+            key = rng.randrange(1000)
+            counts[key] = counts.get(key, 0) + 1
+            sketch.add(key)
+        for key, count in counts.items():
+            self.assertGreaterEqual(sketch.estimate(key), count)
+        self.assertEqual(sketch.nbytes, 64 * 4 * 8)
+
+
+class PopularityTrackerTestCase(unittest.TestCase):
+    """Тесты лидеров с затуханием."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.tracker = PopularityTracker(
+            capacity=10, width=512, depth=4, half_life=100, clock=self.clock
+        )
+
+    def test_heavy_hitters_among_many_keys(self):
+        rng = random.Random(2)
+        events = [key for key in range(1, 6) for _ in range(200 * key)]
+        events += [rng.randrange(100, 100000) for _ in range(5000)]
+        rng.shuffle(events)
+        for key in events:
+            self.tracker.record(key)
+        self.assertEqual(
+            [key for key, _ in self.tracker.top(5)], [5, 4, 3, 2, 1]
+        )
+        self.assertLessEqual(len(self.tracker.snapshot()), 10)
+
+    def test_decay(self):
+        for _ in range(8):
+            self.tracker.record(1)
+        self.clock.now += 100
+        self.assertAlmostEqual(self.tracker.top(1)[0][1], 4.0)
+        # Недавние события весят больше старых
+        for _ in range(5):
+            self.tracker.record(2)
+        self.assertEqual([key for key, _ in self.tracker.top(2)], [2, 1])
+
+    def test_renormalization_keeps_scores(self):
+        self.tracker.record(1, 4)
+        self.clock.now += 100 * 70
+        self.tracker.record(2)
+        top = dict(self.tracker.top(2))
+        self.assertAlmostEqual(top[2], 1.0)
+        self.assertAlmostEqual(top[1], 4 * 2 ** -70)
+
+    def test_snapshot_and_load(self):
+        for _ in range(6):
+            self.tracker.record(7)
+        self.tracker.record(8, 2)
+        snapshot = self.tracker.snapshot()
+
+        self.clock.now += 100
+        restored = PopularityTracker(capacity=10, half_life=100,
+                                     clock=self.clock)
+        restored.load(snapshot)
+        top = restored.top(2)
+        self.assertEqual([key for key, _ in top], [7, 8])
+        self.assertAlmostEqual(top[0][1], 3.0)
+
+    def test_discard(self):
+        self.tracker.record(1)
+        self.tracker.record(2)
+        self.tracker.discard(1)
+        self.assertEqual([key for key, _ in self.tracker.top(5)], [2])
+
+
+class PopularBooksApiTestCase(unittest.TestCase):
+    """Популярность из просмотров книг и отзывов."""
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+
+    def popular(self):
+        response = self.client.get('/api/memory/popular_books')
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()['popular_books']
+
+    def test_views_and_reviews(self):
+        self.assertEqual(self.popular(), [])
+        for _ in range(3):
+            self.client.get('/api/books/2')
+        etag = self.client.get('/api/books/1').headers['ETag']
+        # Повторная проверка по ETag - тоже просмотр
+        self.client.get('/api/books/1', headers={'If-None-Match': etag})
+        self.client.get('/api/books/999')
+        self.client.post('/api/reviews', data=json.dumps({
+            'book_id': 3, 'rating': 5, 'reviewer_name': 'Читатель'
+        }), content_type='application/json')
+
+        popular = self.popular()
+        self.assertEqual([book['id'] for book in popular], [3, 2, 1])
+        self.assertEqual(popular[1]['title'], 'Python Crash Course')
+
+        self.client.delete('/api/books/3')
+        self.assertEqual([book['id'] for book in self.popular()], [2, 1])
+
+    def test_flush_and_load(self):
+        self.app.config['POPULARITY_FLUSH_INTERVAL'] = 0
+        for _ in range(4):
+            self.client.get('/api/books/2')
+        self.client.get('/api/books/1')
+        with self.app.app_context():
+            self.assertEqual(db.session.query(BookPopularity).count(), 2)
+            tracker = self.app.extensions['popularity']
+            self.app.extensions['popularity'] = PopularityTracker(
+                half_life=tracker.half_life
+            )
+            PopularityService.load()
+        self.assertEqual([book['id'] for book in self.popular()], [2, 1])
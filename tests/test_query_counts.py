@@ -0,0 +1,133 @@
+import json
+import unittest
+from sqlalchemy import event
+from app import create_app
+from app.models import db
+
+
+class QueryCounter:
+    """Подсчет SQL-запросов, отправленных в БД внутри блока with."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    def __len__(self):
+        return len(self.statements)
+
+
+class QueryCountTestCase(unittest.TestCase):
+    """Число SQL-запросов на endpoint (защита от регрессий N+1).
+
+    Кеш чтений отключен, чтобы считались запросы самих сервисов.
+    """
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.extensions['cache'] = None
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            self.engine = db.engine
+
+    def assertQueries(self, expected, method, url, body=None, status=200):
+        with QueryCounter(self.engine) as counter:
+            response = getattr(self.client, method)(
+                url, data=json.dumps(body) if body is not None else None,
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, status, response.data)
+        self.assertEqual(
+            len(counter), expected,
+            f'{method.upper()} {url}:\n' + '\n'.join(counter.statements)
+        )
+        return response
+
+    def test_get_book(self):
+        self.assertQueries(2, 'get', '/api/books/1')
+
+    def test_book_views(self):
+        # Валидатор ETag: книги и агрегаты оценок (+ встроенные таблицы)
+        self.assertQueries(3, 'get', '/api/books?fields=title')
+        self.assertQueries(4, 'get', '/api/books?include=author')
+        # Отзывы всей страницы загружаются одним selectinload
+        self.assertQueries(6, 'get', '/api/books?include=author,reviews')
+        self.assertQueries(5, 'get', '/api/books/1?include=author,reviews')
+
+        # Число запросов не зависит от числа книг на странице
+        self.client.post('/api/books/bulk', data=json.dumps([
+            {'title': f'Книга {i}', 'author_id': 1 + i % 4}
+            for i in range(20)
+        ]), content_type='application/json')
+        self.assertQueries(6, 'get', '/api/books?include=author,reviews')
+
+    def test_get_book_reviews(self):
+        self.assertQueries(2, 'get', '/api/books/1/reviews')
+        self.assertQueries(1, 'get', '/api/books/999/reviews', status=404)
+
+    def test_create_book(self):
+        book = {'title': 'Новая книга', 'author_id': 1}
+        self.assertQueries(1, 'post', '/api/books', book, status=201)
+
+    def test_create_book_unknown_author(self):
+        book = {'title': 'Новая книга', 'author_id': 999}
+        response = self.assertQueries(
+            1, 'post', '/api/books', book, status=404
+        )
+        self.assertEqual(response.get_json()['error'], 'Автор не найден')
+
+    def test_create_book_duplicate_isbn(self):
+        self.client.post(
+            '/api/books', data=json.dumps(
+                {'title': 'A', 'author_id': 1, 'isbn': '1234567890123'}),
+            content_type='application/json'
+        )
+        book = {'title': 'B', 'author_id': 1, 'isbn': '1234567890123'}
+        self.assertQueries(1, 'post', '/api/books', book, status=409)
+
+    def test_update_book(self):
+        self.assertQueries(
+            2, 'put', '/api/books/1', {'title': 'Новое', 'author_id': 2}
+        )
+        response = self.assertQueries(
+            2, 'put', '/api/books/1', {'author_id': 999}, status=404
+        )
+        self.assertEqual(response.get_json()['error'], 'Автор не найден')
+
+    def test_create_review(self):
+        review = {'book_id': 1, 'rating': 5, 'reviewer_name': 'Иван'}
+        self.assertQueries(2, 'post', '/api/reviews', review, status=201)
+
+    def test_create_review_unknown_book(self):
+        review = {'book_id': 999, 'rating': 5, 'reviewer_name': 'Иван'}
+        response = self.assertQueries(
+            1, 'post', '/api/reviews', review, status=404
+        )
+        self.assertEqual(response.get_json()['error'], 'Книга не найдена')
+
+    def test_update_and_delete_review(self):
+        self.assertQueries(3, 'put', '/api/reviews/1', {'rating': 1})
+        self.assertQueries(3, 'delete', '/api/reviews/1')
+
+    def test_delete_cascades_in_one_statement(self):
+        self.assertQueries(1, 'delete', '/api/books/2')
+        self.assertQueries(1, 'delete', '/api/authors/1')
+        self.assertQueries(1, 'delete', '/api/authors/1', status=404)
+
+    def test_create_author(self):
+        self.assertQueries(
+            1, 'post', '/api/authors', {'name': 'Автор'}, status=201
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import os
+import socketserver
+import tempfile
+import threading
+import unittest
+from flask import Flask
+from app.ratelimit import (
+    RedisBackend, SQLiteBackend, SlidingWindowLimiter
+)
+from app.utils import rate_limit
+
+
+class FakeClock:
+    """Управляемые из теста часы."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class SlidingWindowLimiterTestCase(unittest.TestCase):
+    """Тесты ограничителя частоты со скользящим окном."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = SlidingWindowLimiter(
+            requests_limit=3, time_window=10, max_keys=2, clock=self.clock
+        )
+
+    def test_limit_within_window(self):
+        """Тест отказа после исчерпания лимита в окне."""
+        for _ in range(3):
+            self.assertTrue(self.limiter.hit('1.1.1.1')[0])
+        allowed, retry_after = self.limiter.hit('1.1.1.1')
+        self.assertFalse(allowed)
+        self.assertGreater(retry_after, 0)
+
+    def test_previous_window_is_weighted(self):
+        """Тест учета предыдущего окна пропорционально перекрытию."""
+        for _ in range(3):
+            self.limiter.hit('1.1.1.1')
+        # Начало следующего окна: предыдущее учитывается почти полностью
+        self.clock.now = 1010.0
+        self.assertFalse(self.limiter.hit('1.1.1.1')[0])
+        # Конец следующего окна: вес предыдущего 0.1
+        self.clock.now = 1019.0
+        self.assertTrue(self.limiter.hit('1.1.1.1')[0])
+
+    def test_idle_and_excess_keys_are_evicted(self):
+        """Тест вытеснения простаивающих ключей и ограничения их числа."""
+        self.limiter.hit('1.1.1.1')
+        self.limiter.hit('2.2.2.2')
+        self.limiter.hit('3.3.3.3')
+        self.assertEqual(len(self.limiter), 2)
+        self.assertNotIn('1.1.1.1', self.limiter.backend._keys)
+
+        self.clock.now = 1100.0
+        self.limiter.hit('4.4.4.4')
+        self.assertEqual(list(self.limiter.backend._keys), ['4.4.4.4'])
+
+
+class SharedBackendTestCase(unittest.TestCase):
+    """Тесты общего лимита для нескольких воркеров."""
+
+    def assert_shared_limit(self, first, second):
+        clock = FakeClock()
+        workers = [
+            SlidingWindowLimiter(4, 60, backend=first, clock=clock),
+            SlidingWindowLimiter(4, 60, backend=second, clock=clock),
+        ]
+        results = [workers[i % 2].hit('1.1.1.1')[0] for i in range(6)]
+        self.assertEqual(results, [True] * 4 + [False] * 2)
+
+    def test_sqlite_backend(self):
+        """Тест лимита, общего для воркеров через файл SQLite."""
+        fd, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        try:
+            self.assert_shared_limit(SQLiteBackend(path), SQLiteBackend(path))
+        finally:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+    def test_redis_backend(self):
+        """Тест лимита через сервер с протоколом Redis (локальная замена)."""
+        server = FakeRedisServer(('127.0.0.1', 0), FakeRedisHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = 'redis://127.0.0.1:{}/1'.format(server.server_address[1])
+            self.assert_shared_limit(RedisBackend(url), RedisBackend(url))
+            self.assertIn('SELECT', server.seen)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_redis_backend_fails_open(self):
+        """Тест пропуска запросов при недоступном сервере."""
+        backend = RedisBackend('redis://127.0.0.1:1/0', timeout=0.1)
+        limiter = SlidingWindowLimiter(1, 60, backend=backend)
+        self.assertTrue(limiter.hit('1.1.1.1')[0])
+        self.assertTrue(limiter.hit('1.1.1.1')[0])
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """Минимальный сервер RESP с командами, нужными ограничителю."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.data = {}
+        self.seen = set()
+        self.lock = threading.Lock()
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        parts = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            parts.append(self.rfile.read(length + 2)[:-2].decode())
+        return parts
+
+    def handle(self):
+        server = self.server
+        while True:
+            command = self.read_command()
+            if command is None:
+                return
+            name, args = command[0].upper(), command[1:]
+            server.seen.add(name)
+            with server.lock:
+                if name in ('INCR', 'DECR'):
+                    step = 1 if name == 'INCR' else -1
+                    value = int(server.data.get(args[0], 0)) + step
+                    server.data[args[0]] = value
+                    reply = b':%d\r\n' % value
+                elif name == 'GET':
+                    value = server.data.get(args[0])
+                    if value is None:
+                        reply = b'$-1\r\n'
+                    else:
+                        value = str(value).encode()
+                        reply = b'$%d\r\n%s\r\n' % (len(value), value)
+                elif name == 'PEXPIRE':
+                    reply = b':1\r\n'
+                elif name in ('SELECT', 'AUTH', 'PING'):
+                    reply = b'+OK\r\n'
+                else:
+                    reply = b'-ERR unknown command\r\n'
+            self.wfile.write(reply)
+
+
+class RateLimitDecoratorTestCase(unittest.TestCase):
+    """Тест декоратора rate_limit на маршруте Flask."""
+
+    def test_returns_429(self):
+        app = Flask(__name__)
+
+        @app.route('/limited')
+        @rate_limit(requests_limit=2, time_window=60)
+        def limited():
+            return 'ok'
+
+        client = app.test_client()
+        self.assertEqual(client.get('/limited').status_code, 200)
+        self.assertEqual(client.get('/limited').status_code, 200)
+        response = client.get('/limited')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('retry_after', response.get_json())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from app import create_app
+from app.recent import (
+    MemoryRecentSearches, SQLiteRecentSearches, init_recent_searches
+)
+
+
+class RecentSearchesTestCase(unittest.TestCase):
+    """Тесты кольцевого буфера недавних поисков."""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def assertKeepsLast(self, store, capacity):
+        for i in range(capacity + 5):
+            store.add(f'запрос {i}', f'2024-01-01T00:00:{i:02d}')
+        self.assertEqual(
+            [item['query'] for item in store.items()],
+            [f'запрос {i}' for i in range(5, capacity + 5)]
+        )
+        self.assertEqual(len(store), capacity)
+
+    def test_memory_ring_buffer(self):
+        self.assertKeepsLast(MemoryRecentSearches(capacity=3), 3)
+
+    def test_sqlite_ring_buffer(self):
+        self.assertKeepsLast(SQLiteRecentSearches(self.path, capacity=3), 3)
+
+    def test_sqlite_shared_between_workers(self):
+        # Два экземпляра на одном файле - как хранилища двух воркеров
+        first = SQLiteRecentSearches(self.path, capacity=5)
+        second = SQLiteRecentSearches(self.path, capacity=5)
+        first.add('из первого', 't1')
+        second.add('из второго', 't2')
+        self.assertEqual(first.items(), second.items())
+        self.assertEqual(
+            [item['query'] for item in first.items()],
+            ['из первого', 'из второго']
+        )
+
+    def test_concurrent_adds(self):
+        for store in (MemoryRecentSearches(capacity=10),
+                      SQLiteRecentSearches(self.path, capacity=10)):
+            def worker(n):
+                for i in range(50):
+                    store.add(f'{n}-{i}', 't')
+
+            threads = [threading.Thread(target=worker, args=(n,))
+                       for n in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(len(store.items()), 10)
+            self.assertEqual(len(store), 10)
+
+    def test_app_sqlite_backend(self):
+        app = create_app('testing')
+        app.config.update(
+            RECENT_SEARCHES_BACKEND='sqlite', RECENT_SEARCHES_SIZE=2,
+            RECENT_SEARCHES_SQLITE_PATH=self.path
+        )
+        init_recent_searches(app)
+        client = app.test_client()
+        for query in ('первый', 'второй', 'третий'):
+            client.post('/api/memory/search', data=json.dumps(
+                {'query': query}
+            ), content_type='application/json')
+        data = client.get('/api/memory/recent_searches').get_json()
+        self.assertEqual(
+            [item['query'] for item in data['recent_searches']],
+            ['второй', 'третий']
+        )
+        self.assertEqual(
+            SQLiteRecentSearches(self.path).items(), data['recent_searches']
+        )
@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+import unittest
+from app.models import db, BookPopularity
+from app.replicas import PRIMARY_COOKIE
+from app.storage import snapshot_database
+from tests.helpers import create_test_app
+
+
+class ReplicaRoutingTestCase(unittest.TestCase):
+    """Чтения с реплик: основная база и реплики - файлы SQLite.
+
+    Реплики - снимки основной базы, сделанные после запуска, поэтому
+    последующие записи видны только на основной базе.
+    """
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.primary = os.path.join(self.dir, 'primary.sqlite3')
+        self.replicas = [
+            os.path.join(self.dir, f'replica{n}.sqlite3') for n in range(2)
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def create_app(self, replicas=1, **options):
+        options = dict({
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{self.primary}',
+            'READ_REPLICA_URIS': ','.join(
+                f'sqlite:///{path}' for path in self.replicas[:replicas]
+            ),
+            # Кеш чтений скрыл бы, с какой базы прочитан ответ
+            'CACHE_BACKEND': 'none',
+        }, **options)
+        app = create_test_app(**options)
+        with app.app_context():
+            for path in self.replicas[:replicas]:
+                snapshot_database(db.engine, path)
+        return app
+
+    def author_names(self, client):
+        response = client.get('/api/authors')
+        self.assertEqual(response.status_code, 200)
+        return [author['name'] for author in response.get_json()]
+
+    def test_reads_go_to_replica(self):
+        app = self.create_app()
+        writer = app.test_client()
+        response = writer.post('/api/authors', json={'name': 'Новый автор'})
+        self.assertEqual(response.status_code, 201)
+        author_id = response.get_json()['id']
+        self.assertIsNotNone(writer.get_cookie(PRIMARY_COOKIE))
+
+        # Другой клиент читает реплику, где записи еще нет
+        reader = app.test_client()
+        self.assertNotIn('Новый автор', self.author_names(reader))
+        self.assertEqual(
+            reader.get(f'/api/authors/{author_id}').status_code, 404
+        )
+
+        # Писавший клиент читает свои изменения с основной базы
+        self.assertIn('Новый автор', self.author_names(writer))
+        self.assertEqual(
+            writer.get(f'/api/authors/{author_id}').status_code, 200
+        )
+
+        # По истечении окна клиент снова читает реплику
+        writer.set_cookie(PRIMARY_COOKIE, '0')
+        self.assertNotIn('Новый автор', self.author_names(writer))
+
+        stats = reader.get('/api/stats').get_json()['db_replicas']
+        self.assertEqual(stats['primary_reads'], 2)
+        self.assertEqual(stats['replicas'][0]['reads'], 3)
+
+    def test_read_your_writes_with_cache(self):
+        app = self.create_app(CACHE_BACKEND='memory')
+        writer = app.test_client()
+        reader = app.test_client()
+        response = writer.put('/api/authors/1', json={'name': 'Новое имя'})
+        self.assertEqual(response.status_code, 200)
+
+        # Чтение с отстающей реплики кешируется после записи...
+        self.assertEqual(
+            reader.get('/api/authors/1').get_json()['name'], 'Роберт Мартин'
+        )
+        # ...но писавший клиент не получает его из кеша
+        self.assertEqual(
+            writer.get('/api/authors/1').get_json()['name'], 'Новое имя'
+        )
+        self.assertIn('Новое имя', self.author_names(writer))
+        self.assertEqual(
+            reader.get('/api/authors/1').get_json()['name'], 'Роберт Мартин'
+        )
+        stats = app.extensions['cache'].stats()
+        self.assertGreater(stats['hits'], 0)
+
+    def test_writes_in_get_go_to_primary(self):
+        app = self.create_app(POPULARITY_FLUSH_INTERVAL=0)
+        response = app.test_client().get('/api/books/1')
+        self.assertEqual(response.status_code, 200)
+        with app.app_context():
+            self.assertEqual(db.session.query(BookPopularity).count(), 1)
+
+    def test_round_robin(self):
+        app = self.create_app(replicas=2)
+        client = app.test_client()
+        for _ in range(4):
+            self.author_names(client)
+        stats = app.extensions['replicas'].stats()
+        self.assertEqual(
+            [replica['reads'] for replica in stats['replicas']], [2, 2]
+        )
+
+    def test_least_connections(self):
+        app = self.create_app(
+            replicas=2, READ_REPLICA_STRATEGY='least_connections'
+        )
+        replicas = app.extensions['replicas']
+        client = app.test_client()
+        # Занятое соединение первой реплики (долгий запрос)
+        with replicas.engines[0].connect():
+            for _ in range(3):
+                self.author_names(client)
+        self.assertEqual(replicas.reads, [0, 3])
+
+    def test_without_replicas(self):
+        app = self.create_app(replicas=0)
+        self.assertIsNone(app.extensions['replicas'])
+        client = app.test_client()
+        client.post('/api/authors', json={'name': 'Автор'})
+        self.assertIsNone(client.get_cookie(PRIMARY_COOKIE))
+        self.assertIn('Автор', self.author_names(client))
+        self.assertIsNone(client.get('/api/stats').get_json()['db_replicas'])
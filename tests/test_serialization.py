@@ -0,0 +1,94 @@
+import json
+import unittest
+from datetime import date, datetime
+from unittest import mock
+from app import create_app
+from app import serialization
+from app.serialization import FastJSONProvider
+
+
+class SerializationEngineTestCase(unittest.TestCase):
+    """Движок fast (строки Core + orjson) отдает те же данные, что orm."""
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.extensions['cache'] = None
+        self.client = self.app.test_client()
+
+    def fetch(self, engine, url):
+        self.app.config['SERIALIZATION_ENGINE'] = engine
+        self.app.json = FastJSONProvider(self.app)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def assertSameOutput(self, url):
+        orm = self.fetch('orm', url)
+        fast = self.fetch('fast', url)
+        self.assertEqual(orm.get_json(), fast.get_json(), url)
+        self.assertEqual(
+            orm.headers.get('X-Next-Cursor'), fast.headers.get('X-Next-Cursor')
+        )
+        return fast
+
+    def test_lists_match_orm(self):
+        self.client.post('/api/reviews', data=json.dumps({
+            'book_id': 1, 'rating': 4, 'text': 'Хорошо'
+        }), content_type='application/json')
+        for url in ('/api/authors', '/api/reviews', '/api/books',
+                    '/api/books?limit=2',
+                    '/api/books?fields=title,rating',
+                    '/api/books?fields=publication_date',
+                    '/api/books?sort=price&order=desc&limit=2',
+                    '/api/books?sort=publication_date&fields=title'):
+            self.assertSameOutput(url)
+
+    def test_cursor_pages_match_orm(self):
+        first = self.assertSameOutput('/api/books?sort=price&limit=2')
+        cursor = first.headers['X-Next-Cursor']
+        self.assertSameOutput(f'/api/books?sort=price&limit=2&after={cursor}')
+
+    def test_export_matches_orm(self):
+        for entity in ('authors', 'books', 'reviews'):
+            orm = self.fetch('orm', f'/api/export/{entity}')
+            fast = self.fetch('fast', f'/api/export/{entity}')
+            self.assertEqual(
+                [json.loads(line) for line in orm.data.splitlines()],
+                [json.loads(line) for line in fast.data.splitlines()]
+            )
+
+
+class FastJSONProviderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.provider = FastJSONProvider(self.app)
+
+    def test_dumps_sorted_keys_and_dates(self):
+        data = {'b': date(2024, 1, 2), 'a': datetime(2024, 1, 2, 3, 4, 5)}
+        self.assertEqual(
+            self.provider.dumps(data),
+            '{"a":"2024-01-02T03:04:05","b":"2024-01-02"}'
+        )
+        self.assertEqual(
+            self.provider.loads(self.provider.dumps({'x': [1, 'я']})),
+            {'x': [1, 'я']}
+        )
+
+    def test_stdlib_fallback(self):
+        data = {'b': 1, 'a': date(2024, 1, 2)}
+        with mock.patch.object(serialization, 'orjson', None):
+            self.assertEqual(json.loads(self.provider.dumps(data)),
+                             {'a': '2024-01-02', 'b': 1})
+            with self.app.app_context():
+                response = self.provider.response(data)
+            self.assertEqual(response.get_json(), {'a': '2024-01-02', 'b': 1})
+
+    def test_orjson_in_debug_and_pretty_on_request(self):
+        self.app.debug = True
+        with self.app.app_context():
+            response = self.provider.response({'b': 1, 'a': 2})
+            self.assertEqual(response.data, b'{"a":2,"b":1}')
+            self.app.config['JSON_PRETTY'] = True
+            response = self.provider.response({'b': 1, 'a': 2})
+        self.assertEqual(response.data, b'{\n  "a": 2,\n  "b": 1\n}')
@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import create_app, init_additional_databases
+from app.models import db, Author
+from tests.helpers import create_test_app
+
+
+def check_child_pool(app, queue):
+    """Воркер после fork: пулы прогреты заново, запросы работают."""
+    with app.app_context():
+        idle = {
+            key or 'primary': engine.pool.checkedin()
+            for key, engine in db.engines.items()
+        }
+        idle['replica'] = app.extensions['replicas'].engines[0] \
+            .pool.checkedin()
+        count = db.session.query(Author).count()
+    queue.put((idle, count))
+
+
+def check_child_memory_database(app, queue):
+    """Воркер после fork: своя база в памяти на своем соединении."""
+    with app.app_context():
+        connection = db.engine.raw_connection()
+        try:
+            address = id(connection.driver_connection)
+        finally:
+            connection.close()
+        count = db.session.query(Author).count()
+        db.session.add(Author(name='Из воркера'))
+        db.session.commit()
+    queue.put((address, count))
+
+
+class StartupTestCase(unittest.TestCase):
+    """Заполнение базы при запуске и работа после fork (--preload)."""
+
+    def test_seed_in_one_transaction(self):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement.split()[0:3])
+
+        event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            create_app('testing')
+        finally:
+            event.remove(
+                Engine, 'before_cursor_execute', before_cursor_execute
+            )
+        inserts = [words[2] for words in statements if words[0] == 'INSERT']
+        # Один пакетный INSERT на таблицу
+        for table in ('authors', 'books', 'reviews', 'book_rating_stats'):
+            self.assertEqual(inserts.count(table), 1, inserts)
+
+    def test_pool_warmed_after_fork(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        def uri(name):
+            return f'sqlite:///{os.path.join(directory, name + ".sqlite3")}'
+
+        options = {
+            'SQLALCHEMY_DATABASE_URI': uri('catalog'),
+            'READ_REPLICA_URIS': uri('replica'),
+            'POSTGRES_URI': uri('postgres'),
+        }
+        app = create_test_app(**options)
+        for thread in init_additional_databases(app):
+            thread.join()
+        with app.app_context():
+            # Прогретые соединения мастера
+            self.assertEqual(db.engine.pool.checkedin(), 2)
+            self.assertEqual(db.engines['postgres'].pool.checkedin(), 2)
+
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        worker = context.Process(target=check_child_pool, args=(app, queue))
+        worker.start()
+        result = queue.get(timeout=10)
+        worker.join()
+        # Соединения родителя сброшены, воркер открыл свои до запросов
+        self.assertEqual(
+            result, ({'primary': 2, 'postgres': 2, 'replica': 2}, 4)
+        )
+        with app.app_context():
+            self.assertEqual(db.engine.pool.checkedin(), 2)
+
+    def test_memory_database_recreated_after_fork(self):
+        app = create_app('testing')
+        with app.app_context():
+            connection = db.engine.raw_connection()
+            try:
+                address = id(connection.driver_connection)
+            finally:
+                connection.close()
+
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        worker = context.Process(
+            target=check_child_memory_database, args=(app, queue)
+        )
+        worker.start()
+        child_address, count = queue.get(timeout=10)
+        worker.join()
+        # Соединение родителя не используется, база заполнена заново
+        self.assertNotEqual(child_address, address)
+        self.assertEqual(count, 4)
+        with app.app_context():
+            self.assertEqual(db.session.query(Author).count(), 4)
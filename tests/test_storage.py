@@ -0,0 +1,164 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from app.models import db, Author
+from app.storage import snapshot_database
+from tests.helpers import create_test_app
+
+
+def write_authors(path, count):
+    """Воркер: запуск приложения на общем файле и запись авторов."""
+    client = create_test_app(
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{path}'
+    ).test_client()
+    for i in range(count):
+        response = client.post('/api/authors', json={'name': f'Автор {i}'})
+        if response.status_code != 201:
+            os._exit(1)
+    os._exit(0)
+
+
+def save_in_worker(app, queue):
+    """Воркер после fork: запись и сохранение базы обработчиком выхода."""
+    from app import storage
+    app.test_client().post('/api/authors', json={'name': 'Из воркера'})
+    registered = storage.atexit.register.call_args[0][0]
+    queue.put(storage.atexit.unregister.called)
+    registered()
+
+
+class StorageTestCase(unittest.TestCase):
+    """Файловая SQLite (WAL) и снимки базы в памяти."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'catalog.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def create_app(self, **options):
+        return create_test_app(**options)
+
+    def file_app(self):
+        return self.create_app(
+            SQLALCHEMY_DATABASE_URI=f'sqlite:///{self.path}'
+        )
+
+    def test_file_database(self):
+        app = self.file_app()
+        with app.app_context():
+            connection = db.engine.raw_connection()
+            try:
+                cursor = connection.cursor()
+                self.assertEqual(
+                    cursor.execute('PRAGMA journal_mode').fetchone()[0], 'wal'
+                )
+                self.assertEqual(
+                    cursor.execute('PRAGMA busy_timeout').fetchone()[0], 5000
+                )
+            finally:
+                connection.close()
+            # Схема создана миграциями
+            self.assertEqual(db.session.scalar(
+                db.text('SELECT version_num FROM alembic_version')
+            ), '0004')
+        response = app.test_client().post(
+            '/api/authors', json={'name': 'Сохраненный автор'}
+        )
+        self.assertEqual(response.status_code, 201)
+
+        # Второй воркер видит данные и не заполняет базу повторно
+        authors = self.file_app().test_client().get('/api/authors').get_json()
+        self.assertEqual(len(authors), 5)
+        self.assertEqual(authors[-1]['name'], 'Сохраненный автор')
+
+    def test_concurrent_workers(self):
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=write_authors, args=(self.path, 20))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual([worker.exitcode for worker in workers], [0] * 4)
+        app = self.file_app()
+        with app.app_context():
+            # 4 автора начальных данных (заполнены один раз) + 4 x 20
+            self.assertEqual(db.session.query(Author).count(), 84)
+
+    def test_snapshot_warm_load(self):
+        snapshot = os.path.join(self.dir, 'snapshot.sqlite3')
+        app = self.create_app()
+        app.test_client().post('/api/authors', json={'name': 'Из снимка'})
+        result = app.test_cli_runner().invoke(
+            args=['snapshot', 'save', snapshot]
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+
+        restored = self.create_app(SQLITE_SNAPSHOT_PATH=snapshot)
+        client = restored.test_client()
+        names = [a['name'] for a in client.get('/api/authors').get_json()]
+        self.assertEqual(names.count('Из снимка'), 1)
+        self.assertEqual(len(names), 5)
+        # Поиск (FTS5) и внешние ключи работают после загрузки
+        self.assertEqual(
+            client.get('/api/search?q=снимка').get_json()['items'][0]
+            ['item']['name'], 'Из снимка'
+        )
+        self.assertEqual(client.post('/api/books', json={
+            'title': 'Книга', 'author_id': 999
+        }).status_code, 404)
+
+    def test_snapshot_on_exit_only_in_workers(self):
+        snapshot = os.path.join(self.dir, 'snapshot.sqlite3')
+        with mock.patch('app.storage.atexit') as atexit:
+            app = self.create_app(
+                SQLITE_SNAPSHOT_PATH=snapshot, SQLITE_SNAPSHOT_ON_EXIT=True
+            )
+            save_on_exit = atexit.register.call_args[0][0]
+            context = multiprocessing.get_context('fork')
+            queue = context.Queue()
+            worker = context.Process(
+                target=save_in_worker, args=(app, queue)
+            )
+            worker.start()
+            # Обработчик остался у воркера
+            self.assertFalse(queue.get(timeout=10))
+            worker.join()
+            self.assertEqual(worker.exitcode, 0)
+            # и снят у мастера, чтобы не затереть снимок воркера
+            atexit.unregister.assert_called_with(save_on_exit)
+
+        restored = self.create_app(SQLITE_SNAPSHOT_PATH=snapshot)
+        names = [
+            a['name']
+            for a in restored.test_client().get('/api/authors').get_json()
+        ]
+        self.assertIn('Из воркера', names)
+
+    def test_load_into_file_database(self):
+        snapshot = os.path.join(self.dir, 'snapshot.sqlite3')
+        source = self.create_app()
+        source.test_client().post('/api/authors', json={'name': 'Снимок'})
+        with source.app_context():
+            snapshot_database(db.engine, snapshot)
+
+        app = self.file_app()
+        result = app.test_cli_runner().invoke(
+            args=['snapshot', 'load', snapshot]
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        names = [a['name'] for a in
+                 app.test_client().get('/api/authors').get_json()]
+        self.assertIn('Снимок', names)
+
+        result = source.test_cli_runner().invoke(
+            args=['snapshot', 'load', snapshot]
+        )
+        self.assertNotEqual(result.exit_code, 0)